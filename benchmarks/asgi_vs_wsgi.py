@@ -0,0 +1,80 @@
+"""
+Compare the sync DRF views under a WSGI server with the async views under an ASGI server.
+
+Both servers run against the database configured in settings (load it first with
+`manage.py load_data`), with the same number of worker processes, and receive the same
+request mix: view-loan, view-loans and check-eligibility for customers found in the DB.
+
+    python -m benchmarks.asgi_vs_wsgi --requests 5000 --concurrency 64 --json results.json
+"""
+import argparse
+import json
+import random
+import sys
+
+from benchmarks import loadgen
+
+
+def sample_requests(count, seed):
+    # Request paths relative to the API root, drawn from existing customers and loans
+    loadgen.setup_django()
+    from creditApprovalApp.models import Loan
+
+    rng = random.Random(seed)
+    loans = list(Loan.objects.order_by('?').values_list('loan_id', 'customer_id')[:500])
+    if not loans:
+        raise SystemExit("No loans in the database, run `manage.py load_data` first.")
+
+    requests = []
+    for _ in range(count):
+        loan_id, customer_id = rng.choice(loans)
+        kind = rng.random()
+        if kind < 0.4:
+            requests.append(("GET", f"/view-loan/{loan_id}", None))
+        elif kind < 0.7:
+            requests.append(("GET", f"/view-loans/{customer_id}", None))
+        else:
+            requests.append(("POST", "/check-eligibility", {
+                "customer_id": customer_id,
+                "loan_amount": rng.randrange(50000, 1000000, 5000),
+                "tenure": rng.choice([6, 12, 24, 36]),
+                "interest_rate": rng.choice([8, 10, 12, 14]),
+            }))
+    return requests
+
+
+def bench(kind, requests, args):
+    port = args.port + (kind == "asgi")
+    with loadgen.serve(kind, port, args.workers, args.threads, args.server_logs) as base_url:
+        if kind == "asgi":
+            requests = [(method, "/async" + path, body) for method, path, body in requests]
+        loadgen.run(base_url, requests, args.concurrency, total=min(len(requests), args.warmup))
+        return loadgen.run(base_url, requests, args.concurrency)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=5000)
+    parser.add_argument('--concurrency', type=int, default=64)
+    parser.add_argument('--workers', type=int, default=1, help='Server worker processes for both servers')
+    parser.add_argument('--threads', type=int, default=8, help='Threads per WSGI worker')
+    parser.add_argument('--warmup', type=int, default=500)
+    parser.add_argument('--port', type=int, default=8100)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--server-logs', action='store_true', help='Show server output')
+    parser.add_argument('--json', help='Write results to this file')
+    args = parser.parse_args()
+
+    requests = sample_requests(args.requests, args.seed)
+    results = {kind: bench(kind, requests, args) for kind in ("wsgi", "asgi")}
+
+    print(f"{'server':<6} {'rps':>9} {'p50 ms':>9} {'p99 ms':>9} {'errors':>7}")
+    for kind, r in results.items():
+        print(f"{kind:<6} {r['rps']:>9} {r['p50_ms']:>9} {r['p99_ms']:>9} {r['errors']:>7}")
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({"config": vars(args), "results": results}, f, indent=2)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
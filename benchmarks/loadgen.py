@@ -0,0 +1,131 @@
+"""
+Small closed-loop HTTP load generator shared by the benchmark scripts.
+
+Each worker thread owns one keep-alive connection and takes the next request from a
+shared list, so `concurrency` is the number of requests in flight at any time.
+"""
+import http.client
+import json
+import os
+import subprocess
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+SERVERS = {
+    "wsgi": ["gunicorn", "creditApproval.wsgi:application", "--bind", "127.0.0.1:{port}",
+             "--workers", "{workers}", "--threads", "{threads}", "--log-level", "warning"],
+    "asgi": ["uvicorn", "creditApproval.asgi:application", "--host", "127.0.0.1", "--port", "{port}",
+             "--workers", "{workers}", "--log-level", "warning", "--no-access-log"],
+}
+
+
+def setup_django():
+    # Benchmarks read and seed the database configured in settings
+    import django
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'creditApproval.settings')
+    django.setup()
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(q / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def summarize(latencies, statuses, errors, elapsed):
+    # Throughput and latency percentiles (milliseconds) for one run
+    latencies = sorted(latencies)
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "elapsed_s": round(elapsed, 3),
+        "rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p90_ms": round(percentile(latencies, 90) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "max_ms": round(latencies[-1] * 1000, 2) if latencies else 0.0,
+        "status_codes": dict(sorted(Counter(statuses).items())),
+    }
+
+
+def run(base_url, requests, concurrency=16, total=None, on_response=None):
+    # Issue `total` requests (default: each request once) cycling through `requests`,
+    # a list of (method, path, json body or None). on_response(request, status, headers,
+    # latency) is called from worker threads for per-request bookkeeping.
+    url = urlsplit(base_url)
+    total = len(requests) if total is None else total
+    lock = threading.Lock()
+    next_index = iter(range(total))
+    latencies, statuses = [], []
+    errors = 0
+
+    def worker():
+        nonlocal errors
+        conn = http.client.HTTPConnection(url.hostname, url.port or 80, timeout=30)
+        try:
+            while True:
+                with lock:
+                    i = next(next_index, None)
+                if i is None:
+                    return
+                method, path, body = requests[i % len(requests)]
+                payload = json.dumps(body) if body is not None else None
+                headers = {"Content-Type": "application/json"} if payload is not None else {}
+                started = time.perf_counter()
+                try:
+                    conn.request(method, url.path.rstrip('/') + path, body=payload, headers=headers)
+                    response = conn.getresponse()
+                    response.read()
+                except (OSError, http.client.HTTPException):
+                    conn.close()
+                    conn = http.client.HTTPConnection(url.hostname, url.port or 80, timeout=30)
+                    with lock:
+                        errors += 1
+                    continue
+                latency = time.perf_counter() - started
+                with lock:
+                    latencies.append(latency)
+                    statuses.append(response.status)
+                if on_response is not None:
+                    on_response(requests[i % len(requests)], response.status, response.headers, latency)
+        finally:
+            conn.close()
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for future in [pool.submit(worker) for _ in range(concurrency)]:
+            future.result()
+    return summarize(latencies, statuses, errors, time.perf_counter() - started)
+
+
+@contextmanager
+def serve(kind, port, workers=1, threads=8, logs=False, env=None):
+    # Run the app under gunicorn ("wsgi") or uvicorn ("asgi") for the duration of the block
+    command = [part.format(port=port, workers=workers, threads=threads) for part in SERVERS[kind]]
+    output = None if logs else subprocess.DEVNULL
+    server = subprocess.Popen(command, stdout=output, stderr=output, env={**os.environ, **(env or {})})
+    try:
+        wait_for_port("127.0.0.1", port)
+        yield f"http://127.0.0.1:{port}"
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+
+
+def wait_for_port(host, port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection(host, port, timeout=1)
+            conn.request("GET", "/")
+            conn.getresponse().read()
+            conn.close()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"Server on {host}:{port} did not start within {timeout}s")
@@ -0,0 +1,116 @@
+"""
+Measure the per-request cost of the API-only configuration against the previous one.
+
+"full" is the old setup: every request runs the session, CSRF, auth, messages and
+clickjacking middleware, and DRF negotiates between JSONRenderer and the browsable API and
+runs session and basic authentication. "lean" is the current settings: admin middleware
+scoped to /admin/, orjson rendering and parsing, no authentication. Requests go through
+Django's full handler in-process (django.test.Client), so network and server overhead
+are left out, against customers and loans from the configured database with warm caches.
+
+    python -m benchmarks.middleware_overhead --iterations 5000 --json overhead.json
+"""
+import argparse
+import json
+import logging
+import sys
+import time
+from contextlib import contextmanager
+from unittest.mock import patch
+
+from benchmarks import loadgen
+
+FULL_MIDDLEWARE = [
+    'creditApprovalApp.middleware.MetricsMiddleware',
+    'django.middleware.security.SecurityMiddleware',
+    'django.contrib.sessions.middleware.SessionMiddleware',
+    'django.middleware.common.CommonMiddleware',
+    'django.middleware.csrf.CsrfViewMiddleware',
+    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'django.contrib.messages.middleware.MessageMiddleware',
+    'django.middleware.clickjacking.XFrameOptionsMiddleware',
+]
+
+
+@contextmanager
+def configuration(name):
+    if name == "lean":
+        yield
+        return
+    from django.test import override_settings
+    from rest_framework import authentication, parsers, renderers
+    from rest_framework.views import APIView
+
+    # The views take these from APIView, whose defaults were read from settings at import time
+    full_api = {
+        "renderer_classes": [renderers.JSONRenderer, renderers.BrowsableAPIRenderer],
+        "parser_classes": [parsers.JSONParser, parsers.FormParser, parsers.MultiPartParser],
+        "authentication_classes": [authentication.SessionAuthentication, authentication.BasicAuthentication],
+    }
+    with override_settings(MIDDLEWARE=FULL_MIDDLEWARE), patch.multiple(APIView, **full_api):
+        yield
+
+
+def sample_requests():
+    from creditApprovalApp.models import Loan
+
+    loan = Loan.objects.order_by('loan_id').values('loan_id', 'customer_id').first()
+    if loan is None:
+        raise SystemExit("No loans in the database, run benchmarks/populate.py first.")
+    quote = {"customer_id": loan["customer_id"], "loan_amount": 100000, "tenure": 12, "interest_rate": 10}
+    return {
+        "view-loan": ("get", f"/view-loan/{loan['loan_id']}", None),
+        "view-loans": ("get", f"/view-loans/{loan['customer_id']}", None),
+        "check-eligibility": ("post", "/check-eligibility", json.dumps(quote)),
+    }
+
+
+def time_requests(client, request, iterations):
+    # Mean seconds per request
+    method, path, body = request
+    call = getattr(client, method)
+    kwargs = {"data": body, "content_type": "application/json"} if body is not None else {}
+    started = time.perf_counter()
+    for _ in range(iterations):
+        response = call(path, **kwargs)
+    elapsed = time.perf_counter() - started
+    if response.status_code >= 500:
+        raise SystemExit(f"{method.upper()} {path} returned {response.status_code}")
+    return elapsed / iterations
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--iterations', type=int, default=2000, help='Requests per endpoint per round')
+    parser.add_argument('--rounds', type=int, default=5, help='Alternating rounds, the fastest is kept')
+    parser.add_argument('--json', help='Write results to this file')
+    args = parser.parse_args()
+
+    loadgen.setup_django()
+    from django.test import Client
+    # Rejected quotes answer 400, which Django would log on every request
+    logging.getLogger('django.request').setLevel(logging.ERROR)
+
+    requests = sample_requests()
+    best = {config: {endpoint: float("inf") for endpoint in requests} for config in ("full", "lean")}
+    for _ in range(args.rounds):
+        for config in best:
+            with configuration(config):
+                client = Client()
+                for endpoint, request in requests.items():
+                    time_requests(client, request, 50)
+                    best[config][endpoint] = min(best[config][endpoint], time_requests(client, request, args.iterations))
+
+    results = {}
+    print(f"{'endpoint':<20} {'full us':>9} {'lean us':>9} {'saved us':>9} {'saved':>7}")
+    for endpoint in requests:
+        full, lean = best["full"][endpoint] * 1e6, best["lean"][endpoint] * 1e6
+        results[endpoint] = {"full_us": round(full, 1), "lean_us": round(lean, 1), "saved_us": round(full - lean, 1)}
+        print(f"{endpoint:<20} {full:>9.1f} {lean:>9.1f} {full - lean:>9.1f} {(full - lean) / full:>7.1%}")
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({"config": vars(args), "results": results}, f, indent=2)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
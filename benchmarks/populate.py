@@ -0,0 +1,114 @@
+"""
+Seed the configured database with a synthetic population of customers and loans.
+
+Salaries are log-normal, approved limits follow the /register rule, and each customer
+gets a Poisson number of loans spread over the last ten years with EMIs from the
+standard formula. Credit profiles are rebuilt for the new customers afterwards.
+
+    python -m benchmarks.populate --customers 20000 --loans-per-customer 4 --seed 1
+"""
+import argparse
+import math
+import random
+import sys
+import time
+from datetime import date, timedelta
+
+from benchmarks import loadgen
+
+
+def poisson(rng, mean):
+    # Knuth's method, fine for the small means used here
+    limit, k, p = math.exp(-mean), 0, rng.random()
+    while p > limit:
+        k += 1
+        p *= rng.random()
+    return k
+
+
+def build_customers(rng, count, first_phone):
+    from creditApprovalApp.models import Customer
+
+    for i in range(count):
+        salary = int(min(max(rng.lognormvariate(10.8, 0.5), 15000), 500000))
+        yield Customer(
+            first_name=rng.choice(["Aarav", "Diya", "Ishaan", "Kavya", "Rohan", "Sara", "Vihaan", "Zoya"]),
+            last_name=rng.choice(["Bisht", "Iyer", "Khan", "Mehta", "Nair", "Rao", "Sharma", "Singh"]),
+            phone_number=str(first_phone + i),
+            monthly_salary=salary,
+            approved_limit=round((36 * salary) / 100000) * 100000,
+            age=rng.randint(21, 65),
+        )
+
+
+def build_loans(rng, customer, mean_loans, today):
+    from creditApprovalApp.models import Loan
+    from creditApprovalApp.utils import calculate_emi
+
+    loans = []
+    for _ in range(poisson(rng, mean_loans)):
+        tenure = rng.choice([6, 12, 24, 36, 48, 60])
+        rate = round(rng.uniform(7, 18), 2)
+        amount = rng.randrange(50000, max(customer.approved_limit, 100000), 5000)
+        start = today - timedelta(days=rng.randrange(3650))
+        end = start + timedelta(days=round(tenure * 30.44))
+        months_elapsed = min(tenure, (today - start).days // 30)
+        loans.append(Loan(
+            customer=customer,
+            loan_amount=amount,
+            tenure=tenure,
+            interest_rate=rate,
+            monthly_repayment=calculate_emi(amount, rate, tenure),
+            emis_paid_on_time=sum(rng.random() < 0.9 for _ in range(months_elapsed)),
+            start_date=start,
+            end_date=end,
+        ))
+    return loans
+
+
+def populate(customers, mean_loans, chunk_size, seed):
+    # Returns (customers created, loans created)
+    from django.db import transaction
+    from django.db.models import Max
+    from creditApprovalApp.models import Customer, Loan
+    from creditApprovalApp.utils import rebuild_credit_profiles
+
+    rng = random.Random(seed)
+    today = date.today()
+    # Ten-digit numbers above anything already loaded keep phone_number unique
+    highest = Customer.objects.aggregate(highest=Max('customer_id'))['highest'] or 0
+    first_phone = 6_000_000_000 + highest * 10
+
+    created = loans_created = 0
+    rows = build_customers(rng, customers, first_phone)
+    while chunk := [c for _, c in zip(range(chunk_size), rows)]:
+        with transaction.atomic():
+            chunk = Customer.objects.bulk_create(chunk)
+            loans = [loan for customer in chunk for loan in build_loans(rng, customer, mean_loans, today)]
+            for loan in loans:
+                if loan.end_date >= today:
+                    loan.customer.current_debt += int(loan.loan_amount)
+            Customer.objects.bulk_update(chunk, ['current_debt'])
+            Loan.objects.bulk_create(loans, batch_size=chunk_size)
+            rebuild_credit_profiles(customer_ids=[c.customer_id for c in chunk])
+        created += len(chunk)
+        loans_created += len(loans)
+    return created, loans_created
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--customers', type=int, default=10000)
+    parser.add_argument('--loans-per-customer', type=float, default=4, help='Mean loans per customer')
+    parser.add_argument('--chunk-size', type=int, default=2000)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    loadgen.setup_django()
+    started = time.perf_counter()
+    customers, loans = populate(args.customers, args.loans_per_customer, args.chunk_size, args.seed)
+    print(f"Created {customers} customers and {loans} loans in {time.perf_counter() - started:.2f}s")
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,113 @@
+"""
+Record a request mix for benchmarks/replay.py as JSON lines.
+
+Each line holds request_id, endpoint, method, path and body. Customers and loans are
+sampled from the configured database, so populate it first (benchmarks/populate.py or
+`manage.py load_data`). The mix is given as endpoint=weight pairs.
+
+    python -m benchmarks.record --count 20000 --out mix.jsonl \\
+        --mix register=5,check-eligibility=35,create-loan=10,view-loan=30,view-loans=20
+"""
+import argparse
+import json
+import random
+import sys
+
+from benchmarks import loadgen
+
+DEFAULT_MIX = "register=5,check-eligibility=35,create-loan=10,view-loan=30,view-loans=20"
+
+
+def parse_mix(text):
+    mix = {}
+    for part in text.split(','):
+        endpoint, _, weight = part.partition('=')
+        if endpoint.strip() not in BUILDERS:
+            raise SystemExit(f"Unknown endpoint {endpoint!r}, expected one of: {', '.join(BUILDERS)}")
+        mix[endpoint.strip()] = float(weight or 1)
+    return mix
+
+
+def loan_quote(rng, customer_id):
+    return {
+        "customer_id": customer_id,
+        "loan_amount": rng.randrange(50000, 1000000, 5000),
+        "tenure": rng.choice([6, 12, 24, 36]),
+        "interest_rate": rng.choice([8, 10, 12, 14, 16]),
+    }
+
+
+def register(rng, n, sample):
+    # replay.py swaps in a fresh phone number per run so recordings stay replayable
+    return "POST", "/register", {
+        "first_name": "Bench",
+        "last_name": f"User{n}",
+        "age": rng.randint(21, 65),
+        "monthly_income": rng.randrange(20000, 300000, 1000),
+        "phone_number": f"{n:010d}",
+    }
+
+
+def check_eligibility(rng, n, sample):
+    _, customer_id = rng.choice(sample)
+    return "POST", "/check-eligibility", loan_quote(rng, customer_id)
+
+
+def create_loan(rng, n, sample):
+    _, customer_id = rng.choice(sample)
+    return "POST", "/create-loan", loan_quote(rng, customer_id)
+
+
+def view_loan(rng, n, sample):
+    loan_id, _ = rng.choice(sample)
+    return "GET", f"/view-loan/{loan_id}", None
+
+
+def view_loans(rng, n, sample):
+    _, customer_id = rng.choice(sample)
+    return "GET", f"/view-loans/{customer_id}", None
+
+
+BUILDERS = {
+    "register": register,
+    "check-eligibility": check_eligibility,
+    "create-loan": create_loan,
+    "view-loan": view_loan,
+    "view-loans": view_loans,
+}
+
+
+def record(count, mix, seed, sample_size=2000):
+    from creditApprovalApp.models import Loan
+
+    rng = random.Random(seed)
+    sample = list(Loan.objects.order_by('?').values_list('loan_id', 'customer_id')[:sample_size])
+    if not sample:
+        raise SystemExit("No loans in the database, run benchmarks/populate.py first.")
+    endpoints, weights = zip(*mix.items())
+    for n in range(count):
+        endpoint = rng.choices(endpoints, weights)[0]
+        method, path, body = BUILDERS[endpoint](rng, n, sample)
+        yield {"request_id": f"r{n:07d}", "endpoint": endpoint, "method": method, "path": path, "body": body}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--count', type=int, default=10000)
+    parser.add_argument('--mix', default=DEFAULT_MIX, help='Comma separated endpoint=weight pairs')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--out', default='-', help='Output file (default: stdout)')
+    args = parser.parse_args()
+
+    loadgen.setup_django()
+    out = sys.stdout if args.out == '-' else open(args.out, 'w')
+    try:
+        for line in record(args.count, parse_mix(args.mix), args.seed):
+            out.write(json.dumps(line) + '\n')
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,152 @@
+"""
+Replay a recorded request mix (benchmarks/record.py) and report per-endpoint throughput,
+latency percentiles and DB queries per request.
+
+Query counts come from the X-DB-Queries header, which the server adds when started with
+DB_QUERY_COUNT_HEADER=1; --serve starts gunicorn or uvicorn that way. Results are written
+as JSON with the current commit so runs can be compared with --compare.
+
+    python -m benchmarks.replay mix.jsonl --serve wsgi --concurrency 32 --json after.json --compare before.json
+    python -m benchmarks.replay mix.jsonl --url http://127.0.0.1:8000
+"""
+import argparse
+import json
+import random
+import subprocess
+import sys
+import threading
+import time
+from collections import defaultdict
+from contextlib import nullcontext
+
+from benchmarks import loadgen
+
+
+def load_mix(path, phone_seed):
+    # (method, path, body) tuples; register bodies get phone numbers unique to this run
+    run = random.Random(phone_seed).randrange(1000, 10000)
+    requests = []
+    with open(path) as f:
+        for n, line in enumerate(filter(str.strip, f)):
+            entry = json.loads(line)
+            body = entry.get("body")
+            if entry["path"] == "/register" and body is not None:
+                body = {**body, "phone_number": f"5{run}{n:07d}"[:15]}
+            requests.append((entry["method"], entry["path"], body))
+    return requests
+
+
+def endpoint_of(path):
+    # "/view-loan/12" -> "view-loan", "/check-eligibility/batch" -> "check-eligibility/batch"
+    parts = path.strip('/').split('/')
+    return '/'.join(p for p in parts if not p.isdigit())
+
+
+class EndpointStats:
+    # Per-endpoint latencies, statuses and query counts collected from loadgen workers
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.statuses = defaultdict(list)
+        self.queries = defaultdict(list)
+
+    def __call__(self, request, status, headers, latency):
+        endpoint = endpoint_of(request[1])
+        queries = headers.get("X-DB-Queries")
+        with self.lock:
+            self.latencies[endpoint].append(latency)
+            self.statuses[endpoint].append(status)
+            if queries is not None:
+                self.queries[endpoint].append(int(queries))
+
+    def summary(self, elapsed):
+        results = {}
+        for endpoint in sorted(self.latencies):
+            result = loadgen.summarize(self.latencies[endpoint], self.statuses[endpoint], 0, elapsed)
+            del result["errors"]
+            queries = self.queries[endpoint]
+            result["db_queries_per_request"] = round(sum(queries) / len(queries), 2) if queries else None
+            result["db_queries_max"] = max(queries) if queries else None
+            results[endpoint] = result
+        return results
+
+
+def current_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def replay(base_url, requests, concurrency, warmup):
+    if warmup:
+        loadgen.run(base_url, requests, concurrency, total=min(warmup, len(requests)))
+    stats = EndpointStats()
+    total = loadgen.run(base_url, requests, concurrency, on_response=stats)
+    total_queries = [q for queries in stats.queries.values() for q in queries]
+    total["db_queries_per_request"] = round(sum(total_queries) / len(total_queries), 2) if total_queries else None
+    return {"total": total, "endpoints": stats.summary(total["elapsed_s"])}
+
+
+def print_results(results, baseline=None):
+    def delta(row, key, name):
+        if baseline is None:
+            return ""
+        before = (baseline["total"] if name == "total" else baseline["endpoints"].get(name, {})).get(key)
+        if not before or row.get(key) is None:
+            return f"{'':>8}"
+        return f"{(row[key] - before) / before * 100:>+7.1f}%"
+
+    print(f"{'endpoint':<24} {'requests':>8} {'rps':>9}{'':>8} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8}{'':>8} {'queries':>8}")
+    rows = [*results["endpoints"].items(), ("total", results["total"])]
+    for name, row in rows:
+        queries = row.get("db_queries_per_request")
+        print(
+            f"{name:<24} {row['requests']:>8} {row['rps']:>9}{delta(row, 'rps', name)} "
+            f"{row['p50_ms']:>8} {row['p90_ms']:>8} {row['p99_ms']:>8}{delta(row, 'p99_ms', name)} "
+            f"{'-' if queries is None else queries:>8}"
+        )
+    if results["total"]["errors"]:
+        print(f"{results['total']['errors']} requests failed at the connection level")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('mix', help='JSON lines file written by benchmarks/record.py')
+    parser.add_argument('--url', default='http://127.0.0.1:8000', help='Running server to replay against')
+    parser.add_argument('--serve', choices=sorted(loadgen.SERVERS), help='Start a server instead of using --url')
+    parser.add_argument('--workers', type=int, default=1, help='Worker processes for --serve')
+    parser.add_argument('--threads', type=int, default=8, help='Threads per WSGI worker for --serve')
+    parser.add_argument('--port', type=int, default=8100, help='Port for --serve')
+    parser.add_argument('--server-logs', action='store_true', help='Show output of the --serve server')
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--warmup', type=int, default=200, help='Requests to issue before measuring')
+    parser.add_argument('--seed', type=int, help='Seed for register phone numbers (default: time based)')
+    parser.add_argument('--json', help='Write results to this file')
+    parser.add_argument('--compare', help='Earlier --json results to show rps and p99 changes against')
+    args = parser.parse_args()
+
+    requests = load_mix(args.mix, time.time_ns() if args.seed is None else args.seed)
+    if not requests:
+        raise SystemExit(f"{args.mix} has no requests")
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+
+    server = nullcontext(args.url)
+    if args.serve:
+        server = loadgen.serve(args.serve, args.port, args.workers, args.threads, args.server_logs,
+                               env={"DB_QUERY_COUNT_HEADER": "1"})
+    with server as base_url:
+        results = replay(base_url, requests, args.concurrency, args.warmup)
+
+    print_results(results, baseline)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({"commit": current_commit(), "config": vars(args), "results": results}, f, indent=2)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,68 @@
+"""
+Compare the compiled request schemas in creditApprovalApp/validation.py with an equivalent
+DRF serializer, on valid and invalid loan quotes. No database access is involved.
+
+    python -m benchmarks.validation --iterations 100000
+"""
+import argparse
+import sys
+import time
+
+from benchmarks import loadgen
+
+PAYLOADS = {
+    "valid": {"customer_id": 42, "loan_amount": 250000, "tenure": 24, "interest_rate": 11.5},
+    "strings": {"customer_id": "42", "loan_amount": "250000", "tenure": "24", "interest_rate": "11.5"},
+    "invalid": {"customer_id": "x", "loan_amount": -5, "tenure": 24},
+}
+
+
+def loan_request_serializer():
+    from rest_framework import serializers
+
+    class LoanRequestSerializer(serializers.Serializer):
+        customer_id = serializers.IntegerField()
+        loan_amount = serializers.FloatField()
+        tenure = serializers.IntegerField()
+        interest_rate = serializers.FloatField(min_value=0)
+
+        def validate_loan_amount(self, value):
+            if value <= 0:
+                raise serializers.ValidationError("Loan amount must be positive")
+            return value
+
+        def validate_tenure(self, value):
+            if value <= 0:
+                raise serializers.ValidationError("Tenure must be positive")
+            return value
+
+    return LoanRequestSerializer
+
+
+def per_call(func, payload, iterations):
+    started = time.perf_counter()
+    for _ in range(iterations):
+        func(payload)
+    return (time.perf_counter() - started) / iterations
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--iterations', type=int, default=50000)
+    args = parser.parse_args()
+
+    loadgen.setup_django()
+    from creditApprovalApp.validation import LOAN_REQUEST
+
+    serializer = loan_request_serializer()
+    drf = lambda payload: serializer(data=payload).is_valid()
+
+    print(f"{'payload':<10} {'schema us':>10} {'drf us':>10} {'speedup':>8}")
+    for name, payload in PAYLOADS.items():
+        ours = per_call(LOAN_REQUEST.validate, payload, args.iterations)
+        theirs = per_call(drf, payload, max(1, args.iterations // 10))
+        print(f"{name:<10} {ours * 1e6:>10.2f} {theirs * 1e6:>10.2f} {theirs / ours:>7.0f}x")
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -44,14 +44,43 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Per-view latency and SQL metrics, served at /metrics
+    'creditApprovalApp.middleware.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
-    'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
+    # Runs ADMIN_MIDDLEWARE for ADMIN_PATH_PREFIXES only, the JSON API skips it
+    'creditApprovalApp.middleware.AdminMiddleware',
+]
+
+# Session, CSRF, auth, messages and clickjacking middleware, only needed by the admin
+ADMIN_MIDDLEWARE = [
+    'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
+ADMIN_PATH_PREFIXES = ('/admin/',)
+
+# The admin checks look for its middleware in MIDDLEWARE, AdminMiddleware provides it instead
+SILENCED_SYSTEM_CHECKS = ['admin.E408', 'admin.E409', 'admin.E410']
+
+# The API is unauthenticated JSON only: no browsable API, session auth or form negotiation
+REST_FRAMEWORK = {
+    'DEFAULT_RENDERER_CLASSES': ['creditApprovalApp.renderers.ORJSONRenderer'],
+    'DEFAULT_PARSER_CLASSES': [
+        'creditApprovalApp.parsers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
+    'DEFAULT_AUTHENTICATION_CLASSES': [],
+    'DEFAULT_PERMISSION_CLASSES': ['rest_framework.permissions.AllowAny'],
+    'UNAUTHENTICATED_USER': None,
+}
+
+# Benchmarks: report per-request SQL query counts in an X-DB-Queries header
+if os.environ.get("DB_QUERY_COUNT_HEADER", "").lower() in ("1", "true", "yes", "on"):
+    MIDDLEWARE.insert(0, 'creditApprovalApp.middleware.QueryCountMiddleware')
 
 ROOT_URLCONF = 'creditApproval.urls'
 
@@ -76,6 +105,19 @@ WSGI_APPLICATION = 'creditApproval.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# Connection reuse is opt-in:
+#   DB_CONN_MAX_AGE     seconds to keep a connection per worker thread ("none" = forever)
+#   DB_CONN_HEALTH_CHECKS  check reused connections before each request
+#   DB_POOL             use psycopg's connection pool instead (needs psycopg 3), sized by
+#                       DB_POOL_MIN_SIZE / DB_POOL_MAX_SIZE, waiting DB_POOL_TIMEOUT seconds
+# Pool usage for a running process is served at /pool-stats.
+
+def env_flag(name, default=False):
+    return os.environ.get(name, str(default)).lower() in ("1", "true", "yes", "on")
+
+DB_POOL = env_flag("DB_POOL")
+DB_CONN_MAX_AGE = os.environ.get("DB_CONN_MAX_AGE", "0")
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.postgresql',
@@ -84,9 +126,73 @@ DATABASES = {
         'PASSWORD': os.environ.get("DB_PASSWORD"),
         'HOST': os.environ.get("DB_HOST"),
         'PORT': os.environ.get("DB_PORT"),
+        # The pool replaces persistent connections, Django rejects both at once
+        'CONN_MAX_AGE': 0 if DB_POOL else (None if DB_CONN_MAX_AGE.lower() == "none" else int(DB_CONN_MAX_AGE)),
+        'CONN_HEALTH_CHECKS': env_flag("DB_CONN_HEALTH_CHECKS"),
+        'OPTIONS': {},
     }
 }
 
+if DB_POOL:
+    DATABASES['default']['OPTIONS']['pool'] = {
+        'min_size': int(os.environ.get("DB_POOL_MIN_SIZE", 2)),
+        'max_size': int(os.environ.get("DB_POOL_MAX_SIZE", 10)),
+        'timeout': float(os.environ.get("DB_POOL_TIMEOUT", 10)),
+    }
+
+# Optional read replica: DB_REPLICA_HOST and/or DB_REPLICA_NAME add a `replica` alias (with
+# DB_REPLICA_PORT / DB_REPLICA_USER / DB_REPLICA_PASSWORD defaulting to the primary's) that serves
+# the read-only views. A client is kept on the primary for DB_REPLICA_PIN_SECONDS after one of its
+# requests wrote, see creditApprovalApp/routers.py.
+
+if os.environ.get("DB_REPLICA_HOST") or os.environ.get("DB_REPLICA_NAME"):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'NAME': os.environ.get("DB_REPLICA_NAME", DATABASES['default']['NAME']),
+        'USER': os.environ.get("DB_REPLICA_USER", DATABASES['default']['USER']),
+        'PASSWORD': os.environ.get("DB_REPLICA_PASSWORD", DATABASES['default']['PASSWORD']),
+        'HOST': os.environ.get("DB_REPLICA_HOST", DATABASES['default']['HOST']),
+        'PORT': os.environ.get("DB_REPLICA_PORT", DATABASES['default']['PORT']),
+        'OPTIONS': dict(DATABASES['default']['OPTIONS']),
+        # Tests read the primary's test database through this alias
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_ROUTERS = ['creditApprovalApp.routers.ReplicaRouter']
+    MIDDLEWARE.insert(MIDDLEWARE.index('creditApprovalApp.middleware.MetricsMiddleware') + 1,
+                      'creditApprovalApp.middleware.ReplicaPinMiddleware')
+
+REPLICA_PIN_COOKIE = 'db-pin'
+REPLICA_PIN_SECONDS = int(os.environ.get("DB_REPLICA_PIN_SECONDS", 5))
+
+# Cache
+# Local memory by default; set REDIS_URL to share cached customers between processes
+
+if os.environ.get("REDIS_URL"):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ["REDIS_URL"],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# Read-through Customer cache used by the API views.
+# A write only drops cached copies in the process that made it, so other processes may serve
+# the old row for up to LOCAL_TTL. That bound needs REDIS_URL: LocMemCache is per-process too,
+# so without it CustomerCache keeps shared entries no longer than LOCAL_TTL, whatever TTL says.
+
+CUSTOMER_CACHE = {
+    'ALIAS': 'default',
+    'TTL': int(os.environ.get("CUSTOMER_CACHE_TTL", 300)),
+    'LOCAL_SIZE': int(os.environ.get("CUSTOMER_CACHE_LOCAL_SIZE", 10000)),
+    'LOCAL_TTL': float(os.environ.get("CUSTOMER_CACHE_LOCAL_TTL", 5)),
+}
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -127,3 +233,12 @@ STATIC_URL = 'static/'
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+# Idempotency-Key handling for /create-loan
+# Stored responses are replayed for this many seconds, purge with `manage.py purge_idempotency_keys`
+
+IDEMPOTENCY_KEY_TTL = int(os.environ.get("IDEMPOTENCY_KEY_TTL", 24 * 60 * 60))
+IDEMPOTENCY_CACHE_SIZE = int(os.environ.get("IDEMPOTENCY_CACHE_SIZE", 10000))
+
+# Eligibility decisions memoized per process, keyed on the customer's state_version
+ELIGIBILITY_MEMO_SIZE = int(os.environ.get("ELIGIBILITY_MEMO_SIZE", 10000))
@@ -1,5 +1,26 @@
 from django.contrib import admin
-from .models import Customer, Loan
+from .models import Customer, Loan, CustomerCreditProfile
+from .utils import rebuild_credit_profiles
 
 admin.site.register(Customer)
-admin.site.register(Loan)
\ No newline at end of file
+admin.site.register(CustomerCreditProfile)
+
+
+@admin.register(Loan)
+class LoanAdmin(admin.ModelAdmin):
+    # Loans edited here bypass create_loan, so their owners' credit profiles are rebuilt
+    # afterwards; that also bumps state_version and drops them from customer_cache
+
+    def save_model(self, request, obj, form, change):
+        previous = Loan.objects.filter(pk=obj.pk).values_list('customer_id', flat=True).first() if change else None
+        super().save_model(request, obj, form, change)
+        rebuild_credit_profiles(customer_ids={obj.customer_id, previous} - {None})
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        rebuild_credit_profiles(customer_ids=[obj.customer_id])
+
+    def delete_queryset(self, request, queryset):
+        customer_ids = set(queryset.values_list('customer_id', flat=True))
+        super().delete_queryset(request, queryset)
+        rebuild_credit_profiles(customer_ids=customer_ids)
@@ -0,0 +1,83 @@
+# Async versions of the read endpoints and /check-eligibility for ASGI deployments.
+# They return the same bodies as the DRF views in views.py but never block the event loop
+# on the database, so one worker can keep many requests waiting on queries at once.
+import json
+import logging
+from django.http import JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET, require_POST
+from .cache import customer_cache
+from .models import Loan
+from .routers import replica_reads
+from .utils import acheck_credit_eligibility
+from .views import eligibility_response, loan_detail, loan_list_item, loan_list_queryset, parse_page_params
+from .validation import LOAN_REQUEST
+
+logger = logging.getLogger(__name__)
+
+
+# /async/check-eligibility
+@replica_reads
+@csrf_exempt
+@require_POST
+async def check_eligibility(request):
+    try:
+        try:
+            data = json.loads(request.body or b"{}")
+        except ValueError:
+            return JsonResponse({"error": "Invalid JSON body"}, status=400)
+        values, invalid = LOAN_REQUEST.validate(data)
+        if invalid:
+            return JsonResponse(invalid.as_dict(), status=400)
+        customer_id, loan_amount, tenure, interest_rate = values
+
+        customer = await customer_cache.aget(customer_id)
+        if customer is None:
+            return JsonResponse({"error": "Customer not found"}, status=404)
+
+        eligibility = await acheck_credit_eligibility(customer, loan_amount, tenure, interest_rate)
+        body, code = eligibility_response(customer.customer_id, interest_rate, tenure, eligibility)
+        return JsonResponse(body, status=code)
+    except Exception as e:
+        logger.error(f"Error in async CheckEligibility: {str(e)}")
+        return JsonResponse({"error": "Internal server error", "details": str(e)}, status=500)
+
+
+# /async/view-loan/<loan_id>
+@replica_reads
+@require_GET
+async def view_loan(request, loan_id):
+    try:
+        loan = await Loan.objects.aget(loan_id=loan_id)
+        customer = await customer_cache.aget(loan.customer_id)
+        return JsonResponse(loan_detail(loan, customer))
+    except Loan.DoesNotExist:
+        return JsonResponse({"error": "Loan not found"}, status=404)
+    except Exception as e:
+        logger.error(f"Error in async ViewLoan: {str(e)}")
+        return JsonResponse({"error": "Internal server error"}, status=500)
+
+
+# /async/view-loans/<customer_id>
+@replica_reads
+@require_GET
+async def view_loans(request, customer_id):
+    try:
+        after, limit, error = parse_page_params(request.GET)
+        if error:
+            return JsonResponse({"error": error}, status=400)
+
+        if await customer_cache.aget(customer_id) is None:
+            return JsonResponse({"error": "Customer not found"}, status=404)
+
+        loans = loan_list_queryset(customer_id, after)
+        if limit is None:
+            return JsonResponse([loan_list_item(row) async for row in loans], safe=False)
+
+        # One extra row tells whether another page follows
+        page = [loan_list_item(row) async for row in loans[:limit + 1]]
+        next_cursor = page[limit - 1]["loan_id"] if len(page) > limit else None
+        return JsonResponse({"results": page[:limit], "next_cursor": next_cursor})
+    except Exception as e:
+        logger.error(f"Error in async ViewLoans: {str(e)}")
+        return JsonResponse({"error": "Internal server error"}, status=500)
@@ -0,0 +1,249 @@
+import threading
+import time
+from collections import OrderedDict
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import DEFAULT_DB_ALIAS, transaction
+from .models import Customer
+
+
+class LRUCache:
+    # Thread-safe, bounded in-process LRU with an optional per-entry TTL and hit/miss counters
+
+    def __init__(self, maxsize=1024, ttl=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                expires, value = entry
+                if expires is None or expires > time.monotonic():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return default
+
+    def set(self, key, value, ttl=None):
+        ttl = self.ttl if ttl is None else ttl
+        expires = time.monotonic() + ttl if ttl is not None else None
+        with self._lock:
+            self._data[key] = (expires, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
+
+
+class CustomerCache:
+    # Read-through cache of Customer rows (with their credit profile): a short-lived per-process
+    # LRU in front of Django's cache framework, in front of the database.
+    # Writes only drop entries in the process that made them. Another process can serve the old
+    # row for up to LOCAL_TTL behind a cross-process backend such as Redis; LocMemCache is itself
+    # per-process, so its entries are held to LOCAL_TTL too rather than the full TTL. Anything
+    # that must be exact (CreateLoan) reads under a lock.
+
+    def __init__(self):
+        conf = getattr(settings, 'CUSTOMER_CACHE', {})
+        self.alias = conf.get('ALIAS', 'default')
+        self.ttl = conf.get('TTL', 300)
+        self.local = LRUCache(maxsize=conf.get('LOCAL_SIZE', 10000), ttl=conf.get('LOCAL_TTL', 5))
+        self.shared_hits = 0
+        self.misses = 0
+
+    @property
+    def shared(self):
+        return caches[self.alias]
+
+    @property
+    def shared_ttl(self):
+        # A per-process backend cannot see other processes' invalidations either
+        if isinstance(self.shared, LocMemCache) and self.local.ttl is not None:
+            return min(self.ttl, self.local.ttl)
+        return self.ttl
+
+    def key(self, customer_id):
+        return f"creditapproval:customer:{customer_id}"
+
+    def get(self, customer_id):
+        # Customer with credit_profile loaded, or None if it does not exist
+        customer = self.local.get(customer_id)
+        if customer is not None:
+            return customer
+
+        customer = self.shared.get(self.key(customer_id))
+        if customer is not None:
+            self.shared_hits += 1
+        else:
+            self.misses += 1
+            try:
+                customer = self.queryset().get(customer_id=customer_id)
+            except Customer.DoesNotExist:
+                return None
+            self.shared.set(self.key(customer_id), customer, self.shared_ttl)
+        self.local.set(customer_id, customer)
+        return customer
+
+    async def aget(self, customer_id):
+        # Async get() for ASGI views; the local LRU involves no I/O so it is read directly
+        customer = self.local.get(customer_id)
+        if customer is not None:
+            return customer
+
+        customer = await self.shared.aget(self.key(customer_id))
+        if customer is not None:
+            self.shared_hits += 1
+        else:
+            self.misses += 1
+            try:
+                customer = await self.queryset().aget(customer_id=customer_id)
+            except Customer.DoesNotExist:
+                return None
+            await self.shared.aset(self.key(customer_id), customer, self.shared_ttl)
+        self.local.set(customer_id, customer)
+        return customer
+
+    def get_many(self, customer_ids):
+        # {customer_id: Customer} for the ids that exist, with at most one DB query
+        found = {}
+        for customer_id in customer_ids:
+            customer = self.local.get(customer_id)
+            if customer is not None:
+                found[customer_id] = customer
+
+        pending = [customer_id for customer_id in customer_ids if customer_id not in found]
+        if pending:
+            shared = self.shared.get_many([self.key(customer_id) for customer_id in pending])
+            for customer_id in pending:
+                customer = shared.get(self.key(customer_id))
+                if customer is not None:
+                    self.shared_hits += 1
+                    found[customer_id] = customer
+                    self.local.set(customer_id, customer)
+
+            missing = [customer_id for customer_id in pending if customer_id not in found]
+            if missing:
+                self.misses += len(missing)
+                loaded = self.queryset().in_bulk(missing)
+                self.shared.set_many({self.key(customer_id): customer for customer_id, customer in loaded.items()}, self.shared_ttl)
+                for customer_id, customer in loaded.items():
+                    self.local.set(customer_id, customer)
+                found.update(loaded)
+        return found
+
+    def queryset(self):
+        # Always the primary: entries are shared between requests, so none may come from a lagging replica
+        return Customer.objects.using(DEFAULT_DB_ALIAS).select_related('credit_profile')
+
+    def invalidate(self, *customer_ids):
+        # Drop entries now and again once the surrounding transaction commits, so a reader
+        # that refilled the cache from pre-commit data does not keep it
+        self._drop(customer_ids)
+        transaction.on_commit(lambda: self._drop(customer_ids))
+
+    def invalidate_all(self, chunk_size=5000):
+        self.local.clear()
+        ids = Customer.objects.order_by('customer_id').values_list('customer_id', flat=True)
+        last_id = 0
+        while chunk := list(ids.filter(customer_id__gt=last_id)[:chunk_size]):
+            self.shared.delete_many([self.key(customer_id) for customer_id in chunk])
+            last_id = chunk[-1]
+
+    def _drop(self, customer_ids):
+        for customer_id in customer_ids:
+            self.local.delete(customer_id)
+        self.shared.delete_many([self.key(customer_id) for customer_id in customer_ids])
+
+    def stats(self):
+        local = self.local.stats()
+        lookups = local["hits"] + self.shared_hits + self.misses
+        return {
+            "local_hits": local["hits"],
+            "shared_hits": self.shared_hits,
+            "misses": self.misses,
+            "local_size": local["size"],
+            "hit_ratio": (local["hits"] + self.shared_hits) / lookups if lookups else 0.0,
+        }
+
+
+
+class DecisionMemo:
+    # Memoized eligibility decisions, grouped per customer and valid only for the customer's
+    # current state_version on the current day. A version bump makes old answers unreachable,
+    # so no purge is needed; customers are evicted LRU, quotes per customer are capped too.
+    # The version is read from customer_cache, so a decision is only as fresh as that entry:
+    # another process can answer from a pre-change version for up to its LOCAL_TTL.
+
+    def __init__(self, maxsize=10000, per_customer=64):
+        self.per_customer = per_customer
+        self.customers = LRUCache(maxsize=maxsize)
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, customer, day, quote):
+        entry = self.customers.get(customer.customer_id)
+        if entry is not None and entry[0] == (customer.state_version, day):
+            decision = entry[1].get(quote)
+            if decision is not None:
+                self.hits += 1
+                return dict(decision)
+        self.misses += 1
+        return None
+
+    def set(self, customer, day, quote, decision):
+        state = (customer.state_version, day)
+        entry = self.customers.get(customer.customer_id)
+        if entry is None or entry[0] != state:
+            entry = (state, OrderedDict())
+            self.customers.set(customer.customer_id, entry)
+        decisions = entry[1]
+        decisions[quote] = dict(decision)
+        while len(decisions) > self.per_customer:
+            decisions.popitem(last=False)
+
+    def forget(self, customer_id):
+        self.customers.delete(customer_id)
+
+    def clear(self):
+        self.customers.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "customers": len(self.customers),
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
+
+
+customer_cache = CustomerCache()
+eligibility_memo = DecisionMemo(maxsize=getattr(settings, 'ELIGIBILITY_MEMO_SIZE', 10000))
@@ -0,0 +1,36 @@
+from django.db import connections
+
+
+def pool_stats():
+    # Connection usage of this process for every database alias
+    stats = {}
+    for alias in connections:
+        connection = connections[alias]
+        options = connection.settings_dict['OPTIONS']
+        if connection.vendor != 'postgresql' or not options.get('pool'):
+            stats[alias] = {
+                "pooled": False,
+                "conn_max_age": connection.settings_dict['CONN_MAX_AGE'],
+                "connected": connection.connection is not None,
+            }
+            continue
+
+        raw = connection.pool.get_stats()
+        size = raw.get('pool_size', 0)
+        idle = raw.get('pool_available', 0)
+        requests = raw.get('requests_num', 0)
+        wait_ms = raw.get('requests_wait_ms', 0)
+        stats[alias] = {
+            "pooled": True,
+            "min_size": raw.get('pool_min'),
+            "max_size": raw.get('pool_max'),
+            "size": size,
+            "in_use": size - idle,
+            "idle": idle,
+            "waiting": raw.get('requests_waiting', 0),
+            "requests": requests,
+            "wait_ms_total": wait_ms,
+            "avg_wait_ms": round(wait_ms / requests, 3) if requests else 0.0,
+            "timeouts": raw.get('requests_errors', 0),
+        }
+    return stats
@@ -0,0 +1,63 @@
+import hashlib
+import json
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from .cache import LRUCache
+from .models import IdempotencyKey
+
+# Recently stored responses, so most retries are answered without a DB round trip
+_recent = LRUCache(maxsize=getattr(settings, 'IDEMPOTENCY_CACHE_SIZE', 10000))
+
+
+def key_ttl():
+    return timedelta(seconds=getattr(settings, 'IDEMPOTENCY_KEY_TTL', 24 * 60 * 60))
+
+
+def request_fingerprint(data):
+    # Stable hash of a request payload, used to reject a key reused for a different request
+    payload = json.dumps(data, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def lookup(key):
+    # Stored (request_hash, status_code, response) for a live key, or None
+    now = timezone.now()
+    entry = _recent.get(key)
+    if entry is not None and entry[0] > now:
+        return entry[1:]
+
+    stored = IdempotencyKey.objects.filter(key=key, expires_at__gt=now).first()
+    if stored is None:
+        return None
+    entry = (stored.expires_at, stored.request_hash, stored.status_code, stored.response)
+    _recent.set(key, entry)
+    return entry[1:]
+
+
+def remember(key, fingerprint, status_code, response):
+    # Persist a response for replay; raises IntegrityError if another request stored the key first
+    expires_at = timezone.now() + key_ttl()
+    # An expired row for the same key would otherwise block the insert
+    IdempotencyKey.objects.filter(key=key, expires_at__lte=timezone.now()).delete()
+    IdempotencyKey.objects.create(
+        key=key,
+        request_hash=fingerprint,
+        status_code=status_code,
+        response=response,
+        expires_at=expires_at,
+    )
+    transaction.on_commit(lambda: _recent.set(key, (expires_at, fingerprint, status_code, response)))
+
+
+def purge_expired(batch_size=5000):
+    # Delete expired keys in bounded batches, returning how many were removed
+    now = timezone.now()
+    deleted = 0
+    while True:
+        keys = list(IdempotencyKey.objects.filter(expires_at__lte=now).values_list('key', flat=True)[:batch_size])
+        if not keys:
+            break
+        deleted += IdempotencyKey.objects.filter(key__in=keys).delete()[0]
+    return deleted
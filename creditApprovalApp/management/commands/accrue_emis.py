@@ -0,0 +1,173 @@
+import time
+from datetime import date, timedelta
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+from creditApprovalApp.cache import customer_cache
+from creditApprovalApp.models import AccrualCheckpoint, Customer, CustomerCreditProfile, Loan
+from creditApprovalApp.utils import PORTFOLIO_SHARDS, band_sums, emis_due, outstanding_principal, record_repayments_in_portfolio
+
+CHECKPOINT = 'emis'
+
+
+def read_chunks(since, until, cursor, chunk_size):
+    # Loans that can have an installment falling due in (since, until], walked from `cursor`
+    # along the (end_date, loan_id) index; end_date is the last installment's due date (see
+    # create_loan and migration 0013), so loans that ended by `since` are fully accrued
+    loans = Loan.objects.filter(start_date__lt=until).order_by('end_date', 'loan_id').values_list(
+        'loan_id', 'customer_id', 'loan_amount', 'interest_rate', 'tenure', 'start_date', 'end_date',
+    )
+    end_date, loan_id = cursor
+    while True:
+        started = time.perf_counter()
+        chunk = list(loans.filter(end_date__gte=end_date).exclude(end_date=end_date, loan_id__lte=loan_id)[:chunk_size])
+        if not chunk:
+            return
+        end_date, loan_id = chunk[-1][6], chunk[-1][0]
+        loan_ids, customer_ids, amounts, rates, tenures, starts, _ = zip(*chunk)
+        columns = (
+            np.array(loan_ids, dtype=np.int64), np.array(customer_ids, dtype=np.int64),
+            np.array(amounts, dtype=float), np.array(rates, dtype=float), np.array(tenures, dtype=np.int64),
+            np.array(starts, dtype='datetime64[D]'),
+        )
+        yield columns, (end_date, loan_id), time.perf_counter() - started
+
+
+def accrue_chunk(columns, since, until):
+    # (loan ids, installments paid per loan, customer ids, principal repaid and installments paid
+    # per customer, principal repaid per portfolio band and shard) for the installments falling
+    # due in (since, until]
+    loan_ids, customer_ids, amounts, rates, tenures, starts = columns
+    before = emis_due(starts, tenures, since)
+    after = emis_due(starts, tenures, until)
+    paid = after - before
+    repaid = outstanding_principal(amounts, rates, tenures, before) - outstanding_principal(amounts, rates, tenures, after)
+
+    changed = paid > 0
+    customers, owner = np.unique(customer_ids[changed], return_inverse=True)
+    return (
+        loan_ids[changed], paid[changed], customers,
+        np.bincount(owner, weights=repaid[changed], minlength=len(customers)).astype(np.int64),
+        np.bincount(owner, weights=paid[changed], minlength=len(customers)).astype(np.int64),
+        band_sums(tenures[changed], rates[changed], repaid[changed], customer_ids[changed] % PORTFOLIO_SHARDS),
+    )
+
+
+def apply_to_loans(loan_ids, paid):
+    # Installment counts take a handful of values per chunk, so one UPDATE per distinct count
+    # (as in rescore_portfolio) instead of bulk_update's per-row CASE expression
+    for count in np.unique(paid).tolist():
+        Loan.objects.filter(loan_id__in=loan_ids[paid == count].tolist()).update(
+            emis_paid_on_time=F('emis_paid_on_time') + count,
+        )
+
+
+def apply_to_customers(customer_ids, repaid, paid):
+    # One aggregated update per customer: debt falls by the principal repaid, never below zero,
+    # and the credit profile gains the installments paid. PostgreSQL applies a whole chunk in
+    # one statement per table through unnest(); other databases take one UPDATE per customer.
+    if connection.vendor == 'postgresql':
+        qn = connection.ops.quote_name
+        debt, version = qn('current_debt'), qn('state_version')
+        emis = qn('total_emis_paid_on_time')
+        ids = customer_ids.tolist()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"UPDATE {qn(Customer._meta.db_table)} c "
+                f"SET {debt} = GREATEST(c.{debt} - v.repaid, 0), {version} = c.{version} + 1 "
+                f"FROM unnest(%s::integer[], %s::bigint[]) AS v(id, repaid) WHERE c.{qn('customer_id')} = v.id",
+                [ids, repaid.tolist()],
+            )
+            cursor.execute(
+                f"UPDATE {qn(CustomerCreditProfile._meta.db_table)} p SET {emis} = p.{emis} + v.paid "
+                f"FROM unnest(%s::integer[], %s::integer[]) AS v(id, paid) WHERE p.{qn('customer_id')} = v.id",
+                [ids, paid.tolist()],
+            )
+        return
+
+    for customer_id, customer_repaid, customer_paid in zip(customer_ids.tolist(), repaid.tolist(), paid.tolist()):
+        Customer.objects.filter(customer_id=customer_id).update(
+            current_debt=Greatest(F('current_debt') - customer_repaid, 0),
+            state_version=F('state_version') + 1,
+        )
+        CustomerCreditProfile.objects.filter(customer_id=customer_id).update(
+            total_emis_paid_on_time=F('total_emis_paid_on_time') + customer_paid,
+        )
+
+
+class Command(BaseCommand):
+    help = 'Mark EMIs falling due since the last run as paid and reduce customer debt by the principal repaid'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--as-of', type=date.fromisoformat, help='Accrue EMIs due up to this date (default: today)')
+        parser.add_argument('--since', type=date.fromisoformat,
+                            help='First run only: EMIs due after this date are accrued (default: the day before --as-of)')
+        parser.add_argument('--chunk-size', type=int, default=10000, help='Loans read, accrued and written per transaction')
+
+    def handle(self, *args, **options):
+        as_of = options['as_of'] or date.today()
+        with transaction.atomic():
+            checkpoint, _ = AccrualCheckpoint.objects.select_for_update().get_or_create(name=CHECKPOINT)
+            if checkpoint.accrued_through is None:
+                checkpoint.accrued_through = options['since'] or as_of - timedelta(days=1)
+                checkpoint.save()
+            elif options['since']:
+                self.stdout.write(self.style.WARNING(
+                    f"--since ignored, EMIs are already accrued through {checkpoint.accrued_through}."
+                ))
+
+        timings = {"read": 0.0, "compute": 0.0, "write": 0.0}
+        totals = {"loans": 0, "emis": 0, "repaid": 0}
+        started = time.perf_counter()
+
+        # An interrupted run resumes from its last committed chunk before a new one starts
+        if checkpoint.target_date is not None:
+            self.accrue(checkpoint, checkpoint.target_date, options['chunk_size'], timings, totals)
+        if as_of > checkpoint.accrued_through:
+            checkpoint.target_date = as_of
+            checkpoint.cursor_end_date = checkpoint.accrued_through + timedelta(days=1)
+            checkpoint.cursor_loan_id = 0
+            checkpoint.save()
+            self.accrue(checkpoint, as_of, options['chunk_size'], timings, totals)
+        elapsed = time.perf_counter() - started
+
+        self.stdout.write(f"{'stage':<10} {'seconds':>9}")
+        for stage, seconds in timings.items():
+            self.stdout.write(f"{stage:<10} {seconds:>9.3f}")
+        self.stdout.write(f"{'total':<10} {elapsed:>9.3f}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Accrued {totals['emis']} EMIs on {totals['loans']} loans through {checkpoint.accrued_through}, "
+            f"{totals['repaid']} of principal repaid, in {elapsed:.2f}s."
+        ))
+
+    def accrue(self, checkpoint, until, chunk_size, timings, totals):
+        since = checkpoint.accrued_through
+        cursor = (checkpoint.cursor_end_date, checkpoint.cursor_loan_id)
+        for columns, next_cursor, seconds in read_chunks(since, until, cursor, chunk_size):
+            timings["read"] += seconds
+            compute_started = time.perf_counter()
+            loan_ids, loans_paid, customer_ids, repaid, paid, band_repaid = accrue_chunk(columns, since, until)
+            timings["compute"] += time.perf_counter() - compute_started
+
+            write_started = time.perf_counter()
+            with transaction.atomic():
+                # The checkpoint row lock keeps concurrent runs from accruing the same chunk twice
+                locked = AccrualCheckpoint.objects.select_for_update().get(name=checkpoint.name)
+                if (locked.target_date, locked.cursor_end_date, locked.cursor_loan_id) != (until, *cursor):
+                    raise CommandError("Another accrue_emis run moved the checkpoint, stopping.")
+                apply_to_loans(loan_ids, loans_paid)
+                apply_to_customers(customer_ids, repaid, paid)
+                record_repayments_in_portfolio(band_repaid)
+                customer_cache.invalidate(*customer_ids.tolist())
+                checkpoint.cursor_end_date, checkpoint.cursor_loan_id = cursor = next_cursor
+                checkpoint.save()
+            timings["write"] += time.perf_counter() - write_started
+            totals["loans"] += len(loan_ids)
+            totals["emis"] += int(paid.sum())
+            totals["repaid"] += int(repaid.sum())
+
+        checkpoint.accrued_through = until
+        checkpoint.target_date = checkpoint.cursor_end_date = checkpoint.cursor_loan_id = None
+        checkpoint.save()
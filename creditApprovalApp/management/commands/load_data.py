@@ -1,70 +1,264 @@
-import pandas as pd
+import csv
+import io
+import time
+from datetime import date, datetime
+from itertools import islice
+from openpyxl import load_workbook
 from django.core.management.base import BaseCommand
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import F
+from creditApprovalApp.cache import customer_cache
 from creditApprovalApp.models import Customer, Loan
-from datetime import datetime
+from creditApprovalApp.utils import rebuild_credit_profiles, rebuild_portfolio_rollups
+
+# Column headers in the source sheets mapped to model field names
+CUSTOMER_COLUMNS = {
+    'Customer ID': 'customer_id',
+    'First Name': 'first_name',
+    'Last Name': 'last_name',
+    'Phone Number': 'phone_number',
+    'Monthly Salary': 'monthly_salary',
+    'Approved Limit': 'approved_limit',
+    'Age': 'age',
+    'Current Debt': 'current_debt',
+}
+
+LOAN_COLUMNS = {
+    'Loan ID': 'loan_id',
+    'Customer ID': 'customer_id',
+    'Loan Amount': 'loan_amount',
+    'Tenure': 'tenure',
+    'Interest Rate': 'interest_rate',
+    'Monthly payment': 'monthly_repayment',
+    'EMIs paid on Time': 'emis_paid_on_time',
+    'Date of Approval': 'start_date',
+    'End Date': 'end_date',
+}
+
+CUSTOMER_UPDATE_FIELDS = ['first_name', 'last_name', 'phone_number', 'monthly_salary', 'approved_limit', 'age', 'current_debt']
+LOAN_UPDATE_FIELDS = ['customer', 'loan_amount', 'tenure', 'interest_rate', 'monthly_repayment', 'emis_paid_on_time', 'start_date', 'end_date']
+
+
+def read_rows(path, columns):
+    # Stream rows from an .xlsx (read-only) or .csv file as dicts keyed by model field
+    if str(path).lower().endswith('.csv'):
+        with open(path, newline='') as f:
+            yield from _map_rows(csv.reader(f), columns)
+    else:
+        workbook = load_workbook(path, read_only=True, data_only=True)
+        try:
+            yield from _map_rows(workbook.active.iter_rows(values_only=True), columns)
+        finally:
+            workbook.close()
+
+
+def _map_rows(rows, columns):
+    header = next(rows, None) or []
+    index = {columns[name.strip()]: i for i, name in enumerate(header) if name and name.strip() in columns}
+    for row in rows:
+        if not any(value not in (None, '') for value in row):
+            continue
+        yield {field: row[i] if row[i] != '' else None for field, i in index.items()}
+
+
+def chunked(rows, size):
+    rows = iter(rows)
+    while chunk := list(islice(rows, size)):
+        yield chunk
+
+
+def _to_int(value, default=None):
+    if value is None:
+        return default
+    return int(float(value))
+
+
+def _to_text(value):
+    # Spreadsheet numbers such as phone numbers may arrive as floats
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value)
+
+
+def _to_date(value):
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
+
+
+def build_customer(row):
+    return Customer(
+        customer_id=_to_int(row['customer_id']),
+        first_name=row['first_name'],
+        last_name=row['last_name'],
+        phone_number=_to_text(row['phone_number']),
+        monthly_salary=_to_int(row['monthly_salary']),
+        approved_limit=_to_int(row['approved_limit']),
+        age=_to_int(row.get('age'), 0),
+        current_debt=_to_int(row.get('current_debt'), 0),
+    )
+
+
+def build_loan(row):
+    return Loan(
+        loan_id=_to_int(row['loan_id']),
+        customer_id=_to_int(row['customer_id']),
+        loan_amount=float(row['loan_amount']),
+        tenure=_to_int(row['tenure']),
+        interest_rate=float(row['interest_rate']),
+        monthly_repayment=float(row['monthly_repayment']),
+        emis_paid_on_time=_to_int(row['emis_paid_on_time']),
+        start_date=_to_date(row['start_date']),
+        end_date=_to_date(row['end_date']),
+    )
+
+
+def reset_sequences():
+    # Explicit ids bypass the AutoField sequences, so move them past the loaded rows
+    statements = connection.ops.sequence_reset_sql(no_style(), [Customer, Loan])
+    if statements:
+        with connection.cursor() as cursor:
+            for sql in statements:
+                cursor.execute(sql)
+
+
+def copy_rows(cursor, table, columns, rows):
+    # Stream rows into a table with COPY ... FROM STDIN through an in-memory CSV buffer
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    buffer.seek(0)
+    sql = f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)"
+    raw = cursor.cursor
+    if hasattr(raw, 'copy_expert'):
+        # psycopg2
+        raw.copy_expert(sql, buffer)
+    else:
+        # psycopg 3
+        with raw.copy(sql) as copy:
+            copy.write(buffer.getvalue())
+
+
+def copy_merge(path, columns, model, build, chunk_size, require_customer=False):
+    # COPY a sheet into a temporary staging table, then upsert it into the model's table.
+    # Returns (rows merged, rows skipped for unknown customers).
+    qn = connection.ops.quote_name
+    fields = [f for f in model._meta.concrete_fields if f.attname in {*columns.values(), 'customer_id'}]
+    cols = [qn(f.column) for f in fields]
+    pk = qn(model._meta.pk.column)
+    table = qn(model._meta.db_table)
+    staging = qn(f"{model._meta.db_table}_staging")
+    customer_table = qn(Customer._meta.db_table)
+    customer_pk = qn(Customer._meta.pk.column)
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"CREATE TEMPORARY TABLE {staging} ON COMMIT DROP AS "
+            f"SELECT {', '.join(cols)} FROM {table} WITH NO DATA"
+        )
+        # Arrival order, so the last occurrence of an id wins as with row-by-row upserts
+        cursor.execute(f"ALTER TABLE {staging} ADD COLUMN row_no bigserial")
+
+        for chunk in chunked(read_rows(path, columns), chunk_size):
+            copy_rows(cursor, staging, cols, (
+                [getattr(obj, f.attname) for f in fields] for obj in map(build, chunk)
+            ))
+
+        skipped = 0
+        where = ""
+        if require_customer:
+            known = f"EXISTS (SELECT 1 FROM {customer_table} c WHERE c.{customer_pk} = s.{qn('customer_id')})"
+            cursor.execute(f"SELECT count(*) FROM {staging} s WHERE NOT {known}")
+            skipped = cursor.fetchone()[0]
+            where = f"WHERE {known}"
+
+        updates = ', '.join(f"{c} = EXCLUDED.{c}" for c in cols if c != pk)
+        if any(f.attname == 'state_version' for f in model._meta.concrete_fields):
+            updates += f", {qn('state_version')} = {table}.{qn('state_version')} + 1"
+        cursor.execute(
+            f"INSERT INTO {table} ({', '.join(cols)}) "
+            f"SELECT DISTINCT ON ({pk}) {', '.join(cols)} FROM {staging} s {where} "
+            f"ORDER BY {pk}, row_no DESC "
+            f"ON CONFLICT ({pk}) DO UPDATE SET {updates}"
+        )
+        cursor.execute(f"SELECT count(*) FROM {staging}")
+        staged = cursor.fetchone()[0]
+        cursor.execute(f"DROP TABLE {staging}")
+    return staged - skipped, skipped
 
 
 class Command(BaseCommand):
-    help = 'Load customer and loan data from Excel files'
-
-    def handle(self, *args, **kwargs):
-        # Load Excel files
-        customer_df = pd.read_excel('customer_data.xlsx')
-        loan_df = pd.read_excel('loan_data.xlsx')
-
-        # Rename column headers to match model field names
-        customer_df = customer_df.rename(columns={
-            'Customer ID': 'customer_id',
-            'First Name': 'first_name',
-            'Last Name': 'last_name',
-            'Phone Number': 'phone_number',
-            'Monthly Salary': 'monthly_salary',
-            'Approved Limit': 'approved_limit',
-            'Age': 'age',
-            'Current Debt': 'current_debt' 
-        })
-
-        loan_df = loan_df.rename(columns={
-            'Loan ID': 'loan_id',
-            'Customer ID': 'customer_id',
-            'Loan Amount': 'loan_amount',
-            'Tenure': 'tenure',
-            'Interest Rate': 'interest_rate',
-            'Monthly payment': 'monthly_repayment',
-            'EMIs paid on Time': 'emis_paid_on_time',
-            'Date of Approval': 'start_date',
-            'End Date': 'end_date',
-        })
-
-        for _, row in customer_df.iterrows():
-            Customer.objects.update_or_create(
-                customer_id=row['customer_id'],
-                defaults={
-                    'first_name': row['first_name'],
-                    'last_name': row['last_name'],
-                    'phone_number': str(row['phone_number']),
-                    'monthly_salary': int(row['monthly_salary']),
-                    'approved_limit': int(row['approved_limit']),
-                    'age': int(row.get('age', 0)),
-                    'current_debt': int(row.get('current_debt', 0)),
-                }
-            )
+    help = 'Load customer and loan data from Excel or CSV files'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--customers', default='customer_data.xlsx', help='Customer sheet (.xlsx or .csv)')
+        parser.add_argument('--loans', default='loan_data.xlsx', help='Loan sheet (.xlsx or .csv)')
+        parser.add_argument('--chunk-size', type=int, default=2000, help='Rows per bulk upsert')
+        parser.add_argument('--copy', action='store_true', help='Load through COPY into staging tables (PostgreSQL only)')
 
-        for _, row in loan_df.iterrows():
-            customer = Customer.objects.get(customer_id=row['customer_id'])
-
-            Loan.objects.update_or_create(
-                loan_id=row['loan_id'],
-                defaults={
-                    'customer_id': customer, 
-                    'loan_amount': float(row['loan_amount']),
-                    'tenure': int(row['tenure']),
-                    'interest_rate': float(row['interest_rate']),
-                    'monthly_repayment': float(row['monthly_repayment']),
-                    'emis_paid_on_time': int(row['emis_paid_on_time']),
-                    'start_date': pd.to_datetime(row['start_date']).date(),
-                    'end_date': pd.to_datetime(row['end_date']).date(),
-                }
+    def handle(self, *args, **options):
+        use_copy = options['copy'] and connection.vendor == 'postgresql'
+        if options['copy'] and not use_copy:
+            self.stdout.write(self.style.WARNING(f"COPY needs PostgreSQL, using bulk inserts on {connection.vendor}."))
+
+        started = time.perf_counter()
+        with transaction.atomic():
+            if use_copy:
+                customers, _ = copy_merge(options['customers'], CUSTOMER_COLUMNS, Customer, build_customer, options['chunk_size'])
+                loans, skipped = copy_merge(options['loans'], LOAN_COLUMNS, Loan, build_loan, options['chunk_size'], require_customer=True)
+            else:
+                customers = self.load_customers(options['customers'], options['chunk_size'])
+                loans, skipped = self.load_loans(options['loans'], options['chunk_size'])
+            reset_sequences()
+            # Bring credit profiles and portfolio rollups in line with the loaded loans
+            rebuild_credit_profiles()
+            rebuild_portfolio_rollups()
+        if use_copy:
+            # COPY bypasses per-row invalidation, so drop every cached customer once committed
+            customer_cache.invalidate_all()
+        elapsed = time.perf_counter() - started
+
+        if skipped:
+            self.stdout.write(self.style.WARNING(f"Skipped {skipped} loans referencing unknown customers."))
+        rows = customers + loans
+        self.stdout.write(self.style.SUCCESS(
+            f"Data loaded successfully: {customers} customers, {loans} loans in {elapsed:.2f}s "
+            f"({rows / elapsed if elapsed else rows:.0f} rows/s)."
+        ))
+
+    def load_customers(self, path, chunk_size):
+        count = 0
+        for chunk in chunked(read_rows(path, CUSTOMER_COLUMNS), chunk_size):
+            # The last occurrence of an id wins, as with row-by-row upserts
+            customers = {c.customer_id: c for c in map(build_customer, chunk)}
+            customer_cache.invalidate(*customers)
+            Customer.objects.bulk_create(
+                customers.values(),
+                update_conflicts=True,
+                unique_fields=['customer_id'],
+                update_fields=CUSTOMER_UPDATE_FIELDS,
             )
+            Customer.objects.filter(customer_id__in=customers).update(state_version=F('state_version') + 1)
+            count += len(chunk)
+        return count
 
-        self.stdout.write(self.style.SUCCESS("Data loaded successfully."))
+    def load_loans(self, path, chunk_size):
+        customer_ids = set(Customer.objects.values_list('customer_id', flat=True))
+        count = skipped = 0
+        for chunk in chunked(read_rows(path, LOAN_COLUMNS), chunk_size):
+            loans = {}
+            for loan in map(build_loan, chunk):
+                if loan.customer_id in customer_ids:
+                    loans[loan.loan_id] = loan
+                else:
+                    skipped += 1
+            Loan.objects.bulk_create(
+                loans.values(),
+                update_conflicts=True,
+                unique_fields=['loan_id'],
+                update_fields=LOAN_UPDATE_FIELDS,
+            )
+            count += len(chunk)
+        return count - skipped, skipped
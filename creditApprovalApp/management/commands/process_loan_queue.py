@@ -0,0 +1,95 @@
+import logging
+import time
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Min
+from django.utils import timezone
+from creditApprovalApp.models import Customer, LoanApplication
+from creditApprovalApp.utils import book_loan
+
+logger = logging.getLogger(__name__)
+
+
+def pending_customers(limit):
+    # Customers with pending applications, the one waiting longest first
+    return list(
+        LoanApplication.objects.filter(status=LoanApplication.PENDING)
+        .values('customer_id')
+        .annotate(oldest=Min('id'))
+        .order_by('oldest')
+        .values_list('customer_id', flat=True)[:limit]
+    )
+
+
+def process_customer(customer_id, limit):
+    # Book a customer's pending applications in id order while holding its row lock, so
+    # each one sees the debt left by the previous. Returns how many were processed, or
+    # None when another worker holds the customer.
+    with transaction.atomic():
+        locked = Customer.objects.select_for_update(
+            skip_locked=connection.features.has_select_for_update_skip_locked
+        ).filter(pk=customer_id)
+        if not list(locked.values_list('pk', flat=True)):
+            return None
+
+        applications = list(LoanApplication.objects.filter(
+            customer_id=customer_id, status=LoanApplication.PENDING,
+        ).order_by('id')[:limit])
+        for application in applications:
+            try:
+                with transaction.atomic():
+                    body, code = book_loan(
+                        application.customer_id, application.loan_amount,
+                        application.tenure, application.interest_rate,
+                    )
+            except Exception as e:
+                logger.error(f"Error processing loan application {application.pk}: {str(e)}")
+                body, code = {"error": "Internal server error", "details": str(e)}, 500
+
+            application.status = LoanApplication.FAILED if code >= 500 else LoanApplication.DONE
+            application.status_code = code
+            application.response = body
+            application.loan_id = body.get("loan_id")
+            application.processed_at = timezone.now()
+            application.save(update_fields=['status', 'status_code', 'response', 'loan', 'processed_at'])
+        return len(applications)
+
+
+class Command(BaseCommand):
+    help = 'Book loan applications queued by /create-loan with "Prefer: respond-async"'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100, help='Customers claimed per batch')
+        parser.add_argument('--per-customer', type=int, default=50, help='Applications booked per customer per batch')
+        parser.add_argument('--loop', action='store_true', help='Keep polling instead of exiting once the queue is empty')
+        parser.add_argument('--sleep', type=float, default=1.0, help='Seconds to wait when the queue is empty (--loop)')
+        parser.add_argument('--locked-sleep', type=float, default=0.1, help='Seconds to wait when other workers hold every pending customer')
+
+    def handle(self, *args, **options):
+        # Customers locked by other workers are skipped, so several workers can run side by side;
+        # without --loop a worker only exits once nothing is pending
+        processed = 0
+        started = time.perf_counter()
+        while True:
+            customers = pending_customers(options['batch_size'])
+            if not customers:
+                if not options['loop']:
+                    break
+                time.sleep(options['sleep'])
+                continue
+
+            claimed = False
+            for customer_id in customers:
+                count = process_customer(customer_id, options['per_customer'])
+                if count is not None:
+                    claimed = True
+                    processed += count
+            if not claimed:
+                # Every pending customer is held by another worker: wait for them, then look again
+                time.sleep(options['locked_sleep'])
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Processed {processed} loan applications in {elapsed:.2f}s "
+            f"({processed / elapsed if elapsed else processed:.0f}/s)."
+        ))
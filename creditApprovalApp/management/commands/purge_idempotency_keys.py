@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from creditApprovalApp.idempotency import purge_expired
+
+
+class Command(BaseCommand):
+    help = 'Delete expired /create-loan idempotency keys'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000, help='Keys deleted per statement')
+
+    def handle(self, *args, **options):
+        deleted = purge_expired(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Purged {deleted} expired idempotency keys."))
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from creditApprovalApp.utils import rebuild_credit_profiles
+
+
+class Command(BaseCommand):
+    help = 'Recompute customer credit profiles from the Loan table and report drift'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=2000)
+        parser.add_argument('--check', action='store_true', help='Only report drift, do not write profiles')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            report = rebuild_credit_profiles(chunk_size=options['chunk_size'], dry_run=options['check'])
+
+        self.stdout.write(f"Checked {report['checked']} customers")
+        for label in ('missing', 'drifted'):
+            ids = report[label]
+            if ids:
+                preview = ', '.join(str(i) for i in ids[:20])
+                more = f" (+{len(ids) - 20} more)" if len(ids) > 20 else ""
+                self.stdout.write(self.style.WARNING(f"{len(ids)} profiles {label}: {preview}{more}"))
+
+        if not report['missing'] and not report['drifted']:
+            self.stdout.write(self.style.SUCCESS("Credit profiles are in sync."))
+        elif options['check']:
+            self.stdout.write(self.style.WARNING("Drift found, run without --check to repair."))
+        else:
+            self.stdout.write(self.style.SUCCESS("Credit profiles rebuilt."))
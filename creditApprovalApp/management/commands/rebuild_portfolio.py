@@ -0,0 +1,14 @@
+import time
+from django.core.management.base import BaseCommand
+from creditApprovalApp.utils import rebuild_portfolio_rollups
+
+
+class Command(BaseCommand):
+    help = 'Recompute the /portfolio/summary rollups from the Loan table'
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        buckets, days = rebuild_portfolio_rollups()
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt {buckets} portfolio buckets and {days} days in {time.perf_counter() - started:.2f}s."
+        ))
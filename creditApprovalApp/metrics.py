@@ -0,0 +1,208 @@
+"""
+In-process request metrics, served in Prometheus text format at /metrics.
+
+MetricsMiddleware opens a RequestTimings accumulator for each request in a ContextVar. The
+SQL timer (installed on every database connection as it is created) and the @timed
+functions add to it without taking locks, and the totals are merged into the registry
+once per request. Outside a request (management commands, shells) nothing is recorded.
+
+Each worker process keeps its own registry, so scrape every process or run one worker per
+target when using a multi-worker server.
+"""
+import threading
+from bisect import bisect_left
+from contextvars import ContextVar
+from functools import wraps
+from inspect import iscoroutinefunction
+from time import perf_counter
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_current = ContextVar('request_timings', default=None)
+
+
+class RequestTimings:
+    # What one request spent in SQL and in the timed functions
+    __slots__ = ('queries', 'sql_seconds', 'functions')
+
+    def __init__(self):
+        self.queries = 0
+        self.sql_seconds = 0.0
+        self.functions = {}
+
+    def add_function(self, name, seconds):
+        entry = self.functions.get(name)
+        if entry is None:
+            self.functions[name] = [1, seconds]
+        else:
+            entry[0] += 1
+            entry[1] += seconds
+
+
+class Registry:
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            # (view, method, status) -> [per-bucket counts..., +Inf count, latency sum, queries, SQL seconds]
+            self.requests = {}
+            # (function, view) -> [calls, seconds]
+            self.functions = {}
+
+    def observe(self, view, method, status, seconds, timings):
+        key = (view, method, str(status))
+        size = len(self.buckets)
+        with self._lock:
+            row = self.requests.get(key)
+            if row is None:
+                row = self.requests[key] = [0] * (size + 1) + [0.0, 0, 0.0]
+            row[bisect_left(self.buckets, seconds)] += 1
+            row[size + 1] += seconds
+            row[size + 2] += timings.queries
+            row[size + 3] += timings.sql_seconds
+            for name, (calls, spent) in timings.functions.items():
+                entry = self.functions.setdefault((name, view), [0, 0.0])
+                entry[0] += calls
+                entry[1] += spent
+
+    def render(self):
+        with self._lock:
+            requests = {key: list(row) for key, row in self.requests.items()}
+            functions = {key: list(row) for key, row in self.functions.items()}
+
+        size = len(self.buckets)
+        lines = [
+            '# HELP http_request_duration_seconds Request latency by view, method and status.',
+            '# TYPE http_request_duration_seconds histogram',
+        ]
+        for (view, method, status), row in sorted(requests.items()):
+            labels = f'view="{_escape(view)}",method="{method}",status="{status}"'
+            cumulative = 0
+            for bound, count in zip((*map(_number, self.buckets), '+Inf'), row):
+                cumulative += count
+                lines.append(f'http_request_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'http_request_duration_seconds_sum{{{labels}}} {_number(row[size + 1])}')
+            lines.append(f'http_request_duration_seconds_count{{{labels}}} {cumulative}')
+
+        for name, index, help_text in (
+            ('http_request_db_queries_total', size + 2, 'SQL queries run by requests, by view, method and status.'),
+            ('http_request_db_seconds_total', size + 3, 'Time requests spent waiting on SQL, by view, method and status.'),
+        ):
+            lines += [f'# HELP {name} {help_text}', f'# TYPE {name} counter']
+            for (view, method, status), row in sorted(requests.items()):
+                labels = f'view="{_escape(view)}",method="{method}",status="{status}"'
+                lines.append(f'{name}{{{labels}}} {_number(row[index])}')
+
+        lines += [
+            '# HELP function_duration_seconds Time spent in instrumented functions, by view.',
+            '# TYPE function_duration_seconds summary',
+        ]
+        for (name, view), (calls, spent) in sorted(functions.items()):
+            labels = f'function="{name}",view="{_escape(view)}"'
+            lines.append(f'function_duration_seconds_sum{{{labels}}} {_number(spent)}')
+            lines.append(f'function_duration_seconds_count{{{labels}}} {calls}')
+
+        lines += _cache_lines()
+        return '\n'.join(lines) + '\n'
+
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _cache_lines():
+    from .cache import customer_cache, eligibility_memo
+
+    cache = customer_cache.stats()
+    memo = eligibility_memo.stats()
+    return [
+        '# HELP customer_cache_lookups_total Customer cache lookups by the tier that answered them.',
+        '# TYPE customer_cache_lookups_total counter',
+        f'customer_cache_lookups_total{{result="local_hit"}} {cache["local_hits"]}',
+        f'customer_cache_lookups_total{{result="shared_hit"}} {cache["shared_hits"]}',
+        f'customer_cache_lookups_total{{result="miss"}} {cache["misses"]}',
+        '# HELP customer_cache_local_size Customers held in this process\'s local cache.',
+        '# TYPE customer_cache_local_size gauge',
+        f'customer_cache_local_size {cache["local_size"]}',
+        '# HELP eligibility_memo_lookups_total Memoized eligibility decision lookups.',
+        '# TYPE eligibility_memo_lookups_total counter',
+        f'eligibility_memo_lookups_total{{result="hit"}} {memo["hits"]}',
+        f'eligibility_memo_lookups_total{{result="miss"}} {memo["misses"]}',
+        '# HELP eligibility_memo_customers Customers with memoized eligibility decisions.',
+        '# TYPE eligibility_memo_customers gauge',
+        f'eligibility_memo_customers {memo["customers"]}',
+    ]
+
+
+registry = Registry()
+
+
+def start_request():
+    # Returns the token for finish_request
+    return _current.set(RequestTimings())
+
+
+def finish_request(token, request, response, seconds):
+    timings = _current.get()
+    _current.reset(token)
+    match = request.resolver_match
+    registry.observe(match.route if match else 'unmatched', request.method, response.status_code, seconds, timings)
+
+
+def time_sql(execute, sql, params, many, context):
+    # Execute wrapper adding every query's count and duration to the current request
+    timings = _current.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    started = perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timings.queries += 1
+        timings.sql_seconds += perf_counter() - started
+
+
+def install_sql_timer(connection):
+    # Wrappers stay on the connection object across reconnects, so only add it once. It goes
+    # first because connection.execute_wrapper() blocks pop the last wrapper on exit.
+    if time_sql not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, time_sql)
+
+
+def timed(name):
+    # Adds the decorated function's run time to the current request under `name`
+    def decorator(func):
+        if iscoroutinefunction(func):
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                timings = _current.get()
+                if timings is None:
+                    return await func(*args, **kwargs)
+                started = perf_counter()
+                try:
+                    return await func(*args, **kwargs)
+                finally:
+                    timings.add_function(name, perf_counter() - started)
+            return async_wrapper
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            timings = _current.get()
+            if timings is None:
+                return func(*args, **kwargs)
+            started = perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                timings.add_function(name, perf_counter() - started)
+        return wrapper
+    return decorator
@@ -0,0 +1,168 @@
+from contextlib import ExitStack
+from time import perf_counter
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.handlers.exception import convert_exception_to_response
+from django.db import connections
+from django.utils.module_loading import import_string
+from . import metrics, routers
+
+
+class AdminMiddleware:
+    # Runs settings.ADMIN_MIDDLEWARE (sessions, CSRF, auth, messages, clickjacking) only for
+    # requests under ADMIN_PATH_PREFIXES, so the JSON API does not pay for it. The wrapped
+    # middleware's process_view/process_exception/process_template_response hooks are
+    # forwarded for those requests, which keeps CSRF checks in place for the admin.
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+        self.prefixes = tuple(getattr(settings, 'ADMIN_PATH_PREFIXES', ('/admin/',)))
+
+        handler = convert_exception_to_response(get_response)
+        self.view_hooks, self.exception_hooks, self.template_hooks = [], [], []
+        for path in reversed(getattr(settings, 'ADMIN_MIDDLEWARE', [])):
+            middleware = import_string(path)(handler)
+            # Same hook order as Django's handler: view hooks outermost first, the others innermost first
+            if hasattr(middleware, 'process_view'):
+                self.view_hooks.insert(0, middleware.process_view)
+            if hasattr(middleware, 'process_exception'):
+                self.exception_hooks.append(middleware.process_exception)
+            if hasattr(middleware, 'process_template_response'):
+                self.template_hooks.append(middleware.process_template_response)
+            handler = convert_exception_to_response(middleware)
+        self.admin_handler = handler
+
+    def is_admin(self, request):
+        return request.path_info.startswith(self.prefixes)
+
+    def __call__(self, request):
+        if self.is_admin(request):
+            return self.admin_handler(request)
+        return self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if self.is_admin(request):
+            for hook in self.view_hooks:
+                response = hook(request, view_func, view_args, view_kwargs)
+                if response is not None:
+                    return response
+        return None
+
+    def process_exception(self, request, exception):
+        if self.is_admin(request):
+            for hook in self.exception_hooks:
+                response = hook(request, exception)
+                if response is not None:
+                    return response
+        return None
+
+    def process_template_response(self, request, response):
+        if self.is_admin(request):
+            for hook in self.template_hooks:
+                response = hook(request, response)
+        return response
+
+
+class MetricsMiddleware:
+    # Records latency, SQL queries and SQL time per view and status for /metrics.
+    # Outermost in MIDDLEWARE so the latency covers the whole stack; runs natively under
+    # both WSGI and ASGI so async views are not pushed through a thread.
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        token = metrics.start_request()
+        started = perf_counter()
+        response = self.get_response(request)
+        metrics.finish_request(token, request, response, perf_counter() - started)
+        return response
+
+    async def __acall__(self, request):
+        token = metrics.start_request()
+        started = perf_counter()
+        response = await self.get_response(request)
+        metrics.finish_request(token, request, response, perf_counter() - started)
+        return response
+
+
+class ReplicaPinMiddleware:
+    # Per-request state for routers.ReplicaRouter: views marked @replica_reads read from the
+    # replica, and requests carrying the pin cookie stay on the primary. A response to a request
+    # that wrote sets the cookie for REPLICA_PIN_SECONDS, covering the replica's lag.
+    # Installed by settings.py only when a replica is configured.
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+        self.cookie = getattr(settings, 'REPLICA_PIN_COOKIE', 'db-pin')
+        self.max_age = getattr(settings, 'REPLICA_PIN_SECONDS', 5)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        token = routers.start_request(pinned=self.cookie in request.COOKIES)
+        try:
+            response = self.get_response(request)
+        finally:
+            state = routers.finish_request(token)
+        return self.pin(state, response)
+
+    async def __acall__(self, request):
+        token = routers.start_request(pinned=self.cookie in request.COOKIES)
+        try:
+            response = await self.get_response(request)
+        finally:
+            state = routers.finish_request(token)
+        return self.pin(state, response)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        view = getattr(view_func, 'view_class', view_func)
+        if getattr(view, 'replica_reads', False):
+            routers.use_replica()
+        return None
+
+    def pin(self, state, response):
+        if state.wrote:
+            response.set_cookie(self.cookie, '1', max_age=self.max_age, httponly=True, samesite='Lax')
+        return response
+
+
+class QueryCountMiddleware:
+    # Reports how many SQL queries a request ran in an X-DB-Queries response header.
+    # Enabled with DB_QUERY_COUNT_HEADER=1 for the benchmark replays (benchmarks/replay.py).
+    # Streaming responses only count the queries run before the body is iterated.
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        queries = 0
+
+        def count(execute, sql, params, many, context):
+            nonlocal queries
+            queries += 1
+            return execute(sql, params, many, context)
+
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(count))
+            response = self.get_response(request)
+        response['X-DB-Queries'] = str(queries)
+        return response
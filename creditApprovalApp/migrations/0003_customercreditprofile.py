@@ -0,0 +1,23 @@
+# Generated by Django 5.2.4 on 2026-10-18 12:23
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('creditApprovalApp', '0002_rename_customer_id_loan_customer'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CustomerCreditProfile',
+            fields=[
+                ('customer', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='credit_profile', serialize=False, to='creditApprovalApp.customer')),
+                ('loan_count', models.IntegerField(default=0)),
+                ('total_emis_paid_on_time', models.IntegerField(default=0)),
+                ('latest_start_date', models.DateField(blank=True, null=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-18 12:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('creditApprovalApp', '0004_idempotencykey'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customer',
+            name='state_version',
+            field=models.PositiveIntegerField(db_default=0, default=0),
+        ),
+    ]
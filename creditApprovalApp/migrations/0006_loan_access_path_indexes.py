@@ -0,0 +1,27 @@
+# Generated by Django 5.2.4 on 2026-10-18 12:36
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('creditApprovalApp', '0005_customer_state_version'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='loan',
+            index=models.Index(fields=['customer', 'start_date'], include=('emis_paid_on_time',), name='loan_customer_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='loan',
+            index=models.Index(fields=['customer', 'loan_id'], include=('loan_amount', 'interest_rate', 'monthly_repayment', 'tenure', 'emis_paid_on_time'), name='loan_customer_loan_idx'),
+        ),
+        migrations.AlterField(
+            model_name='loan',
+            name='customer',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='creditApprovalApp.customer'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.4 on 2026-10-18 12:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('creditApprovalApp', '0006_loan_access_path_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customercreditprofile',
+            name='credit_score',
+            field=models.PositiveSmallIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='customercreditprofile',
+            name='scored_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.4 on 2026-10-18 12:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('creditApprovalApp', '0008_loanapplication'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AccrualCheckpoint',
+            fields=[
+                ('name', models.CharField(max_length=50, primary_key=True, serialize=False)),
+                ('accrued_through', models.DateField(blank=True, null=True)),
+                ('target_date', models.DateField(blank=True, null=True)),
+                ('cursor_end_date', models.DateField(blank=True, null=True)),
+                ('cursor_loan_id', models.IntegerField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='loan',
+            index=models.Index(fields=['end_date', 'loan_id'], name='loan_end_date_idx'),
+        ),
+    ]
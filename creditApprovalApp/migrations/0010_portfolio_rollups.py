@@ -0,0 +1,36 @@
+# Generated by Django 5.2.4 on 2026-10-18 13:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('creditApprovalApp', '0009_loan_end_date_idx_accrualcheckpoint'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PortfolioDay',
+            fields=[
+                ('date', models.DateField(primary_key=True, serialize=False)),
+                ('approved', models.IntegerField(default=0)),
+                ('rejected', models.IntegerField(default=0)),
+                ('approved_amount', models.FloatField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='PortfolioBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tenure_band', models.CharField(max_length=10)),
+                ('interest_rate_band', models.CharField(max_length=10)),
+                ('loan_count', models.IntegerField(default=0)),
+                ('loan_amount', models.FloatField(default=0)),
+                ('monthly_repayment', models.FloatField(default=0)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('tenure_band', 'interest_rate_band'), name='portfolio_bucket_band_uniq')],
+            },
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.4 on 2026-10-18 13:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('creditApprovalApp', '0010_portfolio_rollups'),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='portfoliobucket',
+            name='portfolio_bucket_band_uniq',
+        ),
+        migrations.AddField(
+            model_name='portfoliobucket',
+            name='shard',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='portfolioday',
+            name='date',
+            field=models.DateField(),
+        ),
+        migrations.AddField(
+            model_name='portfolioday',
+            name='id',
+            field=models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID'),
+        ),
+        migrations.AddField(
+            model_name='portfolioday',
+            name='shard',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddConstraint(
+            model_name='portfoliobucket',
+            constraint=models.UniqueConstraint(fields=('tenure_band', 'interest_rate_band', 'shard'), name='portfolio_bucket_band_uniq'),
+        ),
+        migrations.AddConstraint(
+            model_name='portfolioday',
+            constraint=models.UniqueConstraint(fields=('date', 'shard'), name='portfolio_day_shard_uniq'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('creditApprovalApp', '0011_portfolio_shards'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='portfoliobucket',
+            name='outstanding_principal',
+            field=models.FloatField(default=0),
+        ),
+    ]
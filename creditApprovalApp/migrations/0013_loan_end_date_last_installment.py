@@ -0,0 +1,39 @@
+import calendar
+from datetime import date
+
+from django.db import migrations
+
+
+def last_due_date(start_date, tenure):
+    # As utils.due_dates: the start day, tenure months on, clamped to that month's last day
+    months = start_date.month - 1 + tenure
+    year, month = start_date.year + months // 12, months % 12 + 1
+    return date(year, month, min(start_date.day, calendar.monthrange(year, month)[1]))
+
+
+def move_end_dates(apps, schema_editor):
+    # create_loan used to set end_date to start + 30 days per month of tenure, before the last
+    # installment falls due; accrue_emis stops reading a loan after its end_date
+    Loan = apps.get_model('creditApprovalApp', 'Loan')
+    loans = Loan.objects.order_by('loan_id').only('loan_id', 'tenure', 'start_date', 'end_date')
+    last_id = 0
+    while chunk := list(loans.filter(loan_id__gt=last_id)[:2000]):
+        last_id = chunk[-1].loan_id
+        moved = []
+        for loan in chunk:
+            end_date = last_due_date(loan.start_date, loan.tenure)
+            if loan.end_date < end_date:
+                loan.end_date = end_date
+                moved.append(loan)
+        Loan.objects.bulk_update(moved, ['end_date'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('creditApprovalApp', '0012_portfoliobucket_outstanding_principal'),
+    ]
+
+    operations = [
+        migrations.RunPython(move_end_dates, migrations.RunPython.noop),
+    ]
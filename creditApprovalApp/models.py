@@ -1,4 +1,5 @@
 from django.db import models
+from django.db.models import F
 
 class Customer(models.Model):
     customer_id = models.AutoField(primary_key=True)
@@ -9,13 +10,27 @@ class Customer(models.Model):
     approved_limit = models.IntegerField()
     current_debt = models.IntegerField(default=0)
     age = models.PositiveSmallIntegerField(null=True, blank=True)
+    # Bumped on every change that can alter an eligibility decision (debt, limit, loans)
+    state_version = models.PositiveIntegerField(default=0, db_default=0)
     
+    def save(self, *args, **kwargs):
+        if self._state.adding:
+            super().save(*args, **kwargs)
+            return
+        # Bumped in the database, so an instance loaded before another bump still moves past it
+        self.state_version = F('state_version') + 1
+        if kwargs.get('update_fields') is not None:
+            kwargs['update_fields'] = {*kwargs['update_fields'], 'state_version'}
+        super().save(*args, **kwargs)
+        self.refresh_from_db(fields=['state_version'])
+
     def __str__(self):
         return f"{self.first_name} {self.last_name} (ID: {self.customer_id})"
 
 class Loan(models.Model):
     loan_id = models.AutoField(primary_key=True)
-    customer = models.ForeignKey(Customer, on_delete=models.CASCADE)
+    # Indexed through the composite indexes below, which all lead with customer_id
+    customer = models.ForeignKey(Customer, on_delete=models.CASCADE, db_index=False)
     loan_amount = models.FloatField()
     tenure = models.IntegerField()
     interest_rate = models.FloatField()
@@ -23,6 +38,133 @@ class Loan(models.Model):
     emis_paid_on_time = models.IntegerField()
     start_date = models.DateField()
     end_date = models.DateField()
+
+    class Meta:
+        indexes = [
+            # Eligibility stats: per-customer aggregates and the current-year date range
+            models.Index(fields=['customer', 'start_date'], include=['emis_paid_on_time'], name='loan_customer_start_idx'),
+            # /view-loans pages (customer_id, loan_id > cursor ORDER BY loan_id) served from the index
+            models.Index(
+                fields=['customer', 'loan_id'],
+                include=['loan_amount', 'interest_rate', 'monthly_repayment', 'tenure', 'emis_paid_on_time'],
+                name='loan_customer_loan_idx',
+            ),
+            # `manage.py accrue_emis` walks loans still running after its last accrual date
+            models.Index(fields=['end_date', 'loan_id'], name='loan_end_date_idx'),
+        ]
     
     def __str__(self):
         return f"Loan {self.loan_id} - {self.customer.first_name} {self.customer.last_name}"
+
+class CustomerCreditProfile(models.Model):
+    # Per-customer loan rollups kept in step with the Loan table for O(1) scoring
+    customer = models.OneToOneField(Customer, on_delete=models.CASCADE, primary_key=True, related_name='credit_profile')
+    loan_count = models.IntegerField(default=0)
+    total_emis_paid_on_time = models.IntegerField(default=0)
+    latest_start_date = models.DateField(null=True, blank=True)
+    # Nightly snapshot written by `manage.py rescore_portfolio`
+    credit_score = models.PositiveSmallIntegerField(null=True, blank=True)
+    scored_at = models.DateTimeField(null=True, blank=True)
+
+    def as_loan_stats(self, year):
+        return {
+            "total_loans": self.loan_count,
+            "total_emis": self.total_emis_paid_on_time,
+            "current_year_loans": int(self.latest_start_date is not None and self.latest_start_date.year == year),
+        }
+
+    def __str__(self):
+        return f"Credit profile for customer {self.customer_id}"
+
+class IdempotencyKey(models.Model):
+    # Stored /create-loan response replayed for retries carrying the same Idempotency-Key
+    key = models.CharField(max_length=255, primary_key=True)
+    request_hash = models.CharField(max_length=64)
+    status_code = models.PositiveSmallIntegerField()
+    response = models.JSONField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return f"Idempotency key {self.key}"
+
+class LoanApplication(models.Model):
+    # /create-loan request queued with "Prefer: respond-async", booked by `manage.py process_loan_queue`
+    PENDING = 'pending'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = [(PENDING, 'Pending'), (DONE, 'Done'), (FAILED, 'Failed')]
+
+    customer = models.ForeignKey(Customer, on_delete=models.CASCADE, db_index=False)
+    loan_amount = models.FloatField()
+    tenure = models.IntegerField()
+    interest_rate = models.FloatField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    # The /create-loan response the request would have received
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    response = models.JSONField(null=True, blank=True)
+    loan = models.ForeignKey(Loan, on_delete=models.SET_NULL, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Workers pick customers by their oldest pending application, then drain them in id order
+            models.Index(fields=['customer', 'id'], condition=models.Q(status='pending'), name='loanapp_pending_idx'),
+        ]
+
+    def __str__(self):
+        return f"Loan application {self.pk} ({self.status})"
+
+class AccrualCheckpoint(models.Model):
+    # Progress of `manage.py accrue_emis`: the date EMIs are accrued through and, while a run is
+    # underway, its target date and the last (end_date, loan_id) it committed
+    name = models.CharField(max_length=50, primary_key=True)
+    accrued_through = models.DateField(null=True, blank=True)
+    target_date = models.DateField(null=True, blank=True)
+    cursor_end_date = models.DateField(null=True, blank=True)
+    cursor_loan_id = models.IntegerField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Accrual checkpoint {self.name} ({self.accrued_through})"
+
+class PortfolioBucket(models.Model):
+    # Loan totals per tenure and interest rate band for /portfolio/summary, kept in step by
+    # create_loan and recomputed by `manage.py rebuild_portfolio`. Each band's totals are split
+    # over shard rows, so concurrent bookings do not all wait on one row lock; readers sum them.
+    # outstanding_principal also falls as `manage.py accrue_emis` records repayments, so a single
+    # shard row can go negative after a rebuild folded the band into shard 0; only sums mean anything.
+    tenure_band = models.CharField(max_length=10)
+    interest_rate_band = models.CharField(max_length=10)
+    shard = models.PositiveSmallIntegerField(default=0)
+    loan_count = models.IntegerField(default=0)
+    loan_amount = models.FloatField(default=0)
+    monthly_repayment = models.FloatField(default=0)
+    outstanding_principal = models.FloatField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['tenure_band', 'interest_rate_band', 'shard'], name='portfolio_bucket_band_uniq'),
+        ]
+
+    def __str__(self):
+        return f"Portfolio bucket {self.tenure_band} months at {self.interest_rate_band}% (shard {self.shard})"
+
+class PortfolioDay(models.Model):
+    # Loan decisions per day for the /portfolio/summary approval trend, split over shard rows
+    # like PortfolioBucket. Rejections are only counted as they happen, the Loan table cannot
+    # reproduce them.
+    date = models.DateField()
+    shard = models.PositiveSmallIntegerField(default=0)
+    approved = models.IntegerField(default=0)
+    rejected = models.IntegerField(default=0)
+    approved_amount = models.FloatField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['date', 'shard'], name='portfolio_day_shard_uniq'),
+        ]
+
+    def __str__(self):
+        return f"Portfolio day {self.date} (shard {self.shard})"
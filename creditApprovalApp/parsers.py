@@ -0,0 +1,34 @@
+import codecs
+import csv
+import orjson
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+
+
+def read_csv(stream):
+    # Rows of a UTF-8 CSV byte stream as dicts keyed by the (stripped) header names
+    reader = csv.reader(codecs.iterdecode(stream, 'utf-8-sig'))
+    try:
+        header = [name.strip() for name in next(reader, [])]
+        return [dict(zip(header, row)) for row in reader if any(row)]
+    except (csv.Error, UnicodeDecodeError) as exc:
+        raise ParseError(f'CSV parse error - {exc}')
+
+
+class ORJSONParser(BaseParser):
+    # JSON request bodies through orjson, which rejects NaN and Infinity like DRF's strict JSONParser
+    media_type = 'application/json'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError(f'JSON parse error - {exc}')
+
+
+class CSVParser(BaseParser):
+    # text/csv bodies as a list of row dicts, for the bulk endpoints
+    media_type = 'text/csv'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        return read_csv(stream)
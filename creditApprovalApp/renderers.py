@@ -0,0 +1,19 @@
+import orjson
+from rest_framework.renderers import BaseRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+_fallback = JSONEncoder()
+
+
+class ORJSONRenderer(BaseRenderer):
+    # Compact UTF-8 JSON through orjson. Types orjson does not know (Decimal, lazy strings,
+    # querysets) fall back to DRF's encoder, so output matches JSONRenderer's.
+    media_type = 'application/json'
+    format = 'json'
+    charset = None
+    options = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return orjson.dumps(data, default=_fallback.default, option=self.options)
@@ -0,0 +1,87 @@
+"""
+Read replica routing.
+
+When DB_REPLICA_HOST or DB_REPLICA_NAME is set, settings.py adds a `replica` database alias,
+ReplicaRouter and ReplicaPinMiddleware. Views marked with @replica_reads send their ORM reads to
+the replica. Every write, and every read made outside those views (other views, management
+commands, the customer cache), uses `default`.
+
+A request is pinned to the primary as soon as it writes, so it reads its own writes for the rest
+of the request. Its response also sets a short-lived pin cookie, which keeps that client's next
+requests on the primary until the replica has caught up: CreateLoan followed by ViewLoans sees
+the new loan.
+"""
+from contextvars import ContextVar
+from django.db import DEFAULT_DB_ALIAS, connections
+
+REPLICA = 'replica'
+
+
+class RequestRouting:
+    # Routing state of one request. Mutated in place rather than re-set, so changes made where
+    # Django runs sync code in a thread under ASGI are seen by the middleware.
+    __slots__ = ('replica', 'pinned', 'wrote')
+
+    def __init__(self, pinned=False):
+        self.replica = False
+        self.pinned = pinned
+        self.wrote = False
+
+
+_current = ContextVar('request_routing', default=None)
+
+
+def start_request(pinned=False):
+    # Returns the token for finish_request
+    return _current.set(RequestRouting(pinned))
+
+
+def finish_request(token):
+    # The finished request's routing state
+    state = _current.get()
+    _current.reset(token)
+    return state
+
+
+def use_replica():
+    # Let the current request read from the replica until it writes
+    state = _current.get()
+    if state is not None:
+        state.replica = True
+
+
+def replica_is_primary():
+    # True when the replica alias names the primary's own database, as its TEST MIRROR does under
+    # the test runner; reading it through a second connection would only miss uncommitted data
+    replica, primary = connections[REPLICA].settings_dict, connections[DEFAULT_DB_ALIAS].settings_dict
+    return all(replica[key] == primary[key] for key in ('HOST', 'PORT', 'NAME'))
+
+
+def replica_reads(view):
+    # Marks a view function or APIView class whose reads may be served by the replica
+    view.replica_reads = True
+    return view
+
+
+class ReplicaRouter:
+
+    def db_for_read(self, model, **hints):
+        state = _current.get()
+        if state is not None and state.replica and not (state.pinned or state.wrote) and not replica_is_primary():
+            return REPLICA
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        # Also asked for select_for_update() reads, which must lock rows on the primary
+        state = _current.get()
+        if state is not None:
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both aliases hold the same data
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # The replica receives schema changes through replication
+        return db != REPLICA
@@ -0,0 +1,34 @@
+from django.db.backends.signals import connection_created
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from .cache import customer_cache, eligibility_memo
+from .metrics import install_sql_timer
+from .models import Customer, CustomerCreditProfile
+
+
+@receiver(post_save, sender=Customer)
+@receiver(post_delete, sender=Customer)
+@receiver(post_save, sender=CustomerCreditProfile)
+@receiver(post_delete, sender=CustomerCreditProfile)
+def invalidate_cached_customer(sender, instance, **kwargs):
+    customer_cache.invalidate(instance.pk)
+    # Also covers a deleted customer's id being reused before its state_version moves on
+    eligibility_memo.forget(instance.pk)
+
+
+@receiver(post_save, sender=CustomerCreditProfile)
+@receiver(post_delete, sender=CustomerCreditProfile)
+def bump_profile_owner_version(sender, instance, origin=None, **kwargs):
+    # Profile edits (e.g. in the admin) change scoring inputs, and forget() above only reaches
+    # this process's memo; the version bump reaches every worker. Skipped when the customer
+    # itself is being deleted. Loan writes outside create_loan go through
+    # rebuild_credit_profiles instead (see admin.LoanAdmin), which bumps the version itself.
+    if isinstance(origin, Customer) or getattr(origin, 'model', None) is Customer:
+        return
+    Customer.objects.filter(pk=instance.pk).update(state_version=F('state_version') + 1)
+
+
+@receiver(connection_created)
+def time_connection_queries(sender, connection, **kwargs):
+    install_sql_timer(connection)
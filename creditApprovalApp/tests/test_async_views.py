@@ -0,0 +1,37 @@
+from datetime import date
+from django.test import TestCase
+from creditApprovalApp.models import Customer, CustomerCreditProfile, Loan
+
+
+class AsyncViewTests(TestCase):
+
+    def setUp(self):
+        self.customer = Customer.objects.create(
+            first_name="Async",
+            last_name="Customer",
+            phone_number="9300000000",
+            monthly_salary=100000,
+            approved_limit=3600000,
+        )
+        CustomerCreditProfile.objects.create(customer=self.customer, loan_count=1, total_emis_paid_on_time=10, latest_start_date=date.today())
+        self.loan = Loan.objects.create(
+            customer=self.customer, loan_amount=100000, tenure=12, interest_rate=10,
+            monthly_repayment=8791.59, emis_paid_on_time=10,
+            start_date=date.today(), end_date=date.today(),
+        )
+
+    async def test_async_views_match_sync_views(self):
+        quote = {"customer_id": self.customer.pk, "loan_amount": 100000, "tenure": 12, "interest_rate": 10}
+        pairs = [
+            ("post", "/check-eligibility", quote),
+            ("post", "/check-eligibility", {**quote, "customer_id": 0}),
+            ("get", f"/view-loan/{self.loan.pk}", None),
+            ("get", f"/view-loans/{self.customer.pk}", None),
+            ("get", f"/view-loans/{self.customer.pk}?limit=1", None),
+        ]
+        for method, path, body in pairs:
+            kwargs = {"content_type": "application/json"} if body is not None else {}
+            sync = await getattr(self.async_client, method)(path, body, **kwargs)
+            asynchronous = await getattr(self.async_client, method)("/async" + path, body, **kwargs)
+            self.assertEqual(asynchronous.status_code, sync.status_code, path)
+            self.assertEqual(asynchronous.json(), sync.json(), path)
@@ -0,0 +1,141 @@
+from datetime import date
+from unittest.mock import patch
+from django.contrib import admin
+from django.contrib.auth.models import User
+from django.db.models import F
+from django.test import TestCase
+from creditApprovalApp.admin import LoanAdmin
+from creditApprovalApp.cache import LRUCache, customer_cache, eligibility_memo
+from creditApprovalApp.models import Customer, CustomerCreditProfile, Loan
+
+
+class LRUCacheTests(TestCase):
+
+    def test_evicts_least_recently_used(self):
+        cache = LRUCache(maxsize=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), 1)
+        self.assertEqual(cache.stats()["hits"], 2)
+
+
+class CustomerCacheTests(TestCase):
+
+    def setUp(self):
+        self.customer = Customer.objects.create(
+            first_name="Cached",
+            last_name="Customer",
+            phone_number="9200000000",
+            monthly_salary=100000,
+            approved_limit=3600000,
+        )
+        CustomerCreditProfile.objects.create(customer=self.customer)
+
+    def test_second_read_is_served_from_cache(self):
+        customer_cache.get(self.customer.pk)
+        hits = customer_cache.stats()["local_hits"]
+        with self.assertNumQueries(0):
+            customer = customer_cache.get(self.customer.pk)
+            customer.credit_profile
+        self.assertEqual(customer_cache.stats()["local_hits"], hits + 1)
+
+    def test_save_invalidates(self):
+        customer_cache.get(self.customer.pk)
+        self.customer.approved_limit = 100
+        self.customer.save()
+        self.assertEqual(customer_cache.get(self.customer.pk).approved_limit, 100)
+
+    def test_create_loan_invalidates_debt(self):
+        customer_cache.get(self.customer.pk)
+        response = self.client.post("/create-loan", {
+            "customer_id": self.customer.pk, "loan_amount": 100000, "tenure": 12, "interest_rate": 10,
+        }, content_type="application/json")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(customer_cache.get(self.customer.pk).current_debt, 100000)
+        self.assertEqual(customer_cache.get(self.customer.pk).credit_profile.loan_count, 1)
+
+    def test_locmem_entries_expire_with_local_ttl(self):
+        # Other workers never see this process's invalidations, so LocMemCache gets the short bound
+        with patch.object(customer_cache, 'ttl', 300), patch.object(customer_cache.local, 'ttl', 5):
+            self.assertEqual(customer_cache.shared_ttl, 5)
+
+
+class EligibilityMemoTests(TestCase):
+
+    def setUp(self):
+        self.customer = Customer.objects.create(
+            first_name="Memo",
+            last_name="Customer",
+            phone_number="9200000001",
+            monthly_salary=100000,
+            approved_limit=3600000,
+        )
+        CustomerCreditProfile.objects.create(customer=self.customer)
+        self.quote = {"customer_id": self.customer.pk, "loan_amount": 100000, "tenure": 12, "interest_rate": 10}
+
+    def test_repeated_quotes_are_memoized(self):
+        self.client.post("/check-eligibility", self.quote, content_type="application/json")
+        hits = eligibility_memo.stats()["hits"]
+        with patch("creditApprovalApp.utils.evaluate_eligibility") as evaluate:
+            response = self.client.post("/check-eligibility", self.quote, content_type="application/json")
+            evaluate.assert_not_called()
+        self.assertEqual(response.json()["credit_score"], 20)
+        self.assertEqual(eligibility_memo.stats()["hits"], hits + 1)
+
+    def test_state_version_bump_invalidates_decision(self):
+        first = self.client.post("/check-eligibility", self.quote, content_type="application/json").json()
+        self.client.post("/create-loan", self.quote, content_type="application/json")
+        Customer.objects.filter(pk=self.customer.pk).update(approved_limit=1000)
+        # update() skips signals, so only the version bumped by create-loan keeps this fresh
+        second = self.client.post("/check-eligibility", self.quote, content_type="application/json").json()
+        self.assertEqual(first["credit_score"], 20)
+        self.assertEqual(second["message"], "Current debt exceeds approved limit")
+
+    def test_admin_loan_edits_invalidate_decision(self):
+        customer = Customer.objects.create(
+            first_name="Unprofiled", last_name="Customer", phone_number="9200000002",
+            monthly_salary=100000, approved_limit=3600000,
+        )
+        quote = {**self.quote, "customer_id": customer.pk}
+        first = self.client.post("/check-eligibility", quote, content_type="application/json").json()
+        loan = Loan.objects.create(
+            customer=customer, loan_amount=100000, tenure=12, interest_rate=10, monthly_repayment=8792,
+            emis_paid_on_time=12, start_date=date(2015, 1, 1), end_date=date(2016, 1, 1),
+        )
+        # Plain ORM writes send no version bump; the admin rebuilds the owner's profile instead
+        LoanAdmin(Loan, admin.site).save_model(None, loan, None, change=True)
+        second = self.client.post("/check-eligibility", quote, content_type="application/json").json()
+        self.client.force_login(User.objects.create_superuser("admin", "admin@example.com", "password"))
+        self.client.post(f"/admin/creditApprovalApp/loan/{loan.pk}/delete/", {"post": "yes"})
+        third = self.client.post("/check-eligibility", quote, content_type="application/json").json()
+        self.assertFalse(Loan.objects.filter(pk=loan.pk).exists())
+        self.assertEqual((first["credit_score"], second["credit_score"], third["credit_score"]), (20, 40, 20))
+
+    def test_profile_save_bumps_the_version(self):
+        version = Customer.objects.get(pk=self.customer.pk).state_version
+        profile = CustomerCreditProfile.objects.get(pk=self.customer.pk)
+        profile.loan_count = 5
+        profile.save()
+        self.assertEqual(Customer.objects.get(pk=self.customer.pk).state_version, version + 1)
+
+    def test_customer_delete_keeps_the_loan_cascade_fast(self):
+        Loan.objects.bulk_create(
+            Loan(customer=self.customer, loan_amount=1000, tenure=12, interest_rate=10, monthly_repayment=88,
+                 emis_paid_on_time=0, start_date=date(2015, 1, 1), end_date=date(2016, 1, 1))
+            for _ in range(50)
+        )
+        # No Loan delete receivers, so loans go in one DELETE instead of one per row
+        with self.assertNumQueries(7):
+            self.customer.delete()
+
+    def test_saving_a_stale_instance_still_bumps_the_version(self):
+        stale = Customer.objects.get(pk=self.customer.pk)
+        Customer.objects.filter(pk=self.customer.pk).update(state_version=F('state_version') + 1)
+        bumped = Customer.objects.get(pk=self.customer.pk).state_version
+        stale.current_debt = 1000
+        stale.save(update_fields=['current_debt'])
+        self.assertGreater(stale.state_version, bumped)
+        self.assertEqual(Customer.objects.get(pk=self.customer.pk).state_version, stale.state_version)
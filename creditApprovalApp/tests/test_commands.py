@@ -0,0 +1,267 @@
+import os
+import tempfile
+from datetime import date, timedelta
+from importlib import import_module
+from io import StringIO
+from unittest.mock import patch
+from django.apps import apps
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test import TestCase
+from django.utils import timezone
+from creditApprovalApp.management.commands import accrue_emis
+from creditApprovalApp.models import (
+    AccrualCheckpoint, Customer, CustomerCreditProfile, IdempotencyKey, Loan, PortfolioBucket, PortfolioDay,
+)
+from creditApprovalApp.utils import amortization_schedule, check_credit_eligibility, create_loan
+
+
+def write_csv(rows):
+    f = tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False, newline='')
+    with f:
+        f.write('\n'.join(rows) + '\n')
+    return f.name
+
+
+class LoadDataTests(TestCase):
+
+    def setUp(self):
+        self.customers = write_csv([
+            'Customer ID,First Name,Last Name,Age,Phone Number,Monthly Salary,Approved Limit',
+            '1,Aaron,Garcia,63,9629317944,50000,1800000',
+            '2,Abbey,Cruz,56,9732883000,33000,1200000',
+        ])
+        self.loans = write_csv([
+            'Customer ID,Loan ID,Loan Amount,Tenure,Interest Rate,Monthly payment,EMIs paid on Time,Date of Approval,End Date',
+            '1,10,100000,12,10.5,8815,12,2015-01-05,2016-01-05',
+            '2,11,200000,24,12,9415,20,2019-03-01 00:00:00,2021-03-01',
+            '1,10,150000,12,10.5,13222,12,2015-01-05,2016-01-05',
+            '99,12,100000,12,10,8791,1,2019-03-01,2020-03-01',
+        ])
+
+    def tearDown(self):
+        os.remove(self.customers)
+        os.remove(self.loans)
+
+    def test_bulk_load_is_idempotent(self):
+        for _ in range(2):
+            out = StringIO()
+            call_command('load_data', customers=self.customers, loans=self.loans, chunk_size=2, stdout=out)
+
+        self.assertIn('Skipped 1 loans', out.getvalue())
+        self.assertEqual(Customer.objects.count(), 2)
+        self.assertEqual(Loan.objects.get(pk=10).loan_amount, 150000)
+        self.assertEqual(Loan.objects.count(), 2)
+        self.assertEqual(CustomerCreditProfile.objects.get(pk=2).total_emis_paid_on_time, 20)
+
+    def test_copy_falls_back_to_bulk_on_sqlite(self):
+        out = StringIO()
+        call_command('load_data', customers=self.customers, loans=self.loans, copy=True, stdout=out)
+        if connection.vendor != 'postgresql':
+            self.assertIn('COPY needs PostgreSQL', out.getvalue())
+        self.assertEqual(Loan.objects.count(), 2)
+        self.assertEqual(Loan.objects.get(pk=10).loan_amount, 150000)
+
+
+class PurgeIdempotencyKeysTests(TestCase):
+
+    def test_purges_only_expired_keys(self):
+        now = timezone.now()
+        for key, expires_at in (("old", now - timedelta(hours=1)), ("live", now + timedelta(hours=1))):
+            IdempotencyKey.objects.create(key=key, request_hash="x", status_code=201, response={}, expires_at=expires_at)
+
+        call_command('purge_idempotency_keys', batch_size=1, stdout=StringIO())
+        self.assertEqual(list(IdempotencyKey.objects.values_list('key', flat=True)), ["live"])
+
+
+class RescorePortfolioTests(TestCase):
+
+    def setUp(self):
+        today = timezone.now().date()
+        histories = [
+            (50000, 1800000, []),                              # fresh customer
+            (50000, 1800000, [(12, 12, today)]),               # good history this year
+            (50000, 1800000, [(12, 2, date(2015, 1, 5))] * 3),  # poor, old history
+            (50000, 100000, [(12, 12, today)]),                # debt above limit
+        ]
+        self.customers = []
+        for i, (salary, limit, loans) in enumerate(histories):
+            customer = Customer.objects.create(
+                first_name="Score", last_name=str(i), phone_number=f"95000000{i:02d}",
+                monthly_salary=salary, approved_limit=limit, current_debt=150000 if limit < 150000 else 0,
+            )
+            for tenure, paid, start in loans:
+                Loan.objects.create(
+                    customer=customer, loan_amount=100000, tenure=tenure, interest_rate=10,
+                    monthly_repayment=8792, emis_paid_on_time=paid, start_date=start, end_date=start,
+                )
+            self.customers.append(customer)
+        call_command('rebuild_credit_profiles', stdout=StringIO())
+
+    def test_scores_match_eligibility_check(self):
+        for workers in (0, 2):
+            CustomerCreditProfile.objects.update(credit_score=None)
+            out = StringIO()
+            call_command('rescore_portfolio', workers=workers, chunk_size=3, stdout=out)
+            self.assertIn('Scored 4 customers', out.getvalue())
+            for customer in self.customers:
+                customer.refresh_from_db()
+                expected = check_credit_eligibility(customer, 1000, 12, 10)["credit_score"]
+                profile = CustomerCreditProfile.objects.get(pk=customer.pk)
+                self.assertEqual(profile.credit_score, expected)
+                self.assertIsNotNone(profile.scored_at)
+
+
+class AccrueEmisTests(TestCase):
+
+    def setUp(self):
+        self.terms = [
+            (120000, 12, 12, date(2024, 1, 31)), (60000, 9.5, 6, date(2024, 3, 15)), (30000, 14, 24, date(2024, 2, 10)),
+        ]
+        self.customer = Customer.objects.create(
+            first_name="Accrue", last_name="User", phone_number="9600000000",
+            monthly_salary=100000, approved_limit=3600000, current_debt=210000,
+        )
+        self.loans = [
+            Loan.objects.create(
+                customer=self.customer, loan_amount=amount, tenure=tenure, interest_rate=rate, monthly_repayment=0,
+                emis_paid_on_time=0, start_date=start, end_date=start + timedelta(days=30 * tenure),
+            )
+            for amount, rate, tenure, start in self.terms
+        ]
+        call_command('rebuild_credit_profiles', stdout=StringIO())
+        call_command('rebuild_portfolio', stdout=StringIO())
+
+    def assertAccruedThrough(self, as_of):
+        # Loan counts and debt follow the amortization schedules of the installments due by as_of
+        debt = 0
+        paid_total = 0
+        for loan, (amount, rate, tenure, start) in zip(self.loans, self.terms):
+            loan.refresh_from_db()
+            schedule = amortization_schedule(amount, rate, tenure, start)
+            paid = int((schedule["due_date"] <= as_of).sum())
+            self.assertEqual(loan.emis_paid_on_time, paid, loan)
+            debt += round(schedule["closing_balance"][paid - 1]) if paid else amount
+            paid_total += paid
+        self.customer.refresh_from_db()
+        self.assertAlmostEqual(self.customer.current_debt, debt, delta=len(self.loans))
+        # The portfolio exposure falls with the same repayments
+        exposure = self.client.get("/portfolio/summary").json()["total_exposure"]
+        self.assertAlmostEqual(exposure, debt, delta=len(self.loans))
+        self.assertEqual(CustomerCreditProfile.objects.get(pk=self.customer.pk).total_emis_paid_on_time, paid_total)
+
+    def test_accrues_incrementally(self):
+        version = self.customer.state_version
+        call_command('accrue_emis', since=date(2024, 1, 31), as_of=date(2024, 4, 30), stdout=StringIO())
+        self.assertAccruedThrough(date(2024, 4, 30))
+        self.assertEqual([loan.emis_paid_on_time for loan in self.loans], [3, 1, 2])
+        self.assertGreater(self.customer.state_version, version)
+
+        # Days already accrued are not accrued again
+        out = StringIO()
+        call_command('accrue_emis', as_of=date(2024, 4, 30), stdout=out)
+        self.assertIn('Accrued 0 EMIs', out.getvalue())
+        self.assertAccruedThrough(date(2024, 4, 30))
+
+        for as_of in (date(2024, 9, 1), date(2025, 1, 31), date(2026, 6, 1)):
+            call_command('accrue_emis', as_of=as_of, chunk_size=2, stdout=StringIO())
+            self.assertAccruedThrough(as_of)
+        self.assertEqual(self.customer.current_debt, 0)
+        self.assertEqual(self.client.get("/portfolio/summary").json()["total_exposure"], 0)
+        self.assertEqual(AccrualCheckpoint.objects.get().accrued_through, date(2026, 6, 1))
+
+    def test_end_date_before_the_last_installment_does_not_settle_early(self):
+        # Loans booked before create_loan set end_date to the last due date end ahead of it
+        loan = self.loans[0]
+        self.assertLess(loan.end_date, date(2025, 1, 31))
+        call_command('accrue_emis', since=date(2024, 1, 31), as_of=loan.end_date, stdout=StringIO())
+        self.assertAccruedThrough(loan.end_date)
+        loan.refresh_from_db()
+        self.assertEqual(loan.emis_paid_on_time, 11)
+
+        # Migration 0013 moves such end dates to the last installment, which is then accrued
+        import_module('creditApprovalApp.migrations.0013_loan_end_date_last_installment').move_end_dates(apps, None)
+        call_command('accrue_emis', as_of=date(2025, 2, 1), stdout=StringIO())
+        self.assertAccruedThrough(date(2025, 2, 1))
+        self.assertEqual(self.loans[0].emis_paid_on_time, 12)
+
+    def test_create_loan_ends_on_the_last_installment(self):
+        customer = Customer.objects.create(
+            first_name="Accrue", last_name="New", phone_number="9600000001",
+            monthly_salary=100000, approved_limit=3600000,
+        )
+        loan, _ = create_loan(customer.pk, 10000, 60, 12)
+        self.assertEqual(loan.end_date, amortization_schedule(10000, 12, 60, loan.start_date)["due_date"][-1])
+
+    def test_resumes_an_interrupted_run(self):
+        apply = accrue_emis.apply_to_customers
+        calls = []
+
+        def fail_second_chunk(*args):
+            calls.append(args)
+            if len(calls) == 2:
+                raise RuntimeError("connection lost")
+            apply(*args)
+
+        with patch.object(accrue_emis, 'apply_to_customers', fail_second_chunk):
+            with self.assertRaises(RuntimeError):
+                call_command('accrue_emis', since=date(2024, 1, 31), as_of=date(2024, 6, 30), chunk_size=1, stdout=StringIO())
+        checkpoint = AccrualCheckpoint.objects.get()
+        self.assertEqual(checkpoint.target_date, date(2024, 6, 30))
+        self.assertIsNotNone(checkpoint.cursor_loan_id)
+
+        call_command('accrue_emis', as_of=date(2024, 6, 30), chunk_size=1, stdout=StringIO())
+        self.assertAccruedThrough(date(2024, 6, 30))
+        self.assertIsNone(AccrualCheckpoint.objects.get().target_date)
+
+    def test_stops_when_another_run_moves_the_checkpoint(self):
+        call_command('accrue_emis', since=date(2024, 1, 31), as_of=date(2024, 3, 1), stdout=StringIO())
+        read_chunks = accrue_emis.read_chunks
+
+        def concurrent_run(*args):
+            AccrualCheckpoint.objects.update(cursor_loan_id=10 ** 9)
+            yield from read_chunks(*args)
+
+        with patch.object(accrue_emis, 'read_chunks', concurrent_run):
+            with self.assertRaises(CommandError):
+                call_command('accrue_emis', as_of=date(2024, 6, 30), stdout=StringIO())
+
+
+class RebuildPortfolioTests(TestCase):
+
+    def rollups(self):
+        buckets = PortfolioBucket.objects.order_by('tenure_band', 'interest_rate_band').values_list(
+            'tenure_band', 'interest_rate_band', 'loan_count', 'loan_amount', 'monthly_repayment', 'outstanding_principal',
+        )
+        days = PortfolioDay.objects.order_by('date').values_list('date', 'approved', 'rejected', 'approved_amount')
+        return list(buckets), list(days)
+
+    def test_rebuild_matches_incremental_rollups(self):
+        customer = Customer.objects.create(
+            first_name="Rollup", last_name="User", phone_number="9800000000",
+            monthly_salary=500000, approved_limit=1000000,
+        )
+        CustomerCreditProfile.objects.create(customer=customer)
+        for amount, tenure, rate in ((100000, 6, 7.5), (200000, 24, 8), (300000, 60, 18), (50000, 61, 10), (9000000, 12, 10)):
+            create_loan(customer.pk, amount, tenure, rate)
+        incremental = self.rollups()
+        self.assertEqual(len(incremental[0]), 4)
+        self.assertEqual(incremental[1][0][1:3], (4, 1))
+
+        PortfolioBucket.objects.update(loan_count=0)
+        out = StringIO()
+        call_command('rebuild_portfolio', stdout=out)
+        self.assertIn('Rebuilt 4 portfolio buckets and 1 days', out.getvalue())
+        self.assertEqual(self.rollups(), incremental)
+
+    def test_rebuild_folds_shards_into_one_row(self):
+        today = date.today()
+        PortfolioDay.objects.create(date=today, shard=3, rejected=2)
+        PortfolioDay.objects.create(date=today, shard=7, approved=5, rejected=1, approved_amount=50000)
+        PortfolioBucket.objects.create(tenure_band="1-12", interest_rate_band="0-8", shard=7, loan_count=5)
+
+        call_command('rebuild_portfolio', stdout=StringIO())
+        # Approvals come back from the (empty) Loan table, rejections are added up
+        self.assertEqual(self.rollups(), ([], [(today, 0, 3, 0)]))
+        self.assertEqual(PortfolioDay.objects.get().shard, 0)
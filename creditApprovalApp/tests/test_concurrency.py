@@ -0,0 +1,117 @@
+from concurrent.futures import ThreadPoolExecutor
+from io import StringIO
+from django.core.management import call_command
+from django.db import connection
+from django.test import TransactionTestCase, skipUnlessDBFeature
+from rest_framework.test import APIClient
+from creditApprovalApp.models import Customer, CustomerCreditProfile, Loan, LoanApplication, PortfolioBucket
+
+
+@skipUnlessDBFeature('has_select_for_update')
+class CreateLoanConcurrencyTests(TransactionTestCase):
+
+    def test_parallel_create_loan_keeps_debt_consistent(self):
+        customer = Customer.objects.create(
+            first_name="Busy",
+            last_name="Customer",
+            phone_number="9100000000",
+            monthly_salary=10000000,
+            approved_limit=1000000000,
+        )
+        CustomerCreditProfile.objects.create(customer=customer)
+        amounts = [10000 + i * 137 for i in range(40)]
+
+        def create(amount):
+            try:
+                response = APIClient().post("/create-loan", {
+                    "customer_id": customer.pk,
+                    "loan_amount": amount,
+                    "tenure": 12,
+                    "interest_rate": 10,
+                }, format='json')
+                return response.status_code
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=16) as pool:
+            codes = list(pool.map(create, amounts))
+
+        self.assertEqual(codes, [201] * len(amounts))
+        customer.refresh_from_db()
+        loans = Loan.objects.filter(customer=customer)
+        self.assertEqual(customer.current_debt, sum(int(l.loan_amount) for l in loans))
+        self.assertEqual(customer.current_debt, sum(amounts))
+        self.assertEqual(CustomerCreditProfile.objects.get(pk=customer.pk).loan_count, len(amounts))
+
+    def test_parallel_create_loan_keeps_portfolio_rollups_consistent(self):
+        customers = []
+        for i in range(40):
+            customer = Customer.objects.create(
+                first_name="Busy",
+                last_name=str(i),
+                phone_number=f"91200000{i:02d}",
+                monthly_salary=10000000,
+                approved_limit=1000000000,
+            )
+            CustomerCreditProfile.objects.create(customer=customer)
+            customers.append(customer.pk)
+
+        def create(customer_id):
+            try:
+                for amount in (10000, 20000):
+                    APIClient().post("/create-loan", {
+                        "customer_id": customer_id,
+                        "loan_amount": amount,
+                        "tenure": 12,
+                        "interest_rate": 10,
+                    }, format='json')
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=40) as pool:
+            list(pool.map(create, customers))
+
+        # Bookings spread over the shard rows, and the summary adds them back up
+        self.assertGreater(PortfolioBucket.objects.count(), 1)
+        body = APIClient().get("/portfolio/summary", {"days": 1}).json()
+        self.assertEqual((body["total_loans"], body["booked_principal"]), (80, 40 * 30000))
+        self.assertEqual(body["approval_trend"][-1]["approved"], 80)
+
+
+@skipUnlessDBFeature('has_select_for_update_skip_locked')
+class LoanQueueConcurrencyTests(TransactionTestCase):
+
+    def test_parallel_workers_keep_per_customer_order(self):
+        customers = []
+        for i in range(6):
+            customer = Customer.objects.create(
+                first_name="Queued",
+                last_name=str(i),
+                phone_number=f"91100000{i:02d}",
+                monthly_salary=10000000,
+                approved_limit=1000000000,
+            )
+            CustomerCreditProfile.objects.create(customer=customer)
+            customers.append(customer)
+        LoanApplication.objects.bulk_create(
+            LoanApplication(customer=customer, loan_amount=10000 + n, tenure=12, interest_rate=10)
+            for n in range(15)
+            for customer in customers
+        )
+
+        def work(_):
+            try:
+                call_command("process_loan_queue", batch_size=2, per_customer=3, stdout=StringIO())
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            list(pool.map(work, range(4)))
+
+        self.assertFalse(LoanApplication.objects.exclude(status=LoanApplication.DONE).exists())
+        for customer in customers:
+            applications = LoanApplication.objects.filter(customer=customer).order_by('id')
+            loan_ids = [a.loan_id for a in applications]
+            # Every application booked exactly once, and in the order it was queued
+            self.assertEqual(loan_ids, sorted(loan_ids))
+            self.assertEqual(Loan.objects.filter(customer=customer).count(), 15)
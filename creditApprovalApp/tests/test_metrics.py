@@ -0,0 +1,56 @@
+import re
+from rest_framework.test import APITestCase
+from creditApprovalApp.cache import customer_cache
+from creditApprovalApp.metrics import registry
+from creditApprovalApp.models import Customer, CustomerCreditProfile
+
+
+class MetricsTests(APITestCase):
+
+    def setUp(self):
+        registry.reset()
+        customer_cache.invalidate_all()
+        self.customer = Customer.objects.create(
+            first_name="Metered",
+            last_name="Customer",
+            phone_number="9300000000",
+            monthly_salary=100000,
+            approved_limit=3600000,
+        )
+        CustomerCreditProfile.objects.create(customer=self.customer)
+
+    def sample(self, text, name, **labels):
+        label_text = ','.join(f'{key}="{value}"' for key, value in labels.items())
+        match = re.search(rf'^{name}{{{re.escape(label_text)}}} (\S+)$', text, re.M)
+        self.assertIsNotNone(match, f"{name}{{{label_text}}} missing from:\n{text}")
+        return float(match.group(1))
+
+    def test_records_latency_queries_and_function_time_per_view(self):
+        data = {"customer_id": self.customer.pk, "loan_amount": 100000, "tenure": 12, "interest_rate": 10}
+        with self.assertNumQueries(1):
+            self.client.post("/check-eligibility", data, format='json')
+        self.client.get("/view-loan/999999")
+
+        response = self.client.get("/metrics")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response["Content-Type"].startswith("text/plain; version=0.0.4"))
+        text = response.content.decode()
+
+        view = dict(view="check-eligibility", method="POST", status="200")
+        self.assertEqual(self.sample(text, "http_request_duration_seconds_count", **view), 1)
+        self.assertEqual(self.sample(text, "http_request_duration_seconds_bucket", **view, le="+Inf"), 1)
+        self.assertEqual(self.sample(text, "http_request_db_queries_total", **view), 1)
+        self.assertGreater(self.sample(text, "http_request_db_seconds_total", **view), 0)
+        for function in ("check_credit_eligibility", "calculate_emi"):
+            self.assertEqual(self.sample(text, "function_duration_seconds_count", function=function, view="check-eligibility"), 1)
+        self.assertEqual(self.sample(
+            text, "http_request_duration_seconds_count", view="view-loan/<int:loan_id>", method="GET", status="404"
+        ), 1)
+        self.assertGreaterEqual(self.sample(text, "customer_cache_lookups_total", result="miss"), 1)
+
+    def test_nothing_recorded_outside_requests(self):
+        from creditApprovalApp.utils import calculate_emi
+        calculate_emi(100000, 10, 12)
+        Customer.objects.count()
+        self.assertEqual(registry.requests, {})
+        self.assertEqual(registry.functions, {})
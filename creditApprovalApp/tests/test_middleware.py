@@ -0,0 +1,45 @@
+from decimal import Decimal
+from io import BytesIO
+import numpy as np
+from django.contrib.auth.models import User
+from django.test import Client, TestCase
+from rest_framework.exceptions import ParseError
+from creditApprovalApp.parsers import ORJSONParser
+from creditApprovalApp.renderers import ORJSONRenderer
+
+
+class AdminMiddlewareTests(TestCase):
+
+    def test_admin_keeps_sessions_csrf_and_auth(self):
+        client = Client(enforce_csrf_checks=True)
+        response = client.get("/admin/login/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["X-Frame-Options"], "DENY")
+        self.assertIn("csrftoken", response.cookies)
+
+        User.objects.create_superuser("admin", "admin@example.com", "password")
+        data = {"username": "admin", "password": "password", "next": "/admin/"}
+        self.assertEqual(client.post("/admin/login/", data).status_code, 403)
+        data["csrfmiddlewaretoken"] = response.cookies["csrftoken"].value
+        response = client.post("/admin/login/", data)
+        self.assertRedirects(response, "/admin/")
+        self.assertEqual(client.get("/admin/").status_code, 200)
+
+    def test_api_skips_admin_middleware(self):
+        response = self.client.get("/view-loans/1")
+        self.assertNotIn("X-Frame-Options", response)
+        self.assertNotIn("Cookie", response.get("Vary", ""))
+        self.assertEqual(response["Content-Type"], "application/json")
+
+
+
+class ORJSONTests(TestCase):
+
+    def test_parser_rejects_malformed_json(self):
+        with self.assertRaises(ParseError):
+            ORJSONParser().parse(BytesIO(b"{not json"))
+        self.assertEqual(ORJSONParser().parse(BytesIO(b'{"a": [1, 2.5]}')), {"a": [1, 2.5]})
+
+    def test_renders_types_outside_orjson(self):
+        data = {"amount": Decimal("10.50"), "emis": np.array([1.5, 2.0]), 3: "three"}
+        self.assertEqual(ORJSONRenderer().render(data), b'{"amount":10.5,"emis":[1.5,2.0],"3":"three"}')
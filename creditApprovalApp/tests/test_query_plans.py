@@ -0,0 +1,73 @@
+from datetime import date, timedelta
+from django.db import connection
+from django.test import TestCase
+from creditApprovalApp.models import Customer, Loan
+from creditApprovalApp.utils import loan_stats_by_customer, year_range
+from creditApprovalApp.views import loan_list_queryset
+
+
+class LoanQueryPlanTests(TestCase):
+    # Hot Loan queries must stay index-driven on a seeded table
+
+    @classmethod
+    def setUpTestData(cls):
+        customers = Customer.objects.bulk_create(
+            Customer(
+                first_name="Plan",
+                last_name=str(i),
+                phone_number=f"95{i:08d}",
+                monthly_salary=50000,
+                approved_limit=1800000,
+            )
+            for i in range(200)
+        )
+        start = date(2015, 1, 1)
+        Loan.objects.bulk_create(
+            Loan(
+                customer=customer,
+                loan_amount=100000,
+                tenure=12,
+                interest_rate=10,
+                monthly_repayment=8791.59,
+                emis_paid_on_time=j % 12,
+                start_date=start + timedelta(days=97 * j),
+                end_date=start + timedelta(days=97 * j + 365),
+            )
+            for customer in customers
+            for j in range(40)
+        )
+        cls.customer = customers[100]
+
+    def plan(self, queryset):
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute(f'ANALYZE {connection.ops.quote_name(Loan._meta.db_table)}')
+                # Keep the planner off sequential scans so the small seeded table still shows index choice
+                cursor.execute('SET LOCAL enable_seqscan = off')
+        return queryset.explain()
+
+    def assertUsesIndex(self, plan, *indexes):
+        # Name the index and require it to be searched on customer_id: with seq scans disabled
+        # Postgres still falls back to the pk index plus a Filter, and SQLite can SCAN the table
+        # through its rowid or pk, so "no sequential scan" alone would not notice a dropped index
+        names = '|'.join(indexes)
+        if connection.vendor == 'postgresql':
+            self.assertRegex(plan, rf'Index (Only )?Scan using ({names}) on [^\n]*\n\s*Index Cond: \([^\n]*customer_id')
+        else:
+            self.assertRegex(plan, rf'SEARCH {Loan._meta.db_table} USING (COVERING )?INDEX ({names}) \(customer_id=')
+
+    def test_loan_stats_uses_index(self):
+        # Either composite index leads with customer_id; the planner picks whichever is cheaper
+        plan = self.plan(loan_stats_by_customer([self.customer.pk], 2019))
+        self.assertUsesIndex(plan, 'loan_customer_start_idx', 'loan_customer_loan_idx')
+
+    def test_current_year_range_uses_index(self):
+        queryset = Loan.objects.filter(year_range(2019), customer_id=self.customer.pk).values('emis_paid_on_time')
+        self.assertUsesIndex(self.plan(queryset), 'loan_customer_start_idx')
+
+    def test_view_loans_page_uses_index(self):
+        plan = self.plan(loan_list_queryset(self.customer.pk, after=0)[:50])
+        self.assertUsesIndex(plan, 'loan_customer_loan_idx')
+        if connection.vendor == 'postgresql':
+            # Every listed column is INCLUDEd, so the page never needs the heap
+            self.assertIn('Index Only Scan using loan_customer_loan_idx', plan)
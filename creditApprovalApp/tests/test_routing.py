@@ -0,0 +1,178 @@
+from datetime import date
+from unittest import skipUnless
+from unittest.mock import patch
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections, router
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from creditApprovalApp.middleware import ReplicaPinMiddleware
+from creditApprovalApp.models import Customer, CustomerCreditProfile, Loan
+from creditApprovalApp.routers import REPLICA, ReplicaRouter, replica_reads
+
+ROUTED_MIDDLEWARE = [
+    'creditApprovalApp.middleware.MetricsMiddleware',
+    'creditApprovalApp.middleware.ReplicaPinMiddleware',
+    'django.middleware.common.CommonMiddleware',
+]
+
+
+class RecordingRouter(ReplicaRouter):
+    # Records what ReplicaRouter decides but reads `default`, where the test's data lives
+    reads = []
+
+    def db_for_read(self, model, **hints):
+        self.reads.append((model, super().db_for_read(model, **hints)))
+        return DEFAULT_DB_ALIAS
+
+
+@patch('creditApprovalApp.routers.replica_is_primary', lambda: False)
+@override_settings(DATABASE_ROUTERS=['creditApprovalApp.routers.ReplicaRouter'])
+class ReplicaRouterTests(SimpleTestCase):
+
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.seen = []
+
+    def request(self, view, cookies=None):
+        # What Django's handler does inside the middleware: process_view, then the view
+        request = self.factory.get('/')
+        request.COOKIES.update(cookies or {})
+
+        def handler(request):
+            middleware.process_view(request, view, (), {})
+            return view(request)
+
+        middleware = ReplicaPinMiddleware(handler)
+        return middleware(request)
+
+    def view(self, write=False):
+        def view(request):
+            self.seen.append(router.db_for_read(Loan))
+            if write:
+                self.seen.append(router.db_for_write(Loan))
+                self.seen.append(router.db_for_read(Loan))
+            return HttpResponse()
+        return view
+
+    def test_only_marked_views_read_from_the_replica(self):
+        self.request(self.view())
+        self.request(replica_reads(self.view()))
+        self.assertEqual(self.seen, [DEFAULT_DB_ALIAS, REPLICA])
+        # Outside a request everything uses the primary
+        self.assertEqual(router.db_for_read(Loan), DEFAULT_DB_ALIAS)
+
+    def test_writes_pin_the_request_and_the_client(self):
+        response = self.request(replica_reads(self.view(write=True)))
+        self.assertEqual(self.seen, [REPLICA, DEFAULT_DB_ALIAS, DEFAULT_DB_ALIAS])
+        cookie = response.cookies[settings.REPLICA_PIN_COOKIE]
+        self.assertEqual(cookie['max-age'], settings.REPLICA_PIN_SECONDS)
+
+        self.seen.clear()
+        response = self.request(replica_reads(self.view()), cookies={settings.REPLICA_PIN_COOKIE: cookie.value})
+        self.assertEqual(self.seen, [DEFAULT_DB_ALIAS])
+        # Reads alone do not extend the pin
+        self.assertNotIn(settings.REPLICA_PIN_COOKIE, response.cookies)
+
+    def test_async_requests(self):
+        @replica_reads
+        async def view(request):
+            self.seen.append(router.db_for_read(Loan))
+            return HttpResponse()
+
+        async def handler(request):
+            middleware.process_view(request, view, (), {})
+            return await view(request)
+
+        middleware = ReplicaPinMiddleware(handler)
+        async_to_sync(middleware)(self.factory.get('/'))
+        self.assertEqual(self.seen, [REPLICA])
+
+    def test_replica_is_never_migrated(self):
+        self.assertFalse(router.allow_migrate(REPLICA, 'creditApprovalApp'))
+        self.assertTrue(router.allow_migrate(DEFAULT_DB_ALIAS, 'creditApprovalApp'))
+
+
+@patch('creditApprovalApp.routers.replica_is_primary', lambda: False)
+@override_settings(
+    DATABASE_ROUTERS=['creditApprovalApp.tests.test_routing.RecordingRouter'],
+    MIDDLEWARE=ROUTED_MIDDLEWARE,
+)
+class ReadYourWritesTests(TestCase):
+
+    def setUp(self):
+        RecordingRouter.reads.clear()
+
+    def loan_reads(self):
+        reads = [alias for model, alias in RecordingRouter.reads if model is Loan]
+        RecordingRouter.reads.clear()
+        return reads
+
+    def test_create_loan_then_view_loans_reads_the_primary(self):
+        customer = Customer.objects.create(
+            first_name="Replica", last_name="User", phone_number="9700000000",
+            monthly_salary=100000, approved_limit=3600000,
+        )
+        CustomerCreditProfile.objects.create(customer=customer)
+        data = {"customer_id": customer.pk, "loan_amount": 100000, "tenure": 12, "interest_rate": 10}
+
+        response = self.client.post("/create-loan", data, content_type="application/json")
+        self.assertEqual(response.status_code, 201)
+        self.assertIn(settings.REPLICA_PIN_COOKIE, response.cookies)
+        RecordingRouter.reads.clear()
+        self.assertEqual(len(self.client.get(f"/view-loans/{customer.pk}").json()), 1)
+        self.assertEqual(self.loan_reads(), [DEFAULT_DB_ALIAS])
+
+        # Once the pin has expired, the read-only views go to the replica
+        self.client.cookies.pop(settings.REPLICA_PIN_COOKIE)
+        self.client.get(f"/view-loans/{customer.pk}")
+        self.client.get(f"/view-loan/{response.json()['loan_id']}")
+        self.assertEqual(self.loan_reads(), [REPLICA, REPLICA])
+        # Customers come from the cache, which always fills from the primary
+        self.assertNotIn(Customer, [model for model, alias in RecordingRouter.reads])
+
+
+@skipUnless(REPLICA in settings.DATABASES, "needs DB_REPLICA_HOST or DB_REPLICA_NAME")
+@patch('creditApprovalApp.routers.replica_is_primary', lambda: False)
+@override_settings(
+    DATABASE_ROUTERS=['creditApprovalApp.routers.ReplicaRouter'],
+    MIDDLEWARE=ROUTED_MIDDLEWARE,
+)
+class ReplicaConnectionTests(TransactionTestCase):
+    # Reads through the real `replica` connection, whose TEST MIRROR is the primary's test
+    # database; rows are committed, so both connections see them
+    databases = {DEFAULT_DB_ALIAS, REPLICA} if REPLICA in settings.DATABASES else {DEFAULT_DB_ALIAS}
+
+    def setUp(self):
+        # No credit profile, so eligibility falls back to the Loan table
+        self.customer = Customer.objects.create(
+            first_name="Replica", last_name="Stream", phone_number="9700000001",
+            monthly_salary=100000, approved_limit=3600000,
+        )
+        for start in (date(2015, 1, 1), date(2016, 1, 1)):
+            Loan.objects.create(
+                customer=self.customer, loan_amount=100000, tenure=12, interest_rate=10, monthly_repayment=8792,
+                emis_paid_on_time=12, start_date=start, end_date=start.replace(year=start.year + 1),
+            )
+
+    def loan_queries(self, queries):
+        return [query['sql'] for query in queries if Loan._meta.db_table in query['sql']]
+
+    def test_streamed_loans_are_read_from_the_replica(self):
+        with CaptureQueriesContext(connections[REPLICA]) as replica, \
+                CaptureQueriesContext(connections[DEFAULT_DB_ALIAS]) as primary:
+            response = self.client.get(f"/view-loans/{self.customer.pk}", {"stream": 1})
+            lines = b"".join(response.streaming_content).splitlines()
+        self.assertEqual(len(lines), 2)
+        self.assertEqual(len(self.loan_queries(replica)), 1)
+        self.assertEqual(self.loan_queries(primary), [])
+
+    def test_memoized_eligibility_stats_are_read_from_the_primary(self):
+        quote = {"customer_id": self.customer.pk, "loan_amount": 100000, "tenure": 12, "interest_rate": 10}
+        with CaptureQueriesContext(connections[REPLICA]) as replica, \
+                CaptureQueriesContext(connections[DEFAULT_DB_ALIAS]) as primary:
+            body = self.client.post("/check-eligibility", quote, content_type="application/json").json()
+        self.assertEqual(body["credit_score"], 40)
+        self.assertEqual(self.loan_queries(replica), [])
+        self.assertEqual(len(self.loan_queries(primary)), 1)
@@ -0,0 +1,178 @@
+from datetime import date, timedelta
+from itertools import product
+import warnings
+import numpy as np
+from django.test import SimpleTestCase, TestCase
+from creditApprovalApp.models import Customer, CustomerCreditProfile, Loan
+from creditApprovalApp.utils import (
+    amortization_schedule, calculate_emi, max_loan_amounts, check_credit_eligibility, credit_score, credit_scores, emis_due, evaluate_eligibility,
+    loan_offers, outstanding_principal, rebuild_credit_profiles,
+)
+from creditApprovalApp.validation import MAX_INTEREST_RATE, MAX_TENURE
+
+
+class CreditEligibilityTests(TestCase):
+
+    def setUp(self):
+        self.customer = Customer.objects.create(
+            first_name="Test",
+            last_name="User",
+            phone_number="9000000001",
+            monthly_salary=100000,
+            approved_limit=3600000,
+            current_debt=0,
+        )
+
+    def add_loan(self, start_date, emis_paid_on_time):
+        return Loan.objects.create(
+            customer=self.customer,
+            loan_amount=100000,
+            tenure=12,
+            interest_rate=10,
+            monthly_repayment=8791.59,
+            emis_paid_on_time=emis_paid_on_time,
+            start_date=start_date,
+            end_date=start_date,
+        )
+
+    def fetch_customer(self):
+        # Same lookup the views use
+        return Customer.objects.select_related('credit_profile').get(pk=self.customer.pk)
+
+    def test_fresh_customer_scores_in_one_query(self):
+        customer = self.fetch_customer()
+        with self.assertNumQueries(1):
+            result = check_credit_eligibility(customer, 100000, 12, 10)
+        self.assertEqual(result["credit_score"], 20)
+        self.assertEqual(result["corrected_interest_rate"], 16)
+
+    def test_customer_with_history_scores_in_one_query(self):
+        self.add_loan(date.today(), 10)
+        self.add_loan(date(2015, 1, 1), 12)
+        customer = self.fetch_customer()
+        with self.assertNumQueries(1):
+            result = check_credit_eligibility(customer, 100000, 12, 10)
+        self.assertTrue(result["approval"])
+        self.assertEqual(result["credit_score"], 50)
+        self.assertEqual(result["corrected_interest_rate"], 12)
+
+    def test_poor_history_is_rejected(self):
+        for _ in range(3):
+            self.add_loan(date(2015, 1, 1), 0)
+        result = check_credit_eligibility(self.customer, 100000, 12, 10)
+        self.assertFalse(result["approval"])
+        self.assertEqual(result["credit_score"], 10)
+
+    def test_over_limit_customer_skips_loan_query(self):
+        self.customer.current_debt = self.customer.approved_limit + 1
+        with self.assertNumQueries(0):
+            result = check_credit_eligibility(self.customer, 100000, 12, 10)
+        self.assertEqual(result["message"], "Current debt exceeds approved limit")
+
+    def test_profile_scores_without_queries(self):
+        self.add_loan(date.today(), 10)
+        self.add_loan(date(2015, 1, 1), 12)
+        rebuild_credit_profiles()
+        customer = self.fetch_customer()
+        with self.assertNumQueries(0):
+            result = check_credit_eligibility(customer, 100000, 12, 10)
+        self.assertEqual(result["credit_score"], 50)
+
+    def test_rebuild_reports_drift(self):
+        self.add_loan(date(2015, 1, 1), 12)
+        report = rebuild_credit_profiles()
+        self.assertEqual(report["missing"], [self.customer.pk])
+
+        CustomerCreditProfile.objects.filter(pk=self.customer.pk).update(loan_count=5)
+        report = rebuild_credit_profiles(dry_run=True)
+        self.assertEqual(report["drifted"], [self.customer.pk])
+        self.assertEqual(CustomerCreditProfile.objects.get(pk=self.customer.pk).loan_count, 5)
+
+        rebuild_credit_profiles()
+        profile = CustomerCreditProfile.objects.get(pk=self.customer.pk)
+        self.assertEqual((profile.loan_count, profile.total_emis_paid_on_time), (1, 12))
+        self.assertEqual(rebuild_credit_profiles(), {"checked": 1, "missing": [], "drifted": []})
+
+
+class CreditScoresTests(SimpleTestCase):
+
+    def test_vectorized_scores_match_credit_score(self):
+        cases = list(product(range(5), range(0, 13, 3), range(2), (0, 200), (100,)))
+        total_loans, total_emis, current_year_loans, debt, limit = map(np.array, zip(*cases))
+        scores = credit_scores(total_loans, total_emis, current_year_loans, debt, limit)
+        for (loans, emis, current, current_debt, approved_limit), score in zip(cases, scores.tolist()):
+            customer = Customer(current_debt=current_debt, approved_limit=approved_limit)
+            stats = {"total_loans": loans, "total_emis": emis, "current_year_loans": current}
+            expected = credit_score(customer, stats) if current_debt <= approved_limit else 0
+            self.assertEqual(score, expected, stats)
+
+
+class LoanOffersTests(SimpleTestCase):
+
+    def test_offers_are_the_largest_approvable_amounts(self):
+        tenures, rates = [1, 6, 12, 37, 60, 360], [0.5, 8, 10.25, 12, 16, 19.99]
+        for salary, history in product((1, 9999, 45000, 1234567), (0, 2)):
+            customer = Customer(monthly_salary=salary, approved_limit=10 ** 9, current_debt=0)
+            stats = {"total_loans": history, "total_emis": 0, "current_year_loans": 0}
+            offers = loan_offers(customer, stats, rates, tenures)
+            self.assertTrue(offers["approval"])
+            for i, j in product(range(len(rates)), range(len(tenures))):
+                amount, rate, tenure = offers["max_loan_amount"][i][j], rates[i], tenures[j]
+                approved = evaluate_eligibility(customer, stats, amount, tenure, rate)
+                self.assertTrue(approved["approval"], (salary, rate, tenure, amount))
+                self.assertEqual(approved["monthly_installment"], offers["monthly_installment"][i][j])
+                rejected = evaluate_eligibility(customer, stats, amount + 1, tenure, rate)
+                self.assertEqual(rejected["message"], "EMI exceeds 50% of salary", (salary, rate, tenure, amount))
+
+    def test_grid_stays_finite_up_to_the_request_caps(self):
+        grid = max_loan_amounts(30000, [0.01, MAX_INTEREST_RATE], [1, MAX_TENURE])
+        self.assertTrue((grid > 0).all())
+        for rates, tenures in (([12, 16, 1e6], [12]), ([12], [100000]), ([0, 12], [12]), ([12], [0, 12])):
+            with self.subTest(rates=rates, tenures=tenures), warnings.catch_warnings():
+                # Rejected before computing, so no divide-by-zero or overflow warnings either
+                warnings.simplefilter('error')
+                with self.assertRaises(ValueError):
+                    max_loan_amounts(30000, rates, tenures)
+
+    def test_rejections_match_evaluate_eligibility(self):
+        stats = {"total_loans": 5, "total_emis": 0, "current_year_loans": 0}
+        for customer in (Customer(monthly_salary=50000, approved_limit=100, current_debt=200),
+                         Customer(monthly_salary=50000, approved_limit=100, current_debt=0)):
+            offers = loan_offers(customer, stats, [10, 12], [12])
+            expected = evaluate_eligibility(customer, stats, 1000, 12, 10)
+            self.assertEqual(offers, {key: expected[key] for key in ("approval", "credit_score", "message")})
+
+
+class AmortizationScheduleTests(SimpleTestCase):
+
+    def test_matches_month_by_month_amortization(self):
+        for amount, rate, tenure in ((100000, 10, 12), (2500000, 8.5, 360), (5000, 0, 7), (999, 19.99, 1)):
+            schedule = amortization_schedule(amount, rate, tenure, date(2024, 1, 15))
+            emi = calculate_emi(amount, rate, tenure) if rate else round(amount / tenure, 2)
+            balance = amount
+            for k in range(tenure):
+                interest = balance * rate / 12 / 100
+                principal = balance if k == tenure - 1 else emi - interest
+                self.assertAlmostEqual(schedule["opening_balance"][k], balance, delta=0.01)
+                self.assertAlmostEqual(schedule["interest"][k], interest, delta=0.01)
+                self.assertAlmostEqual(schedule["principal"][k], principal, delta=0.01)
+                balance -= principal
+            self.assertEqual(schedule["closing_balance"][-1], 0)
+            self.assertAlmostEqual(schedule["principal"].sum(), amount, delta=0.01 * tenure)
+
+    def test_due_dates_clamp_to_month_end(self):
+        schedule = amortization_schedule(1000, 10, 4, date(2023, 11, 30))
+        self.assertEqual([str(d) for d in schedule["due_date"]], ["2023-12-30", "2024-01-30", "2024-02-29", "2024-03-30"])
+
+    def test_accrual_helpers_follow_the_schedule(self):
+        starts = [date(2023, 1, 31), date(2023, 3, 15), date(2024, 2, 29)]
+        for amount, rate, tenure in ((100000, 10, 12), (5000, 0, 7), (2500000, 8.5, 36)):
+            for start in starts:
+                schedule = amortization_schedule(amount, rate, tenure, start)
+                as_of = [start + timedelta(days=d) for d in range(0, 31 * tenure + 40, 13)]
+                paid = [emis_due([start], [tenure], day)[0] for day in as_of]
+                self.assertEqual(paid, [int((schedule["due_date"] <= day).sum()) for day in as_of])
+                left = outstanding_principal([amount] * (tenure + 1), [rate] * (tenure + 1), [tenure] * (tenure + 1), range(tenure + 1))
+                self.assertEqual(left[0], amount)
+                self.assertEqual(left[-1], 0)
+                np.testing.assert_allclose(left[1:-1], schedule["closing_balance"][:-1], atol=1)
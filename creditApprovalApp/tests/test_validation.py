@@ -0,0 +1,62 @@
+from django.test import SimpleTestCase
+from rest_framework.test import APITestCase
+from creditApprovalApp.validation import LOAN_REQUEST, REGISTER_REQUEST
+
+
+class SchemaTests(SimpleTestCase):
+
+    def test_converts_in_field_order(self):
+        values, invalid = LOAN_REQUEST.validate({"interest_rate": "10.5", "tenure": "12", "loan_amount": 5000, "customer_id": 3})
+        self.assertIsNone(invalid)
+        self.assertEqual(values, (3, 5000.0, 12, 10.5))
+
+    def test_collects_every_error_with_legacy_summary(self):
+        values, invalid = LOAN_REQUEST.validate({"customer_id": "x", "loan_amount": -1, "tenure": True})
+        self.assertIsNone(values)
+        self.assertEqual([(e["field"], e["code"]) for e in invalid.errors], [
+            ("customer_id", "invalid"),
+            ("loan_amount", "range"),
+            ("tenure", "invalid"),
+            ("interest_rate", "required"),
+        ])
+        self.assertEqual(invalid.message, "Missing required fields: interest_rate")
+
+        _, invalid = LOAN_REQUEST.validate({"customer_id": 1, "loan_amount": 100, "tenure": 0, "interest_rate": -1})
+        self.assertEqual(invalid.message, "Tenure must be positive")
+
+        # Upper bounds report their own message rather than the field's lower-bound one
+        _, invalid = LOAN_REQUEST.validate({"customer_id": 1, "loan_amount": 100, "tenure": 601, "interest_rate": 101})
+        self.assertEqual([e["message"] for e in invalid.errors], ["Tenure must be at most 600", "Interest rate must be at most 100"])
+
+    def test_rejects_non_finite_numbers_and_non_objects(self):
+        _, invalid = LOAN_REQUEST.validate({"customer_id": 1, "loan_amount": "nan", "tenure": 12, "interest_rate": 10})
+        self.assertEqual(invalid.message, "Invalid data types: loan_amount must be a number")
+        _, invalid = LOAN_REQUEST.validate([1, 2])
+        self.assertEqual(invalid.message, "Expected a JSON object")
+
+    def test_register_lengths_follow_columns(self):
+        data = {"first_name": "A", "last_name": "B", "age": 30, "monthly_income": 50000, "phone_number": 9876543210}
+        values, invalid = REGISTER_REQUEST.validate(data)
+        self.assertIsNone(invalid)
+        self.assertEqual(values[-1], "9876543210")
+        _, invalid = REGISTER_REQUEST.validate({**data, "phone_number": "1" * 16})
+        self.assertEqual(invalid.errors[0]["field"], "phone_number")
+        # 36 times the income is the approved limit, which has to fit an integer column
+        _, invalid = REGISTER_REQUEST.validate({**data, "monthly_income": 10 ** 9})
+        self.assertEqual(invalid.message, "Monthly income must be at most 50000000")
+
+
+class ValidationResponseTests(APITestCase):
+
+    def test_endpoints_return_structured_errors(self):
+        for url in ("/check-eligibility", "/create-loan", "/async/check-eligibility"):
+            response = self.client.post(url, {"customer_id": 1, "loan_amount": 0, "tenure": 12}, format='json')
+            self.assertEqual(response.status_code, 400, url)
+            body = response.json()
+            self.assertEqual(body["error"], "Missing required fields: interest_rate")
+            self.assertEqual([e["field"] for e in body["errors"]], ["loan_amount", "interest_rate"])
+
+    def test_register_rejects_invalid_payload(self):
+        response = self.client.post("/register", {"first_name": "Test", "age": 30}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["details"], "Missing required fields: last_name, monthly_income, phone_number")
@@ -1,7 +1,17 @@
+import json
+from datetime import date
+from io import BytesIO, StringIO
+import numpy as np
+from unittest.mock import patch
 from rest_framework.test import APITestCase
 from rest_framework import status
 from django.urls import reverse
-from creditApprovalApp.models import Customer
+from django.conf import settings
+from django.core.management import call_command
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import IntegrityError
+from creditApprovalApp.management.commands import process_loan_queue
+from creditApprovalApp.models import Customer, CustomerCreditProfile, Loan, LoanApplication
 
 class CustomerTests(APITestCase):
 
@@ -16,5 +26,365 @@ class CustomerTests(APITestCase):
         }
 
         response = self.client.post(url, data, format='json')
-        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
         self.assertTrue(Customer.objects.filter(phone_number="1234567000").exists())
+
+    def test_create_loan_updates_credit_profile(self):
+        customer = Customer.objects.create(
+            first_name="Test",
+            last_name="User",
+            phone_number="1234567001",
+            monthly_salary=100000,
+            approved_limit=3600000,
+        )
+        CustomerCreditProfile.objects.create(customer=customer)
+        data = {"customer_id": customer.pk, "loan_amount": 100000, "tenure": 12, "interest_rate": 10}
+
+        response = self.client.post("/create-loan", data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        profile = CustomerCreditProfile.objects.get(pk=customer.pk)
+        self.assertEqual(profile.loan_count, 1)
+        self.assertIsNotNone(profile.latest_start_date)
+
+    def test_check_eligibility_batch_matches_single_endpoint(self):
+        customer = Customer.objects.create(
+            first_name="Test",
+            last_name="User",
+            phone_number="1234567002",
+            monthly_salary=50000,
+            approved_limit=1800000,
+        )
+        items = [
+            {"customer_id": customer.pk, "loan_amount": 100000, "tenure": 12, "interest_rate": 10},
+            {"customer_id": customer.pk, "loan_amount": 5000000, "tenure": 12, "interest_rate": 10},
+            {"customer_id": customer.pk + 1000, "loan_amount": 100000, "tenure": 12, "interest_rate": 10},
+            {"customer_id": customer.pk, "loan_amount": -1, "tenure": 12, "interest_rate": 10},
+        ]
+
+        with self.assertNumQueries(2):
+            response = self.client.post("/check-eligibility/batch", items, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        results = response.json()["results"]
+        self.assertEqual([r["status"] for r in results], [200, 400, 404, 400])
+        for item, result in zip(items[:2], results):
+            single = self.client.post("/check-eligibility", item, format='json')
+            self.assertEqual(single.status_code, result.pop("status"))
+            self.assertEqual(single.json(), result)
+
+    def test_create_loan_replays_idempotent_retries(self):
+        customer = Customer.objects.create(
+            first_name="Test",
+            last_name="User",
+            phone_number="1234567003",
+            monthly_salary=100000,
+            approved_limit=3600000,
+        )
+        data = {"customer_id": customer.pk, "loan_amount": 100000, "tenure": 12, "interest_rate": 10}
+
+        first = self.client.post("/create-loan", data, format='json', HTTP_IDEMPOTENCY_KEY="retry-1")
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+        with patch("creditApprovalApp.views.book_loan") as book_loan:
+            retry = self.client.post("/create-loan", data, format='json', HTTP_IDEMPOTENCY_KEY="retry-1")
+            book_loan.assert_not_called()
+        self.assertEqual(retry.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(retry.json(), first.json())
+        self.assertEqual(retry["Idempotent-Replayed"], "true")
+        self.assertEqual(Loan.objects.filter(customer=customer).count(), 1)
+
+        mismatch = self.client.post("/create-loan", {**data, "loan_amount": 5000}, format='json', HTTP_IDEMPOTENCY_KEY="retry-1")
+        self.assertEqual(mismatch.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY)
+
+    def test_view_loans_pages_and_streams(self):
+        customer = Customer.objects.create(
+            first_name="Test",
+            last_name="User",
+            phone_number="1234567004",
+            monthly_salary=100000,
+            approved_limit=3600000,
+        )
+        for tenure in range(1, 6):
+            Loan.objects.create(
+                customer=customer, loan_amount=1000, tenure=tenure, interest_rate=10,
+                monthly_repayment=100, emis_paid_on_time=1,
+                start_date="2024-01-01", end_date="2025-01-01",
+            )
+        url = f"/view-loans/{customer.pk}"
+        full = self.client.get(url).json()
+        self.assertEqual(len(full), 5)
+
+        first = self.client.get(url, {"limit": 3}).json()
+        second = self.client.get(url, {"limit": 3, "after": first["next_cursor"]}).json()
+        self.assertIsNone(second["next_cursor"])
+        self.assertEqual(first["results"] + second["results"], full)
+
+        streamed = self.client.get(url, {"stream": 1})
+        self.assertEqual(streamed["Content-Type"], "application/x-ndjson")
+        lines = b"".join(streamed.streaming_content).decode().splitlines()
+        self.assertEqual([json.loads(line) for line in lines], full)
+
+    def test_pool_stats_reports_default_alias(self):
+        response = self.client.get("/pool-stats")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn("pooled", response.json()["default"])
+
+    def test_query_count_header(self):
+        customer = Customer.objects.create(
+            first_name="Test",
+            last_name="User",
+            phone_number="1234567005",
+            monthly_salary=100000,
+            approved_limit=3600000,
+        )
+        middleware = ['creditApprovalApp.middleware.QueryCountMiddleware', *settings.MIDDLEWARE]
+        with self.settings(MIDDLEWARE=middleware), self.assertNumQueries(2):
+            response = self.client.get(f"/view-loans/{customer.pk}")
+        self.assertEqual(response["X-DB-Queries"], "2")
+
+    def test_register_bulk_reports_per_row_results(self):
+        Customer.objects.create(
+            first_name="Existing", last_name="User", phone_number="1234567100",
+            monthly_salary=50000, approved_limit=1800000,
+        )
+        row = {"first_name": "Bulk", "last_name": "User", "age": 30, "monthly_income": 56789}
+        items = [
+            {**row, "phone_number": "1234567101"},
+            {**row, "phone_number": "1234567100"},
+            {**row, "phone_number": "1234567101"},
+            {**row, "monthly_income": "lots", "phone_number": "1234567102"},
+            {**row, "monthly_income": 138889, "phone_number": "1234567103"},
+        ]
+
+        response = self.client.post("/register/bulk", items, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        body = response.json()
+        self.assertEqual((body["created"], body["failed"]), (2, 3))
+        self.assertEqual([r["status"] for r in body["results"]], [201, 409, 409, 400, 201])
+        first, last = body["results"][0], body["results"][4]
+        # Same limits as /register: 36% of income rounded to the nearest lakh
+        self.assertEqual(first["approved_limit"], round(36 * 56789 / 100000) * 100000)
+        self.assertEqual(last["approved_limit"], round(36 * 138889 / 100000) * 100000)
+        self.assertTrue(CustomerCreditProfile.objects.filter(pk=last["customer_id"]).exists())
+
+    def test_register_bulk_repeats_name_the_request_item(self):
+        row = {"first_name": "Bulk", "last_name": "User", "age": 30, "monthly_income": 56789}
+        items = [
+            {**row, "age": "old", "phone_number": "1234567110"},
+            {**row, "phone_number": "1234567111"},
+            {**row, "phone_number": "1234567111"},
+            {**row, "monthly_income": 10 ** 12, "phone_number": "1234567112"},
+        ]
+
+        body = self.client.post("/register/bulk", items, format='json').json()
+        self.assertEqual([r["status"] for r in body["results"]], [400, 201, 409, 400])
+        self.assertEqual(body["results"][2]["error"], "phone_number repeats item 1 of this batch")
+
+    def test_register_bulk_reports_recurring_conflicts_per_row(self):
+        row = {"first_name": "Bulk", "last_name": "Race", "age": 30, "monthly_income": 56789}
+        items = [{**row, "phone_number": f"123456714{i}"} for i in range(3)]
+        save = Customer.save
+
+        def conflicting_save(customer, *args, **kwargs):
+            # The second item keeps colliding with a concurrent registration
+            if customer.phone_number == items[1]["phone_number"]:
+                raise IntegrityError("duplicate key value violates unique constraint")
+            return save(customer, *args, **kwargs)
+
+        # Every bulk insert conflicts, so the chunk is retried and then inserted row by row
+        with patch.object(Customer.objects, 'bulk_create', side_effect=IntegrityError("duplicate key")) as bulk_create, \
+                patch.object(Customer, 'save', autospec=True, side_effect=conflicting_save):
+            response = self.client.post("/register/bulk", items, format='json')
+        self.assertEqual(bulk_create.call_count, 2)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        body = response.json()
+        self.assertEqual((body["created"], body["failed"]), (2, 1))
+        self.assertEqual([r["status"] for r in body["results"]], [201, 409, 201])
+        self.assertIn("retry this item", body["results"][1]["error"])
+        created = Customer.objects.filter(phone_number__in=[item["phone_number"] for item in items])
+        self.assertEqual(sorted(created.values_list('phone_number', flat=True)), [items[0]["phone_number"], items[2]["phone_number"]])
+        self.assertTrue(CustomerCreditProfile.objects.filter(pk=body["results"][2]["customer_id"]).exists())
+
+    def test_register_bulk_accepts_csv(self):
+        csv_text = (
+            "first_name,last_name,age,monthly_income,phone_number\n"
+            "Csv,One,25,40000,1234567200\n"
+            "Csv,Two,41,90000,1234567201\n"
+        )
+        response = self.client.post("/register/bulk", csv_text, content_type="text/csv")
+        self.assertEqual(response.json()["created"], 2)
+
+        upload = SimpleUploadedFile("customers.csv", csv_text.replace("12345672", "12345673").encode())
+        response = self.client.post("/register/bulk", {"file": upload}, format='multipart')
+        self.assertEqual(response.json()["created"], 2)
+        self.assertEqual(Customer.objects.filter(first_name="Csv").count(), 4)
+
+    def test_async_create_loan_is_queued_and_booked_in_order(self):
+        customer = Customer.objects.create(
+            first_name="Queued",
+            last_name="User",
+            phone_number="1234567300",
+            monthly_salary=1000000,
+            approved_limit=100000,
+        )
+        CustomerCreditProfile.objects.create(customer=customer)
+        jobs = []
+        for amount in (50000, 60000, 10000):
+            data = {"customer_id": customer.pk, "loan_amount": amount, "tenure": 12, "interest_rate": 10}
+            response = self.client.post("/create-loan", data, format='json', HTTP_PREFER="respond-async")
+            self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+            self.assertEqual(response["Location"], response.json()["status_url"])
+            jobs.append(response.json()["status_url"])
+        self.assertFalse(Loan.objects.filter(customer=customer).exists())
+        self.assertEqual(self.client.get(jobs[0]).json()["status"], "pending")
+
+        call_command("process_loan_queue", stdout=StringIO())
+
+        results = [self.client.get(url).json() for url in jobs]
+        self.assertEqual([r["status"] for r in results], ["done"] * 3)
+        # The third application sees the debt booked by the first two
+        self.assertEqual([r["response_status"] for r in results], [201, 201, 400])
+        self.assertEqual(results[2]["response"]["message"], "Current debt exceeds approved limit")
+        customer.refresh_from_db()
+        self.assertEqual(customer.current_debt, 110000)
+
+    def test_queue_worker_waits_for_customers_held_by_another_worker(self):
+        customer = Customer.objects.create(
+            first_name="Queued",
+            last_name="Held",
+            phone_number="1234567302",
+            monthly_salary=100000,
+            approved_limit=3600000,
+        )
+        CustomerCreditProfile.objects.create(customer=customer)
+        data = {"customer_id": customer.pk, "loan_amount": 50000, "tenure": 12, "interest_rate": 10}
+        self.client.post("/create-loan", data, format='json', HTTP_PREFER="respond-async")
+
+        process = process_loan_queue.process_customer
+        calls = []
+
+        def held_once(*args):
+            # Locked by another worker on the first pass, free on the second
+            calls.append(args)
+            return None if len(calls) == 1 else process(*args)
+
+        with patch.object(process_loan_queue, 'process_customer', side_effect=held_once), \
+                patch.object(process_loan_queue.time, 'sleep') as sleep:
+            call_command("process_loan_queue", stdout=StringIO())
+        sleep.assert_called_once()
+        self.assertEqual(len(calls), 2)
+        self.assertFalse(LoanApplication.objects.filter(status=LoanApplication.PENDING).exists())
+
+    def test_async_create_loan_replays_keep_the_accepted_headers(self):
+        customer = Customer.objects.create(
+            first_name="Queued",
+            last_name="Retry",
+            phone_number="1234567301",
+            monthly_salary=100000,
+            approved_limit=3600000,
+        )
+        data = {"customer_id": customer.pk, "loan_amount": 50000, "tenure": 12, "interest_rate": 10}
+        first = self.client.post("/create-loan", data, format='json', HTTP_PREFER="respond-async", HTTP_IDEMPOTENCY_KEY="queued-1")
+        retry = self.client.post("/create-loan", data, format='json', HTTP_PREFER="respond-async", HTTP_IDEMPOTENCY_KEY="queued-1")
+
+        self.assertEqual(retry.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(retry["Idempotent-Replayed"], "true")
+        self.assertEqual(retry.json(), first.json())
+        self.assertEqual((retry["Location"], retry["Preference-Applied"]), (first["Location"], "respond-async"))
+        self.assertEqual(LoanApplication.objects.filter(customer=customer).count(), 1)
+
+    def test_async_create_loan_rejects_unknown_customer_up_front(self):
+        data = {"customer_id": 999999, "loan_amount": 1000, "tenure": 12, "interest_rate": 10}
+        response = self.client.post("/create-loan", data, format='json', HTTP_PREFER="respond-async")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(self.client.get("/loan-applications/999999").status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_loan_offers_returns_the_grid(self):
+        customer = Customer.objects.create(
+            first_name="Offer",
+            last_name="User",
+            phone_number="1234567400",
+            monthly_salary=60000,
+            approved_limit=2200000,
+        )
+        CustomerCreditProfile.objects.create(customer=customer)
+
+        response = self.client.get(f"/loan-offers/{customer.pk}?tenures=12,24&interest_rates=10,14")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        body = response.json()
+        self.assertEqual(body["max_monthly_installment"], 30000)
+        self.assertEqual((body["tenures"], body["interest_rates"]), ([12, 24], [10, 14]))
+        self.assertEqual([len(row) for row in body["max_loan_amount"]], [2, 2])
+        for i, rate in enumerate((10, 14)):
+            for j, tenure in enumerate((12, 24)):
+                data = {"customer_id": customer.pk, "loan_amount": body["max_loan_amount"][i][j],
+                        "tenure": tenure, "interest_rate": rate}
+                self.assertEqual(self.client.post("/check-eligibility", data, format='json').status_code, 200)
+                data["loan_amount"] += 1
+                response = self.client.post("/check-eligibility", data, format='json')
+                self.assertEqual(response.json()["message"], "EMI exceeds 50% of salary")
+
+        self.assertEqual(len(self.client.get(f"/loan-offers/{customer.pk}").json()["tenures"]), 7)
+        self.assertEqual(self.client.get(f"/loan-offers/{customer.pk}?tenures=0").status_code, 400)
+        self.assertEqual(self.client.get(f"/loan-offers/{customer.pk}?interest_rates=x").status_code, 400)
+        for params in ("tenures=100000", "interest_rates=1e6", "interest_rates=nan", "interest_rates=inf"):
+            self.assertEqual(self.client.get(f"/loan-offers/{customer.pk}?{params}").status_code, 400, params)
+        self.assertEqual(self.client.get("/loan-offers/999999").status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_view_loan_schedule_outputs(self):
+        customer = Customer.objects.create(
+            first_name="Schedule",
+            last_name="User",
+            phone_number="1234567500",
+            monthly_salary=60000,
+            approved_limit=2200000,
+        )
+        loan = Loan.objects.create(
+            customer=customer, loan_amount=120000, tenure=24, interest_rate=12, monthly_repayment=5648.82,
+            emis_paid_on_time=0, start_date=date(2024, 1, 31), end_date=date(2026, 1, 31),
+        )
+        url = f"/view-loan/{loan.loan_id}/schedule"
+
+        rows = self.client.get(url).json()["schedule"]
+        self.assertEqual(len(rows), 24)
+        self.assertEqual(rows[0], {"month": 1, "due_date": "2024-02-29", "opening_balance": 120000.0,
+                                   "interest": 1200.0, "principal": 4448.82, "closing_balance": 115551.18})
+        self.assertEqual(rows[-1]["closing_balance"], 0)
+
+        columns = self.client.get(url, {"output": "columnar"}).json()["schedule"]
+        self.assertEqual([dict(zip(columns, row)) for row in zip(*columns.values())], rows)
+
+        response = self.client.get(url, {"output": "npy"})
+        self.assertEqual(response["Content-Type"], "application/octet-stream")
+        table = np.load(BytesIO(response.content), allow_pickle=False)
+        self.assertEqual(table["principal"].tolist(), [row["principal"] for row in rows])
+        self.assertEqual(str(table["due_date"][-1]), rows[-1]["due_date"])
+
+        self.assertEqual(self.client.get(url, {"output": "xml"}).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get("/view-loan/999999/schedule").status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_portfolio_summary_follows_create_loan(self):
+        customer = Customer.objects.create(
+            first_name="Portfolio",
+            last_name="User",
+            phone_number="1234567600",
+            monthly_salary=200000,
+            approved_limit=300000,
+        )
+        CustomerCreditProfile.objects.create(customer=customer)
+        for amount, tenure, rate in ((100000, 12, 17), (150000, 36, 19), (5000000, 12, 17)):
+            data = {"customer_id": customer.pk, "loan_amount": amount, "tenure": tenure, "interest_rate": rate}
+            self.client.post("/create-loan", data, format='json')
+
+        with self.assertNumQueries(2):
+            body = self.client.get("/portfolio/summary", {"days": 7}).json()
+        self.assertEqual((body["total_loans"], body["booked_principal"], body["total_exposure"]), (2, 250000, 250000))
+        self.assertEqual(
+            [(b["tenure_band"], b["interest_rate_band"], b["loan_count"]) for b in body["buckets"]],
+            [("1-12", "16-18", 1), ("25-36", "18+", 1)],
+        )
+        self.assertEqual([band["loan_count"] for band in body["by_tenure"]], [1, 0, 1, 0, 0])
+        self.assertEqual(len(body["approval_trend"]), 7)
+        today = body["approval_trend"][-1]
+        self.assertEqual((today["approved"], today["rejected"]), (2, 1))
+        self.assertAlmostEqual(today["approval_rate"], 2 / 3)
+        self.assertIsNone(body["approval_trend"][0]["approval_rate"])
+        self.assertEqual(self.client.get("/portfolio/summary", {"days": 0}).status_code, status.HTTP_400_BAD_REQUEST)
@@ -1,11 +1,24 @@
 from django.urls import path
 from .views import *
+from . import async_views
 
 urlpatterns = [
     path('register', RegisterCustomer.as_view()),
     path('register', RegisterCustomer.as_view(), name='register'),
+    path('register/bulk', RegisterCustomersBulk.as_view()),
     path('check-eligibility', CheckEligibility.as_view()),
+    path('check-eligibility/batch', CheckEligibilityBatch.as_view()),
     path('create-loan', CreateLoan.as_view()),
+    path('loan-applications/<int:job_id>', ViewLoanApplication.as_view()),
     path('view-loan/<int:loan_id>', ViewLoan.as_view()),
+    path('view-loan/<int:loan_id>/schedule', ViewLoanSchedule.as_view()),
     path('view-loans/<int:customer_id>', ViewLoans.as_view()),
+    path('loan-offers/<int:customer_id>', LoanOffers.as_view()),
+    path('portfolio/summary', PortfolioSummary.as_view()),
+    path('pool-stats', PoolStats.as_view()),
+    path('metrics', Metrics.as_view()),
+    # Async variants of the read paths, for ASGI servers (see creditApproval/asgi.py)
+    path('async/check-eligibility', async_views.check_eligibility),
+    path('async/view-loan/<int:loan_id>', async_views.view_loan),
+    path('async/view-loans/<int:customer_id>', async_views.view_loans),
 ]
@@ -1,58 +1,270 @@
-from .models import Loan
-from datetime import date
+from django.db import DEFAULT_DB_ALIAS, IntegrityError, connection, transaction
+from rest_framework import status
+from django.db.models import Case, Count, F, Max, Q, Sum, Value, When
+from django.db.models.functions import Coalesce, Greatest
+from .cache import customer_cache, eligibility_memo
+from .metrics import timed
+from .models import Customer, CustomerCreditProfile, Loan, PortfolioBucket, PortfolioDay
+from .validation import MAX_INTEREST_RATE, MAX_TENURE
+from datetime import date, timedelta
+from itertools import islice
+import numpy as np
 
+# Loan stats for a customer whose history does not need to be read
+EMPTY_LOAN_STATS = {"total_loans": 0, "total_emis": 0, "current_year_loans": 0}
+
+# /portfolio/summary bands as (label, upper bound): tenures up to and including the bound,
+# interest rates below it; the last band takes the rest
+TENURE_BANDS = (("1-12", 12), ("13-24", 24), ("25-36", 36), ("37-60", 60), ("61+", None))
+INTEREST_RATE_BANDS = (("0-8", 8), ("8-10", 10), ("10-12", 12), ("12-14", 14), ("14-16", 16), ("16-18", 18), ("18+", None))
+
+# Rollup rows per band and per day; create_loan bumps shard customer_id % PORTFOLIO_SHARDS, so
+# bookings for different customers rarely queue on the same row lock
+PORTFOLIO_SHARDS = 16
+
+@timed('calculate_emi')
 def calculate_emi(P, R, N):
     #Calculate EMI using the standard formula
     R = R / 12 / 100
     EMI = P * R * (1 + R) ** N / ((1 + R) ** N - 1)
     return round(EMI, 2)
 
-def check_credit_eligibility(customer, loan_amount, tenure, interest_rate):
-    #Check credit eligibility and return approval status with corrected rates
+def calculate_emis(P, R, N):
+    #Vectorized calculate_emi over NumPy arrays of principals, annual rates and tenures
+    P = np.asarray(P, dtype=float)
+    R = np.asarray(R, dtype=float) / 12 / 100
+    N = np.asarray(N, dtype=float)
+    growth = (1 + R) ** N
+    return np.round(P * R * growth / (growth - 1), 2)
+
+def approved_limits(incomes):
+    #Vectorized /register approved limit: 36% of monthly income rounded to the nearest lakh
+    incomes = np.asarray(incomes, dtype=float)
+    return (np.round(36 * incomes / 100000) * 100000).astype(np.int64)
+
+def year_range(year):
+    #Loans started in a calendar year, as a date range the (customer, start_date) index can serve
+    return Q(start_date__gte=date(year, 1, 1), start_date__lt=date(year + 1, 1, 1))
+
+def get_loan_stats(customer):
+    #Read scoring inputs from the customer's credit profile, falling back to the Loan table
+    try:
+        profile = customer.credit_profile
+    except CustomerCreditProfile.DoesNotExist:
+        return aggregate_loan_stats(customer)
+    return profile.as_loan_stats(date.today().year)
+
+def aggregate_loan_stats(customer):
+    #Fetch every scoring input for a customer in a single aggregate query. Always on the primary:
+    #the decision is memoized under the primary's state_version, which a lagging replica may not match
+    year = date.today().year
+    stats = Loan.objects.using(DEFAULT_DB_ALIAS).filter(customer=customer).aggregate(
+        total_loans=Count('loan_id'),
+        total_emis=Sum('emis_paid_on_time'),
+        current_year_loans=Count('loan_id', filter=year_range(year)),
+    )
+    stats["total_emis"] = stats["total_emis"] or 0
+    return stats
+
+def loan_stats_by_customer(customer_ids, year):
+    #Grouped scoring inputs for many customers in one query
+    return Loan.objects.filter(customer_id__in=customer_ids).values('customer_id').annotate(
+        total_loans=Count('loan_id'),
+        total_emis=Sum('emis_paid_on_time'),
+        current_year_loans=Count('loan_id', filter=year_range(year)),
+    ).order_by()
+
+def bulk_loan_stats(customers):
+    #Scoring inputs for many customers: profiles where present, one grouped query for the rest
+    year = date.today().year
+    stats = {}
+    missing = []
+    for customer in customers:
+        try:
+            stats[customer.customer_id] = customer.credit_profile.as_loan_stats(year)
+        except CustomerCreditProfile.DoesNotExist:
+            stats[customer.customer_id] = dict(EMPTY_LOAN_STATS)
+            missing.append(customer.customer_id)
+
+    if missing:
+        for row in loan_stats_by_customer(missing, year):
+            customer_id = row.pop('customer_id')
+            row["total_emis"] = row["total_emis"] or 0
+            stats[customer_id] = row
+    return stats
+
+async def aget_loan_stats(customer):
+    #Async get_loan_stats; customers come from the cache with their profile already loaded
+    if Customer.credit_profile.is_cached(customer):
+        try:
+            return customer.credit_profile.as_loan_stats(date.today().year)
+        except CustomerCreditProfile.DoesNotExist:
+            pass
+    year = date.today().year
+    # On the primary, as in aggregate_loan_stats
+    stats = await Loan.objects.using(DEFAULT_DB_ALIAS).filter(customer_id=customer.customer_id).aaggregate(
+        total_loans=Count('loan_id'),
+        total_emis=Sum('emis_paid_on_time'),
+        current_year_loans=Count('loan_id', filter=year_range(year)),
+    )
+    stats["total_emis"] = stats["total_emis"] or 0
+    return stats
 
+def record_loan_in_profile(loan):
+    #Fold a newly created loan into its customer's credit profile
+    updated = CustomerCreditProfile.objects.filter(customer_id=loan.customer_id).update(
+        loan_count=F('loan_count') + 1,
+        total_emis_paid_on_time=F('total_emis_paid_on_time') + loan.emis_paid_on_time,
+        latest_start_date=Greatest(Coalesce('latest_start_date', Value(loan.start_date)), Value(loan.start_date)),
+    )
+    if not updated:
+        rebuild_credit_profiles(customer_ids=[loan.customer_id])
+
+def rebuild_credit_profiles(customer_ids=None, chunk_size=2000, dry_run=False):
+    #Recompute credit profiles from the Loan table in bulk and report drift
+    customers = Customer.objects.order_by('customer_id')
+    if customer_ids is not None:
+        customers = customers.filter(customer_id__in=customer_ids)
+    rollups = customers.annotate(
+        loan_count=Count('loan'),
+        total_emis=Coalesce(Sum('loan__emis_paid_on_time'), 0),
+        latest_start_date=Max('loan__start_date'),
+    ).values_list('customer_id', 'loan_count', 'total_emis', 'latest_start_date')
+
+    report = {"checked": 0, "missing": [], "drifted": []}
+    last_id = 0
+    while True:
+        chunk = list(rollups.filter(customer_id__gt=last_id)[:chunk_size])
+        if not chunk:
+            break
+        last_id = chunk[-1][0]
+        existing = CustomerCreditProfile.objects.in_bulk([row[0] for row in chunk])
+
+        changed = []
+        for customer_id, loan_count, total_emis, latest_start_date in chunk:
+            fresh = CustomerCreditProfile(
+                customer_id=customer_id,
+                loan_count=loan_count,
+                total_emis_paid_on_time=total_emis,
+                latest_start_date=latest_start_date,
+            )
+            profile = existing.get(customer_id)
+            if profile is None:
+                report["missing"].append(customer_id)
+            elif (profile.loan_count, profile.total_emis_paid_on_time, profile.latest_start_date) != (loan_count, total_emis, latest_start_date):
+                report["drifted"].append(customer_id)
+            else:
+                continue
+            changed.append(fresh)
+
+        report["checked"] += len(chunk)
+        if changed and not dry_run:
+            changed_ids = [profile.customer_id for profile in changed]
+            Customer.objects.filter(customer_id__in=changed_ids).update(state_version=F('state_version') + 1)
+            customer_cache.invalidate(*changed_ids)
+            CustomerCreditProfile.objects.bulk_create(
+                changed,
+                update_conflicts=True,
+                unique_fields=['customer'],
+                update_fields=['loan_count', 'total_emis_paid_on_time', 'latest_start_date'],
+            )
+    return report
+
+def credit_score(customer, stats):
+    #Score a customer from pre-aggregated loan stats (see get_loan_stats)
     score = 0
-    # Get all past loans of the customer
-    loans = Loan.objects.filter(customer=customer)
-    corrected_rate = interest_rate
-    
-    # Check if current debt exceeds approved limit
-    if customer.current_debt > customer.approved_limit:
-        return {
-            "approval": False,
-            "credit_score": 0,
-            "message": "Current debt exceeds approved limit"
-        }
+    total_loans = stats["total_loans"]
 
-    if loans.exists():
+    if total_loans > 0:
         # Calculate on-time payment rate
-        total_emis = sum([l.emis_paid_on_time for l in loans])
-        total_loans = loans.count()
-        on_time_rate = total_emis / max(total_loans, 1) if total_loans > 0 else 0
-        
+        on_time_rate = stats["total_emis"] / max(total_loans, 1)
+
         if on_time_rate >= 0.8:
             score += 20
-        if loans.filter(start_date__year=date.today().year).exists():
+        if stats["current_year_loans"] > 0:
             score += 10
-        if loans.count() < 3:
+        if total_loans < 3:
             score += 10
         if customer.current_debt <= customer.approved_limit:
             score += 10
     else:
         score += 20  # for fresh customers
 
+    return score
+
+def credit_scores(total_loans, total_emis, current_year_loans, current_debt, approved_limit):
+    #Vectorized credit_score over NumPy arrays, with the zero evaluate_eligibility
+    #gives customers whose debt exceeds their approved limit
+    total_loans = np.asarray(total_loans)
+    within_limit = np.asarray(current_debt) <= np.asarray(approved_limit)
+    on_time_rate = np.asarray(total_emis) / np.maximum(total_loans, 1)
+    with_history = (
+        20 * (on_time_rate >= 0.8)
+        + 10 * (np.asarray(current_year_loans) > 0)
+        + 10 * (total_loans < 3)
+        + 10 * within_limit
+    )
+    scores = np.where(total_loans > 0, with_history, 20)
+    return np.where(within_limit, scores, 0).astype(np.int16)
+
+def emis_due(start_dates, tenures, as_of):
+    #Vectorized count of installments due by as_of: monthly on the start day, clamped to the
+    #month's last day as in amortization_schedule, and never more than the tenure. end_date
+    #plays no part: loans booked before it was set to the last due date end too early
+    start = np.asarray(start_dates, dtype='datetime64[D]')
+    tenures = np.asarray(tenures)
+    as_of = np.datetime64(as_of, 'D')
+    start_months = start.astype('datetime64[M]')
+    as_of_month = as_of.astype('datetime64[M]')
+    start_days = (start - start_months.astype('datetime64[D]')).astype(np.int64) + 1
+    as_of_day = int((as_of - as_of_month.astype('datetime64[D]')).astype(np.int64)) + 1
+    month_length = int(((as_of_month + 1).astype('datetime64[D]') - as_of_month.astype('datetime64[D]')).astype(np.int64))
+    # The installment falling in as_of's month is due once its (clamped) day has come
+    due = (as_of_month - start_months).astype(np.int64) - (as_of_day < np.minimum(start_days, month_length))
+    return np.clip(due, 0, tenures)
+
+def outstanding_principal(amounts, interest_rates, tenures, paid):
+    #Vectorized whole-rupee principal left after `paid` installments, on the amortization_schedule
+    #balances; the full amount before the first installment and zero after the last
+    P = np.asarray(amounts, dtype=float)
+    N = np.asarray(tenures, dtype=float)
+    k = np.asarray(paid, dtype=float)
+    R = np.asarray(interest_rates, dtype=float) / 12 / 100
+    with np.errstate(divide='ignore', invalid='ignore'):
+        growth = (1 + R) ** k
+        balance = np.where(
+            R > 0,
+            P * growth - calculate_emis(P, R * 12 * 100, N) * (growth - 1) / R,
+            P - np.round(P / N, 2) * k,
+        )
+    balance = np.where(k >= N, 0, np.maximum(balance, 0))
+    return np.floor(balance).astype(np.int64)
+
+def corrected_interest_rate(score, interest_rate):
+    #Interest rate slab for a credit score, or None when the score is too low to approve
     if score > 50:
-        corrected_rate = interest_rate
-        approval = True
+        return interest_rate
     elif 30 < score <= 50:
-        corrected_rate = max(interest_rate, 12)
-        approval = True
+        return max(interest_rate, 12)
     elif 10 < score <= 30:
-        corrected_rate = max(interest_rate, 16)
-        approval = True
-    else:
-        approval = False
+        return max(interest_rate, 16)
+    return None
+
+def evaluate_eligibility(customer, stats, loan_amount, tenure, interest_rate):
+    #Apply the approval rules to a customer and its loan stats without touching the DB
+
+    # Check if current debt exceeds approved limit
+    if customer.current_debt > customer.approved_limit:
+        return {
+            "approval": False,
+            "credit_score": 0,
+            "message": "Current debt exceeds approved limit"
+        }
+
+    score = credit_score(customer, stats)
+    corrected_rate = corrected_interest_rate(score, interest_rate)
 
-    if not approval:
+    if corrected_rate is None:
         return {
             "approval": False,
             "message": "Credit score too low",
@@ -74,3 +286,432 @@ def check_credit_eligibility(customer, loan_amount, tenure, interest_rate):
         "monthly_installment": emi,
         "credit_score": score
     }
+
+def evaluate_eligibility_batch(quotes):
+    #evaluate_eligibility over many (customer, stats, loan_amount, tenure, interest_rate) quotes,
+    #with the EMIs of every approvable quote computed in one vectorized pass
+    results = [None] * len(quotes)
+    pending = []
+    for i, (customer, stats, loan_amount, tenure, interest_rate) in enumerate(quotes):
+        if customer.current_debt > customer.approved_limit:
+            results[i] = evaluate_eligibility(customer, stats, loan_amount, tenure, interest_rate)
+            continue
+        score = credit_score(customer, stats)
+        corrected_rate = corrected_interest_rate(score, interest_rate)
+        if corrected_rate is None:
+            results[i] = {
+                "approval": False,
+                "message": "Credit score too low",
+                "credit_score": score
+            }
+            continue
+        pending.append((i, loan_amount, corrected_rate, tenure, customer.monthly_salary, score))
+
+    if pending:
+        index, amounts, rates, tenures, salaries, scores = zip(*pending)
+        emis = calculate_emis(amounts, rates, tenures)
+        affordable = emis <= 0.5 * np.asarray(salaries, dtype=float)
+        for i, rate, emi, ok, score in zip(index, rates, emis.tolist(), affordable.tolist(), scores):
+            if ok:
+                results[i] = {
+                    "approval": True,
+                    "corrected_interest_rate": rate,
+                    "monthly_installment": emi,
+                    "credit_score": score
+                }
+            else:
+                results[i] = {
+                    "approval": False,
+                    "message": "EMI exceeds 50% of salary",
+                    "credit_score": score
+                }
+    return results
+
+def max_loan_amounts(max_emi, interest_rates, tenures):
+    #Largest whole-rupee principals whose calculate_emi stays within max_emi, as a
+    #(rates x tenures) grid: the EMI formula inverted, P = EMI * ((1+R)^N - 1) / (R * (1+R)^N)
+    #Rates must be positive, as calculate_emi requires, and tenures and rates bounded by
+    #MAX_TENURE and MAX_INTEREST_RATE so the powers stay finite; checked before any arithmetic
+    rates = np.asarray(interest_rates, dtype=float)[:, None]
+    N = np.asarray(tenures, dtype=float)[None, :]
+    if not ((rates > 0) & (rates <= MAX_INTEREST_RATE)).all() or not ((N > 0) & (N <= MAX_TENURE)).all():
+        raise ValueError("max_loan_amounts needs positive, bounded interest rates and tenures")
+    R = rates / 12 / 100
+    growth = (1 + R) ** N
+    principal = np.maximum(np.floor(max_emi * (growth - 1) / (R * growth)), 0)
+    # calculate_emi rounds to the paisa, so the exact inverse can be a rupee or two off on
+    # long tenures; step each cell until its rounded EMI sits at the cap
+    while (over := (calculate_emis(principal, rates, N) > max_emi) & (principal > 0)).any():
+        principal -= over
+    while (under := calculate_emis(principal + 1, rates, N) <= max_emi).any():
+        principal += under
+    return principal.astype(np.int64)
+
+def loan_offers(customer, stats, interest_rates, tenures):
+    #Score a customer once and return the approvable offer grid for every requested rate and tenure
+    if customer.current_debt > customer.approved_limit:
+        return {"approval": False, "credit_score": 0, "message": "Current debt exceeds approved limit"}
+
+    score = credit_score(customer, stats)
+    corrected = [corrected_interest_rate(score, rate) for rate in interest_rates]
+    if any(rate is None for rate in corrected):
+        return {"approval": False, "credit_score": score, "message": "Credit score too low"}
+
+    max_emi = 0.5 * customer.monthly_salary
+    amounts = max_loan_amounts(max_emi, corrected, tenures)
+    emis = calculate_emis(amounts, np.asarray(corrected, dtype=float)[:, None], np.asarray(tenures)[None, :])
+    return {
+        "approval": True,
+        "credit_score": score,
+        "max_monthly_installment": max_emi,
+        "tenures": list(tenures),
+        "interest_rates": list(interest_rates),
+        "corrected_interest_rates": corrected,
+        "max_loan_amount": amounts.tolist(),
+        "monthly_installment": emis.tolist(),
+    }
+
+def due_dates(start_date, months):
+    #Dates installments fall due the given number of months after start_date: on the start
+    #day, clamped to the month's last day
+    months = np.datetime64(start_date, 'M') + np.asarray(months)
+    first_days = months.astype('datetime64[D]')
+    month_lengths = ((months + 1).astype('datetime64[D]') - first_days).astype(int)
+    return first_days + np.minimum(start_date.day, month_lengths) - 1
+
+def amortization_schedule(loan_amount, interest_rate, tenure, start_date):
+    #Month-by-month repayment table of a loan at its calculate_emi installment, as NumPy columns.
+    #Balances come from the closed form B_k = P(1+R)^k - EMI((1+R)^k - 1)/R, and the last
+    #installment settles whatever the paisa-rounded EMI leaves over
+    R = interest_rate / 12 / 100
+    month = np.arange(1, tenure + 1)
+    if R > 0:
+        emi = calculate_emi(loan_amount, interest_rate, tenure)
+        growth = (1 + R) ** (month - 1)
+        opening = loan_amount * growth - emi * (growth - 1) / R
+    else:
+        emi = round(loan_amount / tenure, 2)
+        opening = loan_amount - emi * (month - 1.0)
+    interest = opening * R
+    principal = np.full(tenure, emi) - interest
+    principal[-1] = opening[-1]
+    closing = opening - principal
+
+    return {
+        "month": month,
+        "due_date": due_dates(start_date, month),
+        "opening_balance": np.round(opening, 2),
+        "interest": np.round(interest, 2),
+        "principal": np.round(principal, 2),
+        "closing_balance": np.round(np.maximum(closing, 0), 2),
+    }
+
+@timed('check_credit_eligibility')
+def check_credit_eligibility(customer, loan_amount, tenure, interest_rate):
+    #Check credit eligibility and return approval status with corrected rates,
+    #memoized per customer state version
+    today = date.today()
+    quote = (loan_amount, tenure, interest_rate)
+    eligibility = eligibility_memo.get(customer, today, quote)
+    if eligibility is None:
+        eligibility = _check_credit_eligibility(customer, loan_amount, tenure, interest_rate)
+        eligibility_memo.set(customer, today, quote, eligibility)
+    return eligibility
+
+def _check_credit_eligibility(customer, loan_amount, tenure, interest_rate):
+    # Over-limit customers are rejected before any loan data is read
+    if customer.current_debt > customer.approved_limit:
+        stats = EMPTY_LOAN_STATS
+    else:
+        stats = get_loan_stats(customer)
+    return evaluate_eligibility(customer, stats, loan_amount, tenure, interest_rate)
+
+@timed('check_credit_eligibility')
+async def acheck_credit_eligibility(customer, loan_amount, tenure, interest_rate):
+    #Async check_credit_eligibility sharing the same memo and rules
+    today = date.today()
+    quote = (loan_amount, tenure, interest_rate)
+    eligibility = eligibility_memo.get(customer, today, quote)
+    if eligibility is None:
+        if customer.current_debt > customer.approved_limit:
+            stats = EMPTY_LOAN_STATS
+        else:
+            stats = await aget_loan_stats(customer)
+        eligibility = evaluate_eligibility(customer, stats, loan_amount, tenure, interest_rate)
+        eligibility_memo.set(customer, today, quote, eligibility)
+    return eligibility
+
+def create_loan(customer_id, loan_amount, tenure, interest_rate):
+    #Score and book a loan as one atomic unit under a row lock on the customer.
+    #Returns (loan, eligibility), with loan None when rejected; raises Customer.DoesNotExist
+    with transaction.atomic():
+        customer = Customer.objects.select_for_update(of=('self',)).select_related('credit_profile').get(customer_id=customer_id)
+
+        # Re-validated against the locked row, so concurrent loans cannot overshoot the limit checks
+        eligibility = check_credit_eligibility(customer, loan_amount, tenure, interest_rate)
+        start_date = date.today()
+        if not eligibility.get("approval"):
+            record_decision_in_portfolio(customer, start_date)
+            return None, eligibility
+
+        loan = Loan.objects.create(
+            customer=customer,
+            loan_amount=loan_amount,
+            tenure=tenure,
+            interest_rate=eligibility.get("corrected_interest_rate"),
+            monthly_repayment=eligibility.get("monthly_installment"),
+            emis_paid_on_time=0,
+            start_date=start_date,
+            # The last installment's due date, so accrue_emis can stop reading the loan after it
+            end_date=due_dates(start_date, tenure).item(),
+        )
+        record_loan_in_profile(loan)
+
+        # Update customer's current debt, touching only that column
+        Customer.objects.filter(pk=customer.pk).update(
+            current_debt=F('current_debt') + int(loan_amount),
+            state_version=F('state_version') + 1,
+        )
+        customer_cache.invalidate(customer.pk)
+        record_decision_in_portfolio(customer, start_date, loan)
+    return loan, eligibility
+
+def book_loan(customer_id, loan_amount, tenure, interest_rate):
+    #Score and book a validated loan request, returning the /create-loan (body, status code).
+    #Shared by CreateLoan and process_loan_queue
+    try:
+        loan, eligibility = create_loan(customer_id, loan_amount, tenure, interest_rate)
+    except Customer.DoesNotExist:
+        return {"error": "Customer not found"}, status.HTTP_404_NOT_FOUND
+
+    if loan is None:
+        return {
+            "loan_id": None,
+            "customer_id": customer_id,
+            "loan_approved": False,
+            "message": eligibility.get("message", "Loan not approved"),
+            "credit_score": eligibility.get("credit_score", 0)
+        }, status.HTTP_400_BAD_REQUEST
+
+    return {
+        "loan_id": loan.loan_id,
+        "customer_id": customer_id,
+        "loan_approved": True,
+        "message": "Loan approved and created successfully",
+        "monthly_repayment": eligibility.get("monthly_installment"),
+        "corrected_interest_rate": eligibility.get("corrected_interest_rate")
+    }, status.HTTP_201_CREATED
+
+def tenure_band(tenure):
+    return next(label for label, upper in TENURE_BANDS if upper is None or tenure <= upper)
+
+def interest_rate_band(interest_rate):
+    return next(label for label, upper in INTEREST_RATE_BANDS if upper is None or interest_rate < upper)
+
+def band_sums(tenures, interest_rates, values, shards=None):
+    #Vectorized sum of values per (tenure_band, interest_rate_band) key, or per
+    #(tenure_band, interest_rate_band, shard) when shards are given
+    if not len(values):
+        return {}
+    tenure_labels = [label for label, _ in TENURE_BANDS]
+    rate_labels = [label for label, _ in INTEREST_RATE_BANDS]
+    columns = [
+        np.searchsorted([upper for _, upper in TENURE_BANDS[:-1]], tenures, side='left'),
+        np.searchsorted([upper for _, upper in INTEREST_RATE_BANDS[:-1]], interest_rates, side='right'),
+    ]
+    if shards is not None:
+        columns.append(np.asarray(shards))
+    keys, which = np.unique(np.stack(columns, axis=1), axis=0, return_inverse=True)
+    sums = np.bincount(which.ravel(), weights=values, minlength=len(keys))
+    return {
+        (tenure_labels[key[0]], rate_labels[key[1]], *key[2:]): total
+        for key, total in zip(keys.tolist(), sums.tolist())
+    }
+
+def _bump(model, key, **increments):
+    #Add to a rollup row's counters, creating the row on first use
+    if connection.vendor == 'postgresql':
+        # One upsert statement instead of the ORM's update-then-create
+        # (field defaults only apply through the ORM, so a new row spells out every column)
+        qn = connection.ops.quote_name
+        row = {
+            field.name: key.get(field.name, increments.get(field.name, field.get_default()))
+            for field in model._meta.concrete_fields if not field.primary_key
+        }
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {qn(model._meta.db_table)} AS t ({', '.join(qn(c) for c in row)}) "
+                f"VALUES ({', '.join(['%s'] * len(row))}) ON CONFLICT ({', '.join(qn(c) for c in key)}) DO UPDATE SET "
+                + ", ".join(f"{qn(c)} = t.{qn(c)} + EXCLUDED.{qn(c)}" for c in increments),
+                list(row.values()),
+            )
+        return
+    updates = {field: F(field) + value for field, value in increments.items()}
+    if model.objects.filter(**key).update(**updates):
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(**key, **increments)
+    except IntegrityError:
+        # Created by a concurrent transaction since the update above
+        model.objects.filter(**key).update(**updates)
+
+def record_decision_in_portfolio(customer, day, loan=None):
+    #Fold a booked loan, or a rejection when loan is None, into the customer's shard of the
+    #portfolio rollups. Called last in create_loan's transaction so the rows stay locked briefly
+    shard = customer.pk % PORTFOLIO_SHARDS
+    if loan is None:
+        _bump(PortfolioDay, {"date": day, "shard": shard}, rejected=1)
+        return
+    _bump(PortfolioDay, {"date": day, "shard": shard}, approved=1, approved_amount=loan.loan_amount)
+    _bump(
+        PortfolioBucket,
+        {"tenure_band": tenure_band(loan.tenure), "interest_rate_band": interest_rate_band(loan.interest_rate), "shard": shard},
+        loan_count=1, loan_amount=loan.loan_amount, monthly_repayment=loan.monthly_repayment,
+        outstanding_principal=loan.loan_amount,
+    )
+
+def record_repayments_in_portfolio(repaid):
+    #Take principal repaid off the portfolio exposure, given as {(tenure_band, interest_rate_band,
+    #shard): amount} with each loan in its customer's shard, as record_decision_in_portfolio books it
+    for (tenure_label, rate_label, shard), amount in sorted(repaid.items()):
+        _bump(
+            PortfolioBucket,
+            {"tenure_band": tenure_label, "interest_rate_band": rate_label, "shard": shard},
+            outstanding_principal=-amount,
+        )
+
+def rebuild_portfolio_rollups():
+    #Recompute the portfolio rollups from the Loan table with grouped SQL aggregates, one row
+    #per band and per day in shard 0 (readers sum the shards, so later bumps to other shards
+    #add up). Outstanding principal follows each loan's schedule after its emis_paid_on_time.
+    #Rejection counts have no source table and are kept. Returns (buckets, days) written
+    with transaction.atomic():
+        if connection.vendor == 'postgresql':
+            # Hold back create_loan's increments until the rebuilt rows are in place
+            qn = connection.ops.quote_name
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"LOCK TABLE {qn(PortfolioBucket._meta.db_table)}, {qn(PortfolioDay._meta.db_table)} IN EXCLUSIVE MODE"
+                )
+
+        bands = Loan.objects.annotate(
+            tenure_band=Case(
+                *[When(tenure__lte=upper, then=Value(label)) for label, upper in TENURE_BANDS[:-1]],
+                default=Value(TENURE_BANDS[-1][0]),
+            ),
+            interest_rate_band=Case(
+                *[When(interest_rate__lt=upper, then=Value(label)) for label, upper in INTEREST_RATE_BANDS[:-1]],
+                default=Value(INTEREST_RATE_BANDS[-1][0]),
+            ),
+        ).values('tenure_band', 'interest_rate_band').annotate(
+            loan_count=Count('loan_id'),
+            total_amount=Sum('loan_amount'),
+            total_repayment=Sum('monthly_repayment'),
+        ).order_by()
+        exposure = {}
+        loans = Loan.objects.values_list('tenure', 'interest_rate', 'loan_amount', 'emis_paid_on_time').order_by().iterator(chunk_size=10000)
+        while chunk := list(islice(loans, 10000)):
+            tenures, rates, amounts, paid = (np.array(column, dtype=float) for column in zip(*chunk))
+            for key, amount in band_sums(tenures, rates, outstanding_principal(amounts, rates, tenures, paid)).items():
+                exposure[key] = exposure.get(key, 0) + amount
+        buckets = [
+            PortfolioBucket(
+                tenure_band=row['tenure_band'], interest_rate_band=row['interest_rate_band'],
+                loan_count=row['loan_count'], loan_amount=row['total_amount'], monthly_repayment=row['total_repayment'],
+                outstanding_principal=exposure.get((row['tenure_band'], row['interest_rate_band']), 0),
+            )
+            for row in bands
+        ]
+
+        rejected = dict(
+            PortfolioDay.objects.filter(rejected__gt=0).values('date').annotate(total=Sum('rejected')).values_list('date', 'total').order_by()
+        )
+        days = {
+            row['start_date']: PortfolioDay(
+                date=row['start_date'], approved=row['approved'], approved_amount=row['total_amount'],
+                rejected=rejected.pop(row['start_date'], 0),
+            )
+            for row in Loan.objects.values('start_date').annotate(
+                approved=Count('loan_id'), total_amount=Sum('loan_amount'),
+            ).order_by()
+        }
+        days.update((day, PortfolioDay(date=day, rejected=count)) for day, count in rejected.items())
+
+        PortfolioBucket.objects.all().delete()
+        PortfolioBucket.objects.bulk_create(buckets)
+        PortfolioDay.objects.all().delete()
+        PortfolioDay.objects.bulk_create(days.values(), batch_size=2000)
+    return len(buckets), len(days)
+
+def register_customers(rows, positions=None, chunk_size=2000):
+    #Bulk /register for validated (first_name, last_name, age, monthly_income, phone_number) rows.
+    #Returns (customer, None) or (None, error message) per row, in order; phone numbers
+    #repeated in the batch or already registered are rejected without failing the rest.
+    #positions gives each row's item number in the request, for the repeat messages
+    if positions is None:
+        positions = range(len(rows))
+    results = [None] * len(rows)
+    limits = approved_limits([row[3] for row in rows]).tolist()
+    first_use = {}
+    pending = []
+    for i, row in enumerate(rows):
+        if row[4] in first_use:
+            results[i] = (None, f"phone_number repeats item {first_use[row[4]]} of this batch")
+        else:
+            first_use[row[4]] = positions[i]
+            pending.append(i)
+
+    for start in range(0, len(pending), chunk_size):
+        _register_chunk(rows, limits, pending[start:start + chunk_size], results)
+    return results
+
+def _register_chunk(rows, limits, chunk, results):
+    #Bulk-insert one chunk. A conflict (a concurrent registration taking a number after the
+    #check) is looked up again once; if it recurs the chunk falls back to one insert per row,
+    #so the conflict fails only its own row and never the chunks already committed
+    for attempt in range(2):
+        # One query per chunk for numbers that are already taken
+        taken = set(Customer.objects.filter(phone_number__in=[rows[i][4] for i in chunk]).values_list('phone_number', flat=True))
+        fresh = []
+        for i in chunk:
+            if rows[i][4] in taken:
+                results[i] = (None, "phone_number is already registered")
+            else:
+                fresh.append(i)
+        customers = [_new_customer(rows[i], limits[i]) for i in fresh]
+        try:
+            with transaction.atomic():
+                Customer.objects.bulk_create(customers)
+                CustomerCreditProfile.objects.bulk_create([CustomerCreditProfile(customer=c) for c in customers])
+        except IntegrityError:
+            chunk = fresh
+            continue
+        for i, customer in zip(fresh, customers):
+            results[i] = (customer, None)
+        return
+
+    for i in chunk:
+        customer = _new_customer(rows[i], limits[i])
+        try:
+            with transaction.atomic():
+                customer.save()
+                CustomerCreditProfile.objects.create(customer=customer)
+        except IntegrityError:
+            if Customer.objects.filter(phone_number=rows[i][4]).exists():
+                results[i] = (None, "phone_number is already registered")
+            else:
+                results[i] = (None, "customer conflicts with one registered concurrently, retry this item")
+            continue
+        results[i] = (customer, None)
+
+def _new_customer(row, limit):
+    first_name, last_name, age, monthly_income, phone_number = row
+    return Customer(
+        first_name=first_name,
+        last_name=last_name,
+        age=age,
+        monthly_salary=monthly_income,
+        phone_number=phone_number,
+        approved_limit=limit,
+    )
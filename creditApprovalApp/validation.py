@@ -0,0 +1,174 @@
+"""
+Declarative request schemas, compiled once at import time.
+
+A Schema is a list of Fields. Each field is compiled into a (name, convert, checks) step, so
+validating a payload is one pass over the steps: look the value up, convert it, run its range
+checks. All problems are collected and returned as structured errors
+
+    {"field": "tenure", "code": "required" | "invalid" | "range", "message": "..."}
+
+together with the one-line summary the API has always returned under "error". Schemas are
+plain Python with no per-call allocation beyond the result, which keeps them much cheaper
+than DRF serializers (see benchmarks/validation.py) and lets the batch endpoints validate
+thousands of items per request.
+"""
+from collections.abc import Mapping
+from math import isfinite
+
+REQUIRED = 'required'
+INVALID = 'invalid'
+RANGE = 'range'
+
+
+def integer(value):
+    if type(value) is int:
+        return value
+    if isinstance(value, bool):
+        raise TypeError('booleans are not integers')
+    # Strings and floats convert as int() always has here ("12" -> 12, 12.0 -> 12)
+    return int(value)
+
+
+def number(value):
+    if type(value) is not float:
+        if type(value) is int:
+            return float(value)
+        if isinstance(value, bool):
+            raise TypeError('booleans are not numbers')
+        value = float(value)
+    if not isfinite(value):
+        raise ValueError('numbers must be finite')
+    return value
+
+
+def text(value):
+    if type(value) is str:
+        return value
+    # Phone numbers often arrive as JSON numbers
+    if type(value) is int:
+        return str(value)
+    raise TypeError('expected a string')
+
+
+KIND_NAMES = {integer: 'an integer', number: 'a number', text: 'a string'}
+
+
+class Field:
+    # One payload key: its converter and optional bounds. `message` replaces the generated
+    # message of the lower bounds (gt, ge, min_length); upper bounds keep theirs
+    def __init__(self, name, convert, *, required=True, default=None, gt=None, ge=None, le=None,
+                 min_length=None, max_length=None, message=None):
+        self.name = name
+        self.convert = convert
+        self.required = required
+        self.default = default
+        self.bounds = (gt, ge, le, min_length, max_length)
+        self.message = message
+
+    def compile(self):
+        gt, ge, le, min_length, max_length = self.bounds
+        label = self.name.replace('_', ' ').capitalize()
+        checks = []
+        if gt is not None:
+            checks.append((lambda v: v > gt, self.message or f"{label} must be greater than {gt}"))
+        if ge is not None:
+            checks.append((lambda v: v >= ge, self.message or f"{label} must be at least {ge}"))
+        if le is not None:
+            checks.append((lambda v: v <= le, f"{label} must be at most {le}"))
+        if min_length is not None:
+            too_short = f"{label} must not be empty" if min_length == 1 else f"{label} must be at least {min_length} characters"
+            checks.append((lambda v: len(v) >= min_length, self.message or too_short))
+        if max_length is not None:
+            checks.append((lambda v: len(v) <= max_length, f"{label} must be at most {max_length} characters"))
+        invalid = f"{self.name} must be {KIND_NAMES.get(self.convert, 'valid')}"
+        return self.name, self.convert, tuple(checks), self.required, self.default, invalid
+
+
+class Invalid:
+    # Validation failure: the structured errors and the legacy one-line summary
+    __slots__ = ('errors',)
+
+    def __init__(self, errors):
+        self.errors = errors
+
+    @property
+    def message(self):
+        if self.errors[0]['field'] is None:
+            return self.errors[0]['message']
+        missing = [e['field'] for e in self.errors if e['code'] == REQUIRED]
+        if missing:
+            return f"Missing required fields: {', '.join(missing)}"
+        invalid = [e['message'] for e in self.errors if e['code'] == INVALID]
+        if invalid:
+            return f"Invalid data types: {'; '.join(invalid)}"
+        return self.errors[0]['message']
+
+    def as_dict(self):
+        return {"error": self.message, "errors": self.errors}
+
+
+class Schema:
+    def __init__(self, *fields):
+        self.fields = tuple(field.name for field in fields)
+        self._steps = tuple(field.compile() for field in fields)
+
+    def validate(self, data):
+        # (tuple of converted values in field order, None) or (None, Invalid)
+        if not isinstance(data, Mapping):
+            return None, Invalid([{"field": None, "code": INVALID, "message": "Expected a JSON object"}])
+        values = []
+        errors = None
+        for name, convert, checks, required, default, invalid in self._steps:
+            if name not in data:
+                if required:
+                    errors = errors or []
+                    errors.append({"field": name, "code": REQUIRED, "message": f"{name} is required"})
+                values.append(default)
+                continue
+            try:
+                value = convert(data[name])
+            except (TypeError, ValueError, OverflowError):
+                errors = errors or []
+                errors.append({"field": name, "code": INVALID, "message": invalid})
+                continue
+            for check, message in checks:
+                if not check(value):
+                    errors = errors or []
+                    errors.append({"field": name, "code": RANGE, "message": message})
+                    break
+            values.append(value)
+        if errors:
+            return None, Invalid(errors)
+        return tuple(values), None
+
+    def validate_many(self, items):
+        # [(values, None) or (None, Invalid)] for a list of payloads
+        validate = self.validate
+        return [validate(item) for item in items]
+
+
+# Longest tenure (months) and highest annual interest rate (%) a loan request may ask for,
+# also the caps on /loan-offers; they keep (1 + R) ** N well within float range
+MAX_TENURE = 600
+MAX_INTEREST_RATE = 100
+
+# /check-eligibility, /check-eligibility/batch and /create-loan
+LOAN_REQUEST = Schema(
+    Field('customer_id', integer),
+    Field('loan_amount', number, gt=0, message="Loan amount must be positive"),
+    Field('tenure', integer, gt=0, le=MAX_TENURE, message="Tenure must be positive"),
+    Field('interest_rate', number, ge=0, le=MAX_INTEREST_RATE, message="Interest rate cannot be negative"),
+)
+
+# Highest monthly income /register accepts: its approved limit, 36 times the income, must fit
+# the Customer integer columns
+MAX_MONTHLY_INCOME = 50_000_000
+
+# /register; lengths follow the Customer columns
+REGISTER_REQUEST = Schema(
+    Field('first_name', text, min_length=1, max_length=100),
+    Field('last_name', text, min_length=1, max_length=100),
+    Field('age', integer, ge=0, le=150),
+    Field('monthly_income', integer, gt=0, le=MAX_MONTHLY_INCOME, message="Monthly income must be positive"),
+    Field('phone_number', text, min_length=1, max_length=15),
+)
@@ -1,38 +1,240 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
-from .models import Customer, Loan
+from rest_framework.parsers import MultiPartParser
+from django.db import IntegrityError, transaction
+from django.db.models import Sum
+from django.http import HttpResponse, StreamingHttpResponse
+from .models import Customer, CustomerCreditProfile, Loan, LoanApplication, PortfolioBucket, PortfolioDay
 from .serializers import CustomerSerializer, LoanSerializer
-from datetime import timedelta, date
-from .utils import check_credit_eligibility
+from . import idempotency, metrics
+from .cache import customer_cache
+from .dbpool import pool_stats
+from .parsers import CSVParser, ORJSONParser, read_csv
+from .routers import replica_reads
+from .utils import (
+    INTEREST_RATE_BANDS, TENURE_BANDS, amortization_schedule, book_loan, bulk_loan_stats, check_credit_eligibility, evaluate_eligibility_batch, get_loan_stats, loan_offers,
+    register_customers,
+)
+from .validation import LOAN_REQUEST, MAX_INTEREST_RATE, MAX_TENURE, REGISTER_REQUEST
+from datetime import date, timedelta
+from io import BytesIO
+from itertools import islice
+import numpy as np
 import logging
+import orjson
 
 logger = logging.getLogger(__name__)
 
+# Upper bound on quotes accepted by /check-eligibility/batch in one request
+MAX_ELIGIBILITY_BATCH = 1000
+
+# Upper bound on customers accepted by /register/bulk in one request
+MAX_REGISTER_BATCH = 50000
+
+# Largest page served by /view-loans/<customer_id>?limit=
+MAX_LOANS_PAGE = 1000
+
+# Grid served by /loan-offers/<customer_id> when no tenures or interest_rates are given,
+# and the most values accepted for each
+DEFAULT_OFFER_TENURES = (6, 12, 18, 24, 36, 48, 60)
+DEFAULT_OFFER_RATES = (8, 10, 12, 14, 16, 18)
+MAX_OFFER_VALUES = 120
+
+# /view-loan/<loan_id>/schedule?output= formats
+SCHEDULE_OUTPUTS = ('json', 'columnar', 'npy')
+
+# Longest approval trend served by /portfolio/summary?days=
+MAX_TREND_DAYS = 366
+
+# Only the columns /view-loans needs, in loan_list_item order
+LOAN_LIST_COLUMNS = ('loan_id', 'loan_amount', 'interest_rate', 'monthly_repayment', 'tenure', 'emis_paid_on_time')
+
+
+def loan_list_queryset(customer_id, after=0):
+    # Served entirely from the (customer_id, loan_id) covering index
+    return Loan.objects.filter(customer_id=customer_id, loan_id__gt=after).order_by('loan_id').values_list(*LOAN_LIST_COLUMNS)
+
+
+def loan_list_item(row):
+    loan_id, loan_amount, interest_rate, monthly_repayment, tenure, emis_paid_on_time = row
+    return {
+        "loan_id": loan_id,
+        "loan_amount": loan_amount,
+        "interest_rate": interest_rate,
+        "monthly_installment": monthly_repayment,
+        "repayments_left": max(0, tenure - emis_paid_on_time),
+    }
+
+
+def parse_page_params(params):
+    # (after, limit, error message) from /view-loans query parameters
+    try:
+        after = int(params.get('after', 0))
+        limit = int(params['limit']) if 'limit' in params else None
+    except ValueError:
+        return None, None, "limit and after must be integers"
+    if limit is not None and not 0 < limit <= MAX_LOANS_PAGE:
+        return None, None, f"limit must be between 1 and {MAX_LOANS_PAGE}"
+    return after, limit, None
+
+
+def parse_offer_params(params):
+    # (tenures, interest rates, error message) from /loan-offers query parameters,
+    # each a comma-separated list such as ?tenures=12,24&interest_rates=10.5,12
+    try:
+        tenures = [int(v) for v in params['tenures'].split(',')] if 'tenures' in params else list(DEFAULT_OFFER_TENURES)
+        rates = [float(v) for v in params['interest_rates'].split(',')] if 'interest_rates' in params else list(DEFAULT_OFFER_RATES)
+    except ValueError:
+        return None, None, "tenures must be integers and interest_rates numbers, comma separated"
+    if not 0 < len(tenures) <= MAX_OFFER_VALUES or not 0 < len(rates) <= MAX_OFFER_VALUES:
+        return None, None, f"tenures and interest_rates take between 1 and {MAX_OFFER_VALUES} values"
+    if not all(0 < tenure <= MAX_TENURE for tenure in tenures):
+        return None, None, f"tenures must be between 1 and {MAX_TENURE}"
+    if not all(0 < rate <= MAX_INTEREST_RATE for rate in rates):
+        return None, None, f"interest_rates must be greater than 0 and at most {MAX_INTEREST_RATE}"
+    return tenures, rates, None
+
+
+def sum_shards(queryset, *keys):
+    # One unsaved instance per distinct key, its counters summed over the key's shard rows
+    model = queryset.model
+    counters = [field.name for field in model._meta.concrete_fields if not field.primary_key and field.name not in (*keys, 'shard')]
+    rows = queryset.values(*keys).annotate(**{f"total_{name}": Sum(name) for name in counters}).order_by()
+    return [model(**{key: row[key] for key in keys}, **{name: row[f"total_{name}"] for name in counters}) for row in rows]
+
+
+def band_totals(buckets, field, bands):
+    # Bucket counts and amounts summed over one band dimension, in band order
+    totals = {label: {field: label, "loan_count": 0, "loan_amount": 0.0, "outstanding_principal": 0.0} for label, _ in bands}
+    for bucket in buckets:
+        band = totals[getattr(bucket, field)]
+        band["loan_count"] += bucket.loan_count
+        band["loan_amount"] += bucket.loan_amount
+        band["outstanding_principal"] += bucket.outstanding_principal
+    return list(totals.values())
+
+
+def band_order(bucket):
+    # Sort key putting buckets in TENURE_BANDS, then INTEREST_RATE_BANDS order
+    tenures = [label for label, _ in TENURE_BANDS]
+    rates = [label for label, _ in INTEREST_RATE_BANDS]
+    return tenures.index(bucket.tenure_band), rates.index(bucket.interest_rate_band)
+
+
+def approval_trend(decisions, start, end):
+    # One entry per day from start to end, days without decisions included
+    by_date = {day.date: day for day in decisions}
+    trend = []
+    for offset in range((end - start).days + 1):
+        day = start + timedelta(days=offset)
+        counts = by_date.get(day) or PortfolioDay(date=day)
+        decided = counts.approved + counts.rejected
+        trend.append({
+            "date": day,
+            "approved": counts.approved,
+            "rejected": counts.rejected,
+            "approved_amount": counts.approved_amount,
+            "approval_rate": counts.approved / decided if decided else None,
+        })
+    return trend
+
+
+def customer_detail(customer):
+    # /register response body
+    return {
+        "customer_id": customer.customer_id,
+        "name": f"{customer.first_name} {customer.last_name}",
+        "age": customer.age,
+        "monthly_income": customer.monthly_salary,
+        "approved_limit": customer.approved_limit,
+        "phone_number": customer.phone_number
+    }
+
+
+def loan_detail(loan, customer):
+    return {
+        "loan_id": loan.loan_id,
+        "customer": {
+            "id": customer.customer_id,
+            "first_name": customer.first_name,
+            "last_name": customer.last_name,
+            "phone_number": customer.phone_number,
+            "age": customer.age,
+        },
+        "loan_amount": loan.loan_amount,
+        "interest_rate": loan.interest_rate,
+        "monthly_installment": loan.monthly_repayment,
+        "tenure": loan.tenure,
+    }
+
+
+def eligibility_response(customer_id, interest_rate, tenure, eligibility):
+    # Response body and status for an eligibility decision
+    if not eligibility.get("approval"):
+        return {
+            "customer_id": customer_id,
+            "approval": False,
+            "message": eligibility.get("message", "Loan not approved"),
+            "credit_score": eligibility.get("credit_score", 0)
+        }, status.HTTP_400_BAD_REQUEST
+
+    return {
+        "customer_id": customer_id,
+        "approval": True,
+        "interest_rate": interest_rate,
+        "corrected_interest_rate": eligibility.get("corrected_interest_rate"),
+        "tenure": tenure,
+        "monthly_installment": eligibility.get("monthly_installment"),
+        "credit_score": eligibility.get("credit_score", 0)
+    }, status.HTTP_200_OK
+
+def accepted_headers(location):
+    # Headers of a 202 for a queued /create-loan, also sent on its Idempotency-Key replays
+    return {"Location": location, "Preference-Applied": "respond-async"}
+
+
+def loan_application_detail(application):
+    # /loan-applications/<job_id> body; the outcome appears once a worker has processed it.
+    # Timestamps are strings already so the body can be stored for Idempotency-Key replays.
+    detail = {
+        "job_id": application.pk,
+        "status": application.status,
+        "customer_id": application.customer_id,
+        "created_at": application.created_at.isoformat(),
+        "processed_at": application.processed_at and application.processed_at.isoformat(),
+    }
+    if application.status != LoanApplication.PENDING:
+        detail["response_status"] = application.status_code
+        detail["response"] = application.response
+    return detail
+
+
 # /register
 class RegisterCustomer(APIView):
     def post(self, request):
         try:
-            data = request.data
-            income = int(data['monthly_income'])
+            values, invalid = REGISTER_REQUEST.validate(request.data)
+            if invalid:
+                return Response({
+                    "error": "Failed to register customer",
+                    "details": invalid.message,
+                    "errors": invalid.errors
+                }, status=status.HTTP_400_BAD_REQUEST)
+            first_name, last_name, age, income, phone_number = values
             # approved limit is 36% of monthly income rounded to the nearest lakh
             approved_limit = round((36 * income) / 100000) * 100000
-            customer = Customer.objects.create(
-                first_name=data['first_name'],
-                last_name=data['last_name'],
-                age=data['age'],
-                phone_number=data['phone_number'],
-                monthly_salary=income,
-                approved_limit=approved_limit,
-            )
-            return Response({
-                "customer_id": customer.customer_id,
-                "name": f"{customer.first_name} {customer.last_name}",
-                "age": customer.age,
-                "monthly_income": income,
-                "approved_limit": approved_limit,
-                "phone_number": customer.phone_number
-            }, status=status.HTTP_201_CREATED)
+            with transaction.atomic():
+                customer = Customer.objects.create(
+                    first_name=first_name,
+                    last_name=last_name,
+                    age=age,
+                    phone_number=phone_number,
+                    monthly_salary=income,
+                    approved_limit=approved_limit,
+                )
+                CustomerCreditProfile.objects.create(customer=customer)
+            return Response(customer_detail(customer), status=status.HTTP_201_CREATED)
         except Exception as e:
             logger.error(f"Error in RegisterCustomer: {str(e)}")
             return Response({
@@ -41,78 +243,86 @@ class RegisterCustomer(APIView):
             }, status=status.HTTP_400_BAD_REQUEST)
 
 
-# /check-eligibility
-class CheckEligibility(APIView):
+# /register/bulk
+class RegisterCustomersBulk(APIView):
+    # A JSON array (or {"items": [...]}), a text/csv body, or a CSV uploaded as "file"
+    parser_classes = [ORJSONParser, CSVParser, MultiPartParser]
+
     def post(self, request):
         try:
-            data = request.data
-            
-            # Check required fields
-            required_fields = {'customer_id', 'loan_amount', 'tenure', 'interest_rate'}
-            missing = [f for f in required_fields if f not in data]
-            if missing:
+            upload = request.FILES.get('file')
+            if upload is not None:
+                items = read_csv(upload)
+            else:
+                data = request.data
+                items = data.get('items') if isinstance(data, dict) else data
+            if not isinstance(items, list):
                 return Response(
-                    {"error": f"Missing required fields: {', '.join(missing)}"},
+                    {"error": "Expected a list of customers or a CSV file"},
                     status=status.HTTP_400_BAD_REQUEST
                 )
-
-            # Validate and convert data types
-            try:
-                customer_id = int(data['customer_id'])
-                loan_amount = float(data['loan_amount'])
-                interest_rate = float(data['interest_rate'])
-                tenure = int(data['tenure'])
-            except (ValueError, TypeError) as e:
+            if len(items) > MAX_REGISTER_BATCH:
                 return Response(
-                    {"error": f"Invalid data types: {str(e)}"},
+                    {"error": f"At most {MAX_REGISTER_BATCH} customers per batch"},
                     status=status.HTTP_400_BAD_REQUEST
                 )
 
-            # Validate ranges
-            if loan_amount <= 0:
-                return Response(
-                    {"error": "Loan amount must be positive"},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-            if tenure <= 0:
-                return Response(
-                    {"error": "Tenure must be positive"},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-            if interest_rate < 0:
-                return Response(
-                    {"error": "Interest rate cannot be negative"},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
+            results = [None] * len(items)
+            index, rows = [], []
+            for i, (values, invalid) in enumerate(REGISTER_REQUEST.validate_many(items)):
+                if invalid:
+                    results[i] = {"status": status.HTTP_400_BAD_REQUEST, **invalid.as_dict()}
+                else:
+                    index.append(i)
+                    rows.append(values)
+
+            created = 0
+            for i, (customer, error) in zip(index, register_customers(rows, index)):
+                if error:
+                    results[i] = {
+                        "status": status.HTTP_409_CONFLICT,
+                        "error": error,
+                        "errors": [{"field": "phone_number", "code": "duplicate", "message": error}]
+                    }
+                else:
+                    results[i] = {"status": status.HTTP_201_CREATED, **customer_detail(customer)}
+                    created += 1
+
+            return Response({
+                "created": created,
+                "failed": len(items) - created,
+                "results": results
+            }, status=status.HTTP_200_OK)
+
+        except Exception as e:
+            logger.error(f"Error in RegisterCustomersBulk: {str(e)}")
+            return Response({
+                "error": "Internal server error",
+                "details": str(e)
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+# /check-eligibility
+@replica_reads
+class CheckEligibility(APIView):
+    def post(self, request):
+        try:
+            values, invalid = LOAN_REQUEST.validate(request.data)
+            if invalid:
+                return Response(invalid.as_dict(), status=status.HTTP_400_BAD_REQUEST)
+            customer_id, loan_amount, tenure, interest_rate = values
 
             # Get customer
-            try:
-                customer = Customer.objects.get(customer_id=customer_id)
-            except Customer.DoesNotExist:
+            customer = customer_cache.get(customer_id)
+            if customer is None:
                 return Response({
                     "error": "Customer not found"
                 }, status=status.HTTP_404_NOT_FOUND)
             
             # Check eligibility 
             eligibility = check_credit_eligibility(customer, loan_amount, tenure, interest_rate)
-            
-            if not eligibility.get("approval"):
-                return Response({
-                    "customer_id": customer.customer_id,
-                    "approval": False,
-                    "message": eligibility.get("message", "Loan not approved"),
-                    "credit_score": eligibility.get("credit_score", 0)
-                }, status=status.HTTP_400_BAD_REQUEST)
-
-            return Response({
-                "customer_id": customer.customer_id,
-                "approval": True,
-                "interest_rate": interest_rate,
-                "corrected_interest_rate": eligibility.get("corrected_interest_rate"),
-                "tenure": tenure,
-                "monthly_installment": eligibility.get("monthly_installment"),
-                "credit_score": eligibility.get("credit_score", 0)
-            }, status=status.HTTP_200_OK)
+            body, code = eligibility_response(customer.customer_id, interest_rate, tenure, eligibility)
+            return Response(body, status=code)
 
         except Exception as e:
             logger.error(f"Error in CheckEligibility: {str(e)}")
@@ -122,97 +332,164 @@ class CheckEligibility(APIView):
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
-# /create-loan
-class CreateLoan(APIView):
+# /check-eligibility/batch
+@replica_reads
+class CheckEligibilityBatch(APIView):
     def post(self, request):
         try:
             data = request.data
-
-            # Check required fields
-            required_fields = {'customer_id', 'loan_amount', 'tenure', 'interest_rate'}
-            missing = [f for f in required_fields if f not in data]
-            if missing:
+            items = data.get('items') if isinstance(data, dict) else data
+            if not isinstance(items, list):
                 return Response(
-                    {"error": f"Missing required fields: {', '.join(missing)}"},
+                    {"error": "Expected a list of quotes"},
                     status=status.HTTP_400_BAD_REQUEST
                 )
-
-            # Validate and convert data types
-            try:
-                customer_id = int(data['customer_id'])
-                loan_amount = float(data['loan_amount'])
-                interest_rate = float(data['interest_rate'])
-                tenure = int(data['tenure'])
-            except (ValueError, TypeError) as e:
+            if len(items) > MAX_ELIGIBILITY_BATCH:
                 return Response(
-                    {"error": f"Invalid data types: {str(e)}"},
+                    {"error": f"At most {MAX_ELIGIBILITY_BATCH} quotes per batch"},
                     status=status.HTTP_400_BAD_REQUEST
                 )
 
-            # Validate ranges
-            if loan_amount <= 0:
-                return Response(
-                    {"error": "Loan amount must be positive"},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-            if tenure <= 0:
-                return Response(
-                    {"error": "Tenure must be positive"},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-            if interest_rate < 0:
+            results = [None] * len(items)
+            parsed = []
+            for i, (values, invalid) in enumerate(LOAN_REQUEST.validate_many(items)):
+                if invalid:
+                    results[i] = {"status": status.HTTP_400_BAD_REQUEST, **invalid.as_dict()}
+                else:
+                    parsed.append((i, values))
+
+            # At most one query for uncached customers (with profiles), one more for loan aggregates
+            customers = customer_cache.get_many(list({values[0] for _, values in parsed}))
+            stats = bulk_loan_stats(customers.values())
+
+            quotes = []
+            for i, (customer_id, loan_amount, tenure, interest_rate) in parsed:
+                customer = customers.get(customer_id)
+                if customer is None:
+                    results[i] = {
+                        "status": status.HTTP_404_NOT_FOUND,
+                        "customer_id": customer_id,
+                        "error": "Customer not found"
+                    }
+                    continue
+                quotes.append((i, (customer, stats[customer_id], loan_amount, tenure, interest_rate)))
+
+            decisions = evaluate_eligibility_batch([quote for _, quote in quotes])
+            for (i, (customer, _, _, tenure, interest_rate)), eligibility in zip(quotes, decisions):
+                body, code = eligibility_response(customer.customer_id, interest_rate, tenure, eligibility)
+                results[i] = {"status": code, **body}
+
+            return Response({"results": results}, status=status.HTTP_200_OK)
+
+        except Exception as e:
+            logger.error(f"Error in CheckEligibilityBatch: {str(e)}")
+            return Response({
+                "error": "Internal server error",
+                "details": str(e)
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+# /create-loan
+class CreateLoan(APIView):
+    def post(self, request):
+        # "Prefer: respond-async" queues the request for process_loan_queue and answers 202
+        prefer = request.headers.get('Prefer', '')
+        handler = self.enqueue if 'respond-async' in prefer.lower() else self.create
+
+        key = request.headers.get('Idempotency-Key')
+        if not key:
+            return handler(request.data)
+
+        try:
+            if len(key) > 255:
                 return Response(
-                    {"error": "Interest rate cannot be negative"},
+                    {"error": "Idempotency-Key must be at most 255 characters"},
                     status=status.HTTP_400_BAD_REQUEST
                 )
 
-            # Get customer
+            fingerprint = idempotency.request_fingerprint(request.data)
+            replay = self.replay(key, fingerprint)
+            if replay is not None:
+                return replay
+
             try:
-                customer = Customer.objects.get(customer_id=customer_id)
-            except Customer.DoesNotExist:
+                with transaction.atomic():
+                    response = handler(request.data)
+                    # Server errors are left unrecorded so the client can retry them
+                    if response.status_code < 500:
+                        idempotency.remember(key, fingerprint, response.status_code, response.data)
+            except IntegrityError:
+                # A concurrent request with the same key stored its response first
+                replay = self.replay(key, fingerprint)
+                if replay is None:
+                    raise
+                return replay
+            return response
+
+        except Exception as e:
+            logger.error(f"Error in CreateLoan: {str(e)}")
+            return Response({
+                "error": "Internal server error",
+                "details": str(e)
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    def replay(self, key, fingerprint):
+        stored = idempotency.lookup(key)
+        if stored is None:
+            return None
+        request_hash, status_code, body = stored
+        if request_hash != fingerprint:
+            return Response(
+                {"error": "Idempotency-Key was already used with a different payload"},
+                status=status.HTTP_422_UNPROCESSABLE_ENTITY
+            )
+        headers = {"Idempotent-Replayed": "true"}
+        if status_code == status.HTTP_202_ACCEPTED:
+            headers.update(accepted_headers(body["status_url"]))
+        return Response(body, status=status_code, headers=headers)
+
+    def create(self, data):
+        try:
+            values, invalid = LOAN_REQUEST.validate(data)
+            if invalid:
+                return Response(invalid.as_dict(), status=status.HTTP_400_BAD_REQUEST)
+            customer_id, loan_amount, tenure, interest_rate = values
+
+            body, code = book_loan(customer_id, loan_amount, tenure, interest_rate)
+            return Response(body, status=code)
+
+        except Exception as e:
+            logger.error(f"Error in CreateLoan: {str(e)}")
+            return Response({
+                "error": "Internal server error",
+                "details": str(e)
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+    def enqueue(self, data):
+        try:
+            values, invalid = LOAN_REQUEST.validate(data)
+            if invalid:
+                return Response(invalid.as_dict(), status=status.HTTP_400_BAD_REQUEST)
+            customer_id, loan_amount, tenure, interest_rate = values
+
+            if customer_cache.get(customer_id) is None:
                 return Response({
                     "error": "Customer not found"
                 }, status=status.HTTP_404_NOT_FOUND)
-            
-            # Check eligibility 
-            eligibility = check_credit_eligibility(customer, loan_amount, tenure, interest_rate)
-
-            if not eligibility.get("approval"):
-                return Response({
-                    "loan_id": None,
-                    "customer_id": customer.customer_id,
-                    "loan_approved": False,
-                    "message": eligibility.get("message", "Loan not approved"),
-                    "credit_score": eligibility.get("credit_score", 0)
-                }, status=status.HTTP_400_BAD_REQUEST)
 
-            # Create Loan
-            start_date = date.today()
-            end_date = start_date + timedelta(days=30 * tenure)
-
-            loan = Loan.objects.create(
-                customer=customer,
+            application = LoanApplication.objects.create(
+                customer_id=customer_id,
                 loan_amount=loan_amount,
                 tenure=tenure,
-                interest_rate=eligibility.get("corrected_interest_rate"),
-                monthly_repayment=eligibility.get("monthly_installment"),
-                emis_paid_on_time=0,
-                start_date=start_date,
-                end_date=end_date,
+                interest_rate=interest_rate,
+            )
+            location = f"/loan-applications/{application.pk}"
+            return Response(
+                {**loan_application_detail(application), "status_url": location},
+                status=status.HTTP_202_ACCEPTED,
+                headers=accepted_headers(location)
             )
-
-            # Update customer's current debt
-            customer.current_debt += loan_amount
-            customer.save()
-
-            return Response({
-                "loan_id": loan.loan_id,
-                "customer_id": customer.customer_id,
-                "loan_approved": True,
-                "message": "Loan approved and created successfully",
-                "monthly_repayment": eligibility.get("monthly_installment"),
-                "corrected_interest_rate": eligibility.get("corrected_interest_rate")
-            }, status=status.HTTP_201_CREATED)
 
         except Exception as e:
             logger.error(f"Error in CreateLoan: {str(e)}")
@@ -222,64 +499,225 @@ class CreateLoan(APIView):
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+# /loan-applications/<job_id>
+class ViewLoanApplication(APIView):
+    def get(self, request, job_id):
+        try:
+            application = LoanApplication.objects.get(pk=job_id)
+            return Response(loan_application_detail(application), status=status.HTTP_200_OK)
+        except LoanApplication.DoesNotExist:
+            return Response({
+                "error": "Loan application not found"
+            }, status=status.HTTP_404_NOT_FOUND)
+        except Exception as e:
+            logger.error(f"Error in ViewLoanApplication: {str(e)}")
+            return Response({
+                "error": "Internal server error"
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
 # /view-loan/<loan_id>
+@replica_reads
 class ViewLoan(APIView):
     def get(self, request, loan_id):
         try:
             # Get all past loans
             loan = Loan.objects.get(loan_id=loan_id)
-            customer = loan.customer
+            customer = customer_cache.get(loan.customer_id)
+            return Response(loan_detail(loan, customer), status=status.HTTP_200_OK)
+        except Loan.DoesNotExist:
+            return Response({
+                "error": "Loan not found"
+            }, status=status.HTTP_404_NOT_FOUND)
+        except Exception as e:
+            logger.error(f"Error in ViewLoan: {str(e)}")
+            return Response({
+                "error": "Internal server error"
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+# /view-loan/<loan_id>/schedule
+@replica_reads
+class ViewLoanSchedule(APIView):
+    # ?output=json (default) lists one object per month, ?output=columnar returns one array per
+    # column, and ?output=npy a NumPy structured array for clients that load it with np.load
+    def get(self, request, loan_id):
+        try:
+            output = request.query_params.get('output', 'json')
+            if output not in SCHEDULE_OUTPUTS:
+                return Response({
+                    "error": f"output must be one of: {', '.join(SCHEDULE_OUTPUTS)}"
+                }, status=status.HTTP_400_BAD_REQUEST)
+
+            loan = Loan.objects.get(loan_id=loan_id)
+            columns = amortization_schedule(loan.loan_amount, loan.interest_rate, loan.tenure, loan.start_date)
+
+            if output == 'npy':
+                table = np.empty(loan.tenure, dtype=[(name, column.dtype) for name, column in columns.items()])
+                for name, column in columns.items():
+                    table[name] = column
+                buffer = BytesIO()
+                np.save(buffer, table, allow_pickle=False)
+                response = HttpResponse(buffer.getvalue(), content_type="application/octet-stream")
+                response["Content-Disposition"] = f'attachment; filename="loan-{loan.loan_id}-schedule.npy"'
+                return response
+
+            columns["due_date"] = np.datetime_as_string(columns["due_date"])
+            if output == 'columnar':
+                schedule = columns
+            else:
+                names = list(columns)
+                schedule = [dict(zip(names, row)) for row in zip(*(column.tolist() for column in columns.values()))]
             return Response({
                 "loan_id": loan.loan_id,
-                "customer": {
-                    "id": customer.customer_id,
-                    "first_name": customer.first_name,
-                    "last_name": customer.last_name,
-                    "phone_number": customer.phone_number,
-                    "age": customer.age,
-                },
                 "loan_amount": loan.loan_amount,
                 "interest_rate": loan.interest_rate,
-                "monthly_installment": loan.monthly_repayment,
                 "tenure": loan.tenure,
+                "start_date": loan.start_date,
+                "schedule": schedule,
             }, status=status.HTTP_200_OK)
         except Loan.DoesNotExist:
             return Response({
                 "error": "Loan not found"
             }, status=status.HTTP_404_NOT_FOUND)
         except Exception as e:
-            logger.error(f"Error in ViewLoan: {str(e)}")
+            logger.error(f"Error in ViewLoanSchedule: {str(e)}")
+            return Response({
+                "error": "Internal server error"
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+# /loan-offers/<customer_id>
+@replica_reads
+class LoanOffers(APIView):
+    def get(self, request, customer_id):
+        try:
+            tenures, rates, error = parse_offer_params(request.query_params)
+            if error:
+                return Response({"error": error}, status=status.HTTP_400_BAD_REQUEST)
+
+            customer = customer_cache.get(customer_id)
+            if customer is None:
+                return Response({
+                    "error": "Customer not found"
+                }, status=status.HTTP_404_NOT_FOUND)
+
+            # One scoring pass, then every tenure and rate band in closed form
+            offers = loan_offers(customer, get_loan_stats(customer), rates, tenures)
+            body = {"customer_id": customer.customer_id, **offers}
+            code = status.HTTP_200_OK if offers["approval"] else status.HTTP_400_BAD_REQUEST
+            return Response(body, status=code)
+
+        except Exception as e:
+            logger.error(f"Error in LoanOffers: {str(e)}")
+            return Response({
+                "error": "Internal server error",
+                "details": str(e)
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+# /portfolio/summary
+@replica_reads
+class PortfolioSummary(APIView):
+    # Served from the rollup tables: a few dozen band rows plus ?days= (default 30) trend rows,
+    # however many loans there are. loan_amount is principal as booked; outstanding_principal
+    # (total_exposure) is what remains after the repayments `manage.py accrue_emis` has recorded.
+    def get(self, request):
+        try:
+            try:
+                days = int(request.query_params.get('days', 30))
+            except ValueError:
+                days = 0
+            if not 0 < days <= MAX_TREND_DAYS:
+                return Response({
+                    "error": f"days must be an integer between 1 and {MAX_TREND_DAYS}"
+                }, status=status.HTTP_400_BAD_REQUEST)
+
+            buckets = sum_shards(PortfolioBucket.objects.all(), 'tenure_band', 'interest_rate_band')
+            end = date.today()
+            start = end - timedelta(days=days - 1)
+            decisions = sum_shards(PortfolioDay.objects.filter(date__gte=start, date__lte=end), 'date')
+            return Response({
+                "total_loans": sum(bucket.loan_count for bucket in buckets),
+                "booked_principal": sum(bucket.loan_amount for bucket in buckets),
+                "total_exposure": sum(bucket.outstanding_principal for bucket in buckets),
+                "total_monthly_repayment": sum(bucket.monthly_repayment for bucket in buckets),
+                "by_tenure": band_totals(buckets, "tenure_band", TENURE_BANDS),
+                "by_interest_rate": band_totals(buckets, "interest_rate_band", INTEREST_RATE_BANDS),
+                "buckets": [
+                    {
+                        "tenure_band": bucket.tenure_band,
+                        "interest_rate_band": bucket.interest_rate_band,
+                        "loan_count": bucket.loan_count,
+                        "loan_amount": bucket.loan_amount,
+                        "monthly_repayment": bucket.monthly_repayment,
+                        "outstanding_principal": bucket.outstanding_principal,
+                    }
+                    for bucket in sorted(buckets, key=band_order)
+                ],
+                "approval_trend": approval_trend(decisions, start, end),
+            }, status=status.HTTP_200_OK)
+        except Exception as e:
+            logger.error(f"Error in PortfolioSummary: {str(e)}")
             return Response({
                 "error": "Internal server error"
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
 # /view-loans/<customer_id>
+@replica_reads
 class ViewLoans(APIView):
+    # ?limit=N[&after=<loan_id>] returns one page plus a cursor, ?stream=1 streams NDJSON,
+    # and no parameters keeps the original full list
     def get(self, request, customer_id):
         try:
+            params = request.query_params
+            after, limit, error = parse_page_params(params)
+            if error:
+                return Response({"error": error}, status=status.HTTP_400_BAD_REQUEST)
+
             # Validate customer exists
-            try:
-                customer = Customer.objects.get(customer_id=customer_id)
-            except Customer.DoesNotExist:
+            if customer_cache.get(customer_id) is None:
                 return Response({
                     "error": "Customer not found"
                 }, status=status.HTTP_404_NOT_FOUND)
-            
-            loans = Loan.objects.filter(customer=customer)
-            response = []
-            for loan in loans:
-                repayments_left = max(0, loan.tenure - loan.emis_paid_on_time)
-                response.append({
-                    "loan_id": loan.loan_id,
-                    "loan_amount": loan.loan_amount,
-                    "interest_rate": loan.interest_rate,
-                    "monthly_installment": loan.monthly_repayment,
-                    "repayments_left": repayments_left,
-                })
-            return Response(response, status=status.HTTP_200_OK)
+
+            loans = loan_list_queryset(customer_id, after)
+
+            if params.get('stream') in ('1', 'true', 'ndjson'):
+                # The rows are read after ReplicaPinMiddleware has finished the request, so the
+                # database is picked now, while the request's routing still applies
+                rows = loans.using(loans.db).iterator(chunk_size=2000)
+                if limit is not None:
+                    rows = islice(rows, limit)
+                lines = (orjson.dumps(loan_list_item(row)) + b"\n" for row in rows)
+                return StreamingHttpResponse(lines, content_type="application/x-ndjson")
+
+            if limit is None:
+                return Response([loan_list_item(row) for row in loans], status=status.HTTP_200_OK)
+
+            # One extra row tells whether another page follows
+            page = [loan_list_item(row) for row in loans[:limit + 1]]
+            next_cursor = page[limit - 1]["loan_id"] if len(page) > limit else None
+            return Response({
+                "results": page[:limit],
+                "next_cursor": next_cursor,
+            }, status=status.HTTP_200_OK)
         except Exception as e:
             logger.error(f"Error in ViewLoans: {str(e)}")
             return Response({
                 "error": "Internal server error"
-            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
\ No newline at end of file
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+# /pool-stats
+class PoolStats(APIView):
+    # Database connection usage of the process serving the request, for pool sizing
+    def get(self, request):
+        return Response(pool_stats(), status=status.HTTP_200_OK)
+
+
+class Metrics(APIView):
+    # Request, SQL and cache metrics of the process serving the scrape, in Prometheus text format
+    def get(self, request):
+        return HttpResponse(metrics.registry.render(), content_type=metrics.CONTENT_TYPE)